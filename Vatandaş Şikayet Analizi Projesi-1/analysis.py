@@ -0,0 +1,341 @@
+# analysis.py
+# Yorum analiz aşamaları (arayüzden bağımsız): Graph API çıktısını düzleştirme, delta,
+# yakın tekrar kümeleme, mahalle tespiti ve şikâyet/kategori sınıflandırması.
+# GUI akış hattı ve collector.py ortak kullanır; ModelReloader kayıt defterindeki (model_registry.py)
+# yeni model sürümlerini çalışan analizciye arka planda takar.
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+import pandas as pd
+
+import metrics
+import rules
+from data_store import CommentStore, compact_dtypes, parse_times
+from model_kodu import mahalle_bul_olur
+from model_registry import ModelRegistry, model_fingerprint
+from near_dup import NearDupIndex
+from settings import OLUR_MAHALLELER, COMPLAINT_PREPROCESS, CATEGORY_PREPROCESS
+
+def safe_url(u) -> str | None:
+    try:
+        if u is None: return None
+        if isinstance(u, float) and pd.isna(u): return None
+    except Exception:
+        pass
+    if isinstance(u, str):
+        s = u.strip()
+        return s if s.lower().startswith(("http://", "https://")) else None
+    return None
+
+def image_candidates(post: Dict[str, Any]) -> List[str]:
+    """
+    Gönderi görseli için denenecek URL'ler (Graph picture uçları + ekler), tekrarsız.
+    URL'ler erişim anahtarı içermez (depoya düz yazılır); anahtarı ImageService istek anında ekler.
+    """
+    c=[]
+    pid = post.get("id","")
+    if pid:
+        c.extend([
+            f"https://graph.facebook.com/{pid}/picture?type=large",
+            f"https://graph.facebook.com/{pid}/picture?type=normal",
+            f"https://graph.facebook.com/{pid}/picture?width=800",
+        ])
+    for k in ("full_picture","picture"):
+        if post.get(k): c.append(post[k])
+    atts=post.get("attachments") or {}; data=atts.get("data") or []
+    if isinstance(data,list) and data:
+        d0=data[0]
+        m=((d0.get("media") or {}).get("image") or {}).get("src")
+        if m: c.append(m)
+        subs=(d0.get("subattachments") or {}).get("data") or []
+        if isinstance(subs,list):
+            for s in subs:
+                mm=((s.get("media") or {}).get("image") or {}).get("src")
+                if mm: c.append(mm)
+        if d0.get("picture"): c.append(d0["picture"])
+    uniq=[]
+    for u in c:
+        su=safe_url(u)
+        if su and su not in uniq: uniq.append(su)
+    return uniq
+
+def flatten_bundle(bundle: List[Dict[str, Any]]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Graph API çıktısı -> (gönderi tablosu, ham yorumlar); satır başına dict yerine kolon listeleri."""
+    praw=[item.get("post",{}) or {} for item in bundle]
+    pids=[p.get("id","") for p in praw]
+    posts=pd.DataFrame({
+        "post_id":pids,
+        "post_message":[(p.get("message") or "").strip() for p in praw],
+        "post_time":[p.get("created_time","") for p in praw],
+        "post_url":[safe_url(p.get("permalink_url","")) for p in praw],
+        "post_pics":[image_candidates(p) for p in praw],
+    }, columns=["post_id","post_message","post_time","post_url","post_pics"])
+    posts=posts.drop_duplicates("post_id").set_index("post_id")
+    posts["post_time"], _=parse_times(posts["post_time"], "post_time")
+
+    pid, cid, msg, created, author = [], [], [], [], []
+    for p, item in zip(pids, bundle):
+        cs=item.get("comments") or []
+        if not cs: continue
+        pid.extend([p]*len(cs))
+        cid.extend([c.get("id","") for c in cs])
+        msg.extend([(c.get("message") or "").strip() for c in cs])
+        created.extend([c.get("created_time","") for c in cs])
+        author.extend([(c.get("from") or {}).get("name","") for c in cs])
+    df=pd.DataFrame({"post_id":pid,"comment_id":cid,"message":msg,"created":created,"author":author},
+                    columns=["post_id","comment_id","message","created","author"])
+    if df.empty: return posts, df
+    df["date"], _=parse_times(df["created"], "comment_time")
+    return posts, df
+
+def drop_known(store: CommentStore | None, chunk: Tuple[pd.DataFrame, pd.DataFrame]):
+    """Depoda zaten analiz edilmiş yorumlar yeniden sınıflandırılmaz (delta)."""
+    posts, df = chunk
+    if store is None or df.empty: return chunk
+    known=store.existing_ids(df["comment_id"].tolist())
+    if known: df=df[~df["comment_id"].isin(known)].reset_index(drop=True)
+    return posts, df
+
+def dedup(index: NearDupIndex, chunk: Tuple[pd.DataFrame, pd.DataFrame]):
+    """Her yeni yoruma yakın tekrar kümesi (cluster_id) atar; kümeler oturumlar arası sürer."""
+    posts, df = chunk
+    if df.empty: return chunk
+    with metrics.span("near_dup", len(df)):
+        df["cluster_id"] = index.assign(df["comment_id"].astype(str).tolist(), df["message"].astype(str).tolist())
+    return posts, df
+
+def locate(chunk: Tuple[pd.DataFrame, pd.DataFrame], mahalleler: List[str] = OLUR_MAHALLELER):
+    posts, df = chunk
+    if df.empty: return chunk
+    wl=mahalleler
+    with metrics.span("mahalle_bul", len(df)):
+        df["mahalle"]= [(mahalle_bul_olur(t, wl) or "") for t in df["message"].astype(str).tolist()]
+    return posts, df
+
+# (model klasörü, ön işleme) -> TextClassifier (yüklenemediyse None); aynı modeli kullanan tüm sayfalar tek kopyayı paylaşır
+_CLASSIFIERS: Dict[Tuple[str, Optional[str]], Any] = {}
+_CLF_LOCK = threading.Lock()
+
+def shared_classifier(model_dir: str, preprocess: Optional[str] = None):
+    key = (os.path.abspath(model_dir), preprocess)
+    with _CLF_LOCK:
+        if key not in _CLASSIFIERS:
+            from models import TextClassifier
+            try: _CLASSIFIERS[key] = TextClassifier(model_dir, preprocess=preprocess)
+            except Exception: _CLASSIFIERS[key] = None
+        return _CLASSIFIERS[key]
+
+def release_classifier(model_dir: str, preprocess: Optional[str] = None):
+    """Paylaşılan önbellekten çıkarır (model değişimi sonrası); elinde tutan analizciler kullanmaya devam eder."""
+    with _CLF_LOCK: _CLASSIFIERS.pop((os.path.abspath(model_dir), preprocess), None)
+
+class _Models(NamedTuple):
+    """Analyzer'ın model durumu; tek atamayla değiştirilir (classify bir kez okur)."""
+    complaint: Any
+    category: Any
+    version: str
+    encoder: str
+    tags: Tuple[str, str]   # küme önbelleği sürüm etiketleri: (şikâyet, kategori)
+
+class Analyzer:
+    """
+    Şikâyet + kategori sınıflandırıcıları; yüklenemeyen model boş etiket üretir.
+    Kategori için önce derlenmiş kurallar (rules.py) denenir, kesin olmayanlar BERT'e gider.
+    embed=True: şikâyet geçişi her yorum için cümle gömmesi de üretir ("embedding" kolonu,
+    benzer yorum araması için; encoder bu vektörlerin hangi modelden geldiğini etiketler).
+    "cluster_id" kolonu varsa (dedup aşaması) modeller küme başına bir kez, kümenin ilk görülen
+    yorumu için çalışır; etiketler kümenin tüm yorumlarına kopyalanır. Küme önbelleği görev başına
+    sürüm etiketlidir: swap() sonrası sadece değişen modelin etiketleri yeniden hesaplanır.
+    """
+    CLUSTER_CACHE = 50_000   # etiketleri hatırlanan küme sayısı (sonraki turlarda gelen kopyalar için)
+    def __init__(self, complaint_clf=None, category_clf=None, ruleset: rules.RuleSet | None = rules.DEFAULT,
+                 embed: bool = True):
+        self.rules = ruleset
+        self.rule_stats = rules.RuleStats()
+        self.embed = embed
+        self._state = self._models(complaint_clf, category_clf)
+        # görev -> cluster_id -> (sürüm etiketi, etiket[, gömme])
+        self._clusters: Dict[str, "OrderedDict[str, tuple]"] = {"sikayet": OrderedDict(), "kategori": OrderedDict()}
+        # load(): model tanımları, çözüldükleri klasörler ve defter (ModelReloader bunlara bakar)
+        self.sources: Tuple[Optional[str], Optional[str]] = (None, None)
+        self.dirs: Tuple[Optional[str], Optional[str]] = (None, None)
+        self.registry: Optional[ModelRegistry] = None
+
+    def _models(self, complaint_clf, category_clf) -> _Models:
+        rv = [self.rules.version] if self.rules is not None else []
+        tags = [c.version if c else "-" for c in (complaint_clf, category_clf)]
+        encoder = complaint_clf.version if self.embed and hasattr(complaint_clf, "predict_with_embeddings") else ""
+        return _Models(complaint_clf, category_clf, "|".join(tags + rv), encoder, (tags[0], "|".join(tags[1:] + rv)))
+
+    complaint_clf = property(lambda self: self._state.complaint)
+    category_clf = property(lambda self: self._state.category)
+    version = property(lambda self: self._state.version)
+    encoder = property(lambda self: self._state.encoder)
+
+    @classmethod
+    def load(cls, complaint_model: str, category_model: str,
+             registry: Optional[ModelRegistry] = None) -> "Analyzer":
+        """Model tanımı: klasör yolu ya da "registry:<görev>[@sürüm]" (model_registry.py)."""
+        registry = registry or ModelRegistry()
+        dirs = (registry.resolve(complaint_model), registry.resolve(category_model))
+        a = cls(shared_classifier(dirs[0], COMPLAINT_PREPROCESS), shared_classifier(dirs[1], CATEGORY_PREPROCESS))
+        a.sources, a.dirs, a.registry = (complaint_model, category_model), dirs, registry
+        return a
+
+    def swap(self, complaint_clf=None, category_clf=None, dirs: Optional[Tuple[str, str]] = None):
+        """Yeni sınıflandırıcıları tek atamayla takar (None: mevcut kalır); süren classify eski sürümle biter."""
+        st = self._state
+        if dirs is not None: self.dirs = tuple(dirs)
+        self._state = self._models(complaint_clf or st.complaint, category_clf or st.category)
+
+    def _complaint(self, st: _Models, texts: List[str]):
+        """(t_sikayet, gömmeler | None); hata: None (önbelleğe girmez)."""
+        try:
+            if st.encoder:
+                sik, e = st.complaint.predict_with_embeddings(texts); return list(sik), list(e)
+            return (list(st.complaint.predict(texts)) if st.complaint else [""]*len(texts)), None
+        except Exception: return None
+
+    def _category(self, st: _Models, texts: List[str]):
+        """(kategori,); model/kural yoksa ya da hata: None."""
+        try:
+            if self.rules is not None:
+                with metrics.span("rules", len(texts)):
+                    return (rules.predict_categories(texts, st.category, self.rules, self.rule_stats),)
+            return (st.category.predict(texts),) if st.category else None
+        except Exception: return None
+
+    def _classify_rows(self, st: _Models, texts: List[str]) -> Tuple[List[str], Optional[List[str]], Optional[List[Any]]]:
+        """(t_sikayet, kategori | None [model/kural yok], gömmeler | None)."""
+        sik, emb = self._complaint(st, texts) or ([""]*len(texts), None)
+        kat = self._category(st, texts)
+        return sik, kat[0] if kat is not None else None, emb
+
+    def _cached(self, task: str, tag: str, clusters: List[str], texts: List[str], run) -> List[Optional[tuple]]:
+        """
+        Küme başına önbellek: kaydı olmayan ya da sürüm etiketi tutmayan her kümenin ilk yorumu için
+        run çalışır. Küme sırasıyla kayıtlar (hata/eksikte None).
+        """
+        cache=self._clusters[task]; todo: Dict[str, int] = {}
+        for i, c in enumerate(clusters):
+            e=cache.get(c)
+            if e is not None and e[0] == tag: cache.move_to_end(c)
+            elif c not in todo: todo[c]=i
+        if todo:
+            out = run([texts[i] for i in todo.values()])
+            if out is not None:
+                for j, c in enumerate(todo):
+                    cache[c]=(tag,) + tuple(v[j] if v is not None else None for v in out); cache.move_to_end(c)
+        rows=[e if (e := cache.get(c)) is not None and e[0] == tag else None for c in clusters]
+        while len(cache) > self.CLUSTER_CACHE: cache.popitem(last=False)
+        return rows
+
+    def _classify_clusters(self, st: _Models, clusters: List[str], texts: List[str]):
+        """Önbellekte olmayan her kümenin ilk yorumu sınıflandırılır, sonuç tüm üyelere yayılır."""
+        s=self._cached("sikayet", st.tags[0], clusters, texts, lambda t: self._complaint(st, t))
+        k=self._cached("kategori", st.tags[1], clusters, texts, lambda t: self._category(st, t))
+        has_emb=all(r is not None and r[2] is not None for r in s)
+        return ([r[1] if r is not None else "" for r in s],
+                [r[1] for r in k] if all(r is not None for r in k) else None,
+                [r[2] for r in s] if has_emb else None)
+
+    def classify(self, chunk: Tuple[pd.DataFrame, pd.DataFrame]):
+        posts, df = chunk
+        if df.empty: return chunk
+        st=self._state   # tek okuma: tur ortasında swap olsa da parça tek model sürümüyle etiketlenir
+        texts=df["message"].astype(str).tolist()
+        if "cluster_id" in df.columns:
+            sik, kat, emb = self._classify_clusters(st, df["cluster_id"].astype(str).tolist(), texts)
+        else:
+            sik, kat, emb = self._classify_rows(st, texts)
+        df["t_sikayet"]=sik
+        if kat is not None: df["kategori"]=kat
+        elif "kategori" not in df.columns: df["kategori"]=""
+        if emb is not None: df["embedding"]=emb
+        df=compact_dtypes(df)
+        df.attrs.update(model_version=st.version, encoder=st.encoder)   # depo ve vektör indeksi bu sürümü yazar
+        return posts, df
+
+class ModelReloader:
+    """
+    Analyzer.load ile açılmış analizcinin model tanımlarını kayıt defterinde yeniden çözer (check).
+    Etkin sürüm değiştiyse yeni model arka plan iş parçacığında yüklenir, örnek bir tahminle ısıtılır
+    ve swap ile takılır; çıkarım beklemez, değişim bitene kadar eski model çalışmaya devam eder.
+    """
+    WARMUP = ["Mahallemizde iki gündür su yok, yol da çamur içinde."]
+
+    def __init__(self, analyzer: Analyzer):
+        self.analyzer = analyzer
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._events: List[str] = []
+        self._failed: set = set()   # yüklenemeyen hedefler (hedef ya da parmak izi değişene kadar denenmez)
+        self._target: Any = None     # son çözülen hedef: (klasör, parmak izi) çiftleri ya da çözüm hatası
+
+    @property
+    def busy(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def check(self) -> List[str]:
+        """Gerekirse yüklemeyi başlatır; son çağrıdan beri tamamlanan değişimlerin açıklamalarını döner."""
+        with self._lock: events, self._events = self._events, []
+        a = self.analyzer
+        if a.registry is None or self.busy: return events
+        try:
+            want = tuple(a.registry.resolve(s) for s in a.sources)
+            target: Any = tuple((d, self._fingerprint(d)) for d in want)
+        except RuntimeError as e: want, target = None, str(e)
+        if target != self._target: self._failed.clear(); self._target = target   # yeni hedef: yeniden dene
+        if want is None:
+            if target not in self._failed: self._failed.add(target); events.append(target)
+            return events
+        if want != tuple(a.dirs) and target not in self._failed:
+            self._thread = threading.Thread(target=self._load, args=(want, target), name="model-reload", daemon=True)
+            self._thread.start()
+        return events
+
+    @staticmethod
+    def _fingerprint(d: str) -> Optional[str]:
+        """Aynı klasöre yeniden yazılan modeli de fark etmek için; klasör yoksa / okunamıyorsa None."""
+        try: return model_fingerprint(d)
+        except OSError: return None
+
+    def _load(self, want: Tuple[str, str], target: Any):
+        a = self.analyzer; old = a.version; old_dirs = a.dirs
+        pre = (COMPLAINT_PREPROCESS, CATEGORY_PREPROCESS)
+        try:
+            new = []
+            for d, cur, p in zip(want, old_dirs, pre):
+                if cur is not None and os.path.abspath(d) == os.path.abspath(cur): new.append(None); continue
+                clf = shared_classifier(d, p)
+                if clf is None:
+                    release_classifier(d, p)   # başarısız yükleme önbellekte kalmasın
+                    raise RuntimeError(f"model yüklenemedi: {d}")
+                with metrics.span("model.warmup", len(self.WARMUP)): clf.predict(self.WARMUP)
+                new.append(clf)
+            a.swap(*new, dirs=want)
+            for d, cur, p, clf in zip(want, old_dirs, pre, new):
+                if clf is not None and cur is not None: release_classifier(cur, p)
+            msg = f"model değişti: {old} -> {a.version}"
+        except Exception as e:
+            self._failed.add(target); msg = f"model değişimi başarısız, {old} ile devam: {e}"
+        with self._lock: self._events.append(msg)
+
+def stages(analyzer: Analyzer, reader: Optional[CommentStore] = None,
+           writer: Optional[CommentStore] = None,
+           mahalleler: List[str] = OLUR_MAHALLELER) -> List[Tuple[str, Callable]]:
+    """pipeline.Pipeline için aşamalar: gönderi grubu -> (gönderiler, analiz edilmiş yorumlar)."""
+    index = NearDupIndex.from_store(reader) if reader is not None else NearDupIndex()
+    def save(chunk):
+        if writer is not None:
+            df = chunk[1]   # classify'ın damgaladığı sürüm (kayıt sırasında model değişmiş olabilir)
+            writer.upsert(*chunk, df.attrs.get("model_version", analyzer.version), df.attrs.get("encoder", analyzer.encoder))
+            writer.save_dup_roots(index.take_new_roots())
+        return chunk
+    return [("flatten", flatten_bundle),
+            ("delta",   lambda chunk: drop_known(reader, chunk)),
+            ("dedup",   lambda chunk: dedup(index, chunk)),
+            ("mahalle", lambda chunk: locate(chunk, mahalleler)),
+            ("classify", analyzer.classify),
+            ("store",   save)]
@@ -0,0 +1,136 @@
+# batch_analyze.py
+# Arayüzsüz toplu analiz: CSV / JSONL / Parquet yorum dökümlerini parça parça okur,
+# mahalle + şikâyet + kategori etiketlerini çok süreçli işçilerle ekler ve Parquet yazar.
+# PyQt5 içe aktarmaz; bellek kullanımı dosya boyundan bağımsızdır (aynı anda en fazla
+# 2 x işçi sayısı kadar parça bellekte bulunur).
+#
+# Örnek:
+#   python batch_analyze.py isim_yorum_temiz_etiket.csv -o cikti.parquet --workers 4
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from multiprocessing import get_context
+from typing import Iterator, List, Optional
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from export import ParquetSink
+from rules import predict_categories
+from model_registry import read_labels, resolve_model
+from settings import (OLUR_MAHALLELER, COMPLAINT_MODEL, CATEGORY_MODEL,
+                      COMPLAINT_PREPROCESS, CATEGORY_PREPROCESS)
+
+TEXT_COLS = ("message", "yorum", "temiz_yorum", "text")   # otomatik metin kolonu adayları
+
+# --- okuma ---
+def _format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".jsonl", ".ndjson", ".json"): return "jsonl"
+    if ext in (".parquet", ".pq"): return "parquet"
+    return "csv"
+
+def iter_chunks(path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    """Dosyayı chunksize satırlık DataFrame'ler halinde okur (CSV/JSONL kolonları metin olarak)."""
+    fmt = _format(path)
+    if fmt == "parquet":
+        pf = pq.ParquetFile(path)
+        for batch in pf.iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    elif fmt == "jsonl":
+        for df in pd.read_json(path, lines=True, chunksize=chunksize, dtype=False):
+            yield df
+    else:
+        for df in pd.read_csv(path, chunksize=chunksize, dtype=str, keep_default_na=False,
+                              encoding="utf-8-sig"):
+            yield df
+
+def _text_col(df: pd.DataFrame, name: Optional[str]) -> str:
+    if name:
+        if name not in df.columns: raise RuntimeError(f"'{name}' kolonu yok. Kolonlar: {list(df.columns)}")
+        return name
+    for c in TEXT_COLS:
+        if c in df.columns: return c
+    raise RuntimeError(f"Metin kolonu bulunamadı ({', '.join(TEXT_COLS)}); --text-col ile belirtin.")
+
+# --- işçi süreç ---
+_W = {}
+
+def _init_worker(complaint_dir: str, category_dir: str, use_models: bool, threads: int):
+    """Her süreç modelleri bir kez yükler (süreç başına bir kopya)."""
+    from model_kodu import mahalle_bul_olur
+    _W["mahalle"] = mahalle_bul_olur
+    _W["complaint"] = _W["category"] = None
+    # model yüklenmese de kurallar modelin etiket kümesiyle sınırlı (torch gerekmez)
+    _W["labels"] = frozenset(read_labels(category_dir).values()) if os.path.isdir(category_dir) else frozenset()
+    if not use_models: return
+    try:
+        import torch
+        torch.set_num_threads(max(1, threads))
+    except Exception:
+        pass
+    from models import TextClassifier
+    for key, d, pre in (("complaint", complaint_dir, COMPLAINT_PREPROCESS),
+                        ("category", category_dir, CATEGORY_PREPROCESS)):
+        try: _W[key] = TextClassifier(d, preprocess=pre)
+        except Exception as e: print(f"[batch] model yüklenemedi ({d}): {e}", file=sys.stderr)
+
+def _analyze(args) -> pd.DataFrame:
+    df, col = args
+    texts = df[col].fillna("").astype(str).tolist()
+    find = _W["mahalle"]
+    df["mahalle"] = [(find(t, OLUR_MAHALLELER) or "") for t in texts]
+    clf = _W["complaint"]
+    df["t_sikayet"] = clf.predict(texts) if clf is not None and texts else ""
+    # kesin kural isabetleri BERT'e gitmez (rules.py); --no-models ile sadece kesin kurallar,
+    # kategori modelinin etiketleri okunamazsa kategori boş kalır
+    df["kategori"] = predict_categories(texts, _W["category"], audit_rate=0.0, labels=_W["labels"]) if texts else ""
+    return df
+
+# --- ana akış ---
+def run(path: str, out: str, text_col: Optional[str] = None, chunksize: int = 5000,
+        workers: int = 0, use_models: bool = True) -> int:
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    ctx = get_context("spawn")   # torch + fork güvenli değil; Windows ile de aynı davranış
+    sink = ParquetSink(out)
+    total = 0; t0 = time.perf_counter(); col = None
+    pending: "deque" = deque()
+    with ctx.Pool(workers, initializer=_init_worker,
+                  initargs=(resolve_model(COMPLAINT_MODEL), resolve_model(CATEGORY_MODEL), use_models, threads)) as pool:
+        def drain(limit: int):
+            nonlocal total
+            while len(pending) > limit:
+                df = pending.popleft().get()
+                sink.write(df); total += len(df)
+                dt = time.perf_counter() - t0
+                print(f"[batch] {total:,} satır | {total/dt:,.0f} satır/sn", flush=True)
+        try:
+            for chunk in iter_chunks(path, chunksize):
+                col = col or _text_col(chunk, text_col)
+                pending.append(pool.apply_async(_analyze, ((chunk, col),)))
+                drain(2 * workers)   # okuma işçilerden fazla öne geçmez: sabit bellek
+            drain(0)
+        finally:
+            sink.close()
+    dt = time.perf_counter() - t0
+    print(f"[batch] bitti: {total:,} satır, {dt:.1f} sn, {total/max(dt, 1e-9):,.0f} satır/sn -> {out}")
+    return total
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description="Yorum dökümlerini arayüzsüz analiz eder (mahalle + şikâyet + kategori).")
+    ap.add_argument("input", help="CSV / JSONL / Parquet dosyası")
+    ap.add_argument("-o", "--output", help="Çıktı Parquet (varsayılan: <girdi>_analiz.parquet)")
+    ap.add_argument("--text-col", help=f"Metin kolonu (varsayılan: {', '.join(TEXT_COLS)} içinden ilki)")
+    ap.add_argument("--chunksize", type=int, default=5000, help="Parça başına satır")
+    ap.add_argument("--workers", type=int, default=0, help="İşçi süreç sayısı (varsayılan: çekirdek-1)")
+    ap.add_argument("--no-models", action="store_true", help="Sadece mahalle tespiti + kesin kural kategorisi (BERT modelleri yüklenmez; "
+                    "etiketler kategori modelinin label_mapping.json'undan, yoksa kategori boş)")
+    a = ap.parse_args(argv)
+    out = a.output or os.path.splitext(a.input)[0] + "_analiz.parquet"
+    run(a.input, out, a.text_col, a.chunksize, a.workers, not a.no_models)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# collector.py
+# Arka plan toplayıcı: sayfayı düzenli (rastgele kaydırılmış) aralıklarla yoklar, yeni yorumları
+# analiz edip yerel depoya ekler. GUI sadece depoyu okur (STORE_POLL_MS aralıkla yeni satırları alır).
+#   python collector.py            # sürekli çalışır (SIGTERM / Ctrl+C ile düzgün kapanır)
+#   python collector.py --once     # tek tur (cron / Görev Zamanlayıcı için)
+#   python collector.py --tenant oltu   # tenants.json'daki tek sayfa (varsayılan: hepsi, eşzamanlı)
+#
+# Kontrol noktası (COLLECTOR_STATE, atomik yazılan JSON):
+#   since   : son başarılı turun bitişindeki en yeni yorum zamanı (bir sonraki turun deltası)
+#   running : devam eden tur {"since", "started"}; tur yarıda kesilirse (çökme/kapatma) kalır ve
+#             bir sonraki tur aynı `since` ile yeniden başlar. Yazılmış yorumlar delta aşamasında
+#             atlandığı için eksik ya da çift kayıt oluşmaz.
+# Her kiracının deposu ve kontrol noktası ayrıdır; Graph API hız bütçesi (facebook_client.GRAPH_RATE)
+# ve aynı klasörden yüklenen modeller süreç içinde paylaşılır. Model kayıt defterinde etkin sürüm
+# değişirse (model_registry.py activate) yeni model tur başında arka planda yüklenip takılır.
+import argparse
+import json
+import os
+import random
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import metrics
+from analysis import Analyzer, ModelReloader, stages
+from data_store import CommentStore
+from facebook_client import iter_posts_with_comments
+from pipeline import Pipeline, growing_batches
+from settings import FETCH_POSTS, FETCH_COMMENTS, COLLECTOR_INTERVAL, COLLECTOR_JITTER
+from tenants import Tenant, default_tenant, load_tenants
+
+MAX_BACKOFF = 6 * 3600   # art arda hatalarda en uzun bekleme (sn)
+
+def load_state(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            st = json.load(f)
+        return st if isinstance(st, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def save_state(path: str, state: Dict[str, Any]):
+    """Geçici dosyaya yaz + fsync + os.replace: yarım yazılmış kontrol noktası oluşmaz."""
+    d = os.path.dirname(path)
+    if d: os.makedirs(d, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=1)
+        f.flush(); os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+class Collector:
+    def __init__(self, tenant: Optional[Tenant] = None, interval: int = COLLECTOR_INTERVAL,
+                 jitter: float = COLLECTOR_JITTER, stop_event: Optional[threading.Event] = None):
+        self.tenant = tenant or default_tenant()
+        self.store_path = self.tenant.store; self.state_path = self.tenant.state
+        self.interval = interval; self.jitter = jitter
+        self.tag = f"[collector:{self.tenant.key}]"
+        self.stop_event = stop_event or threading.Event()
+        self.pipe: Optional[Pipeline] = None
+        self.analyzer = Analyzer.load(self.tenant.complaint_model, self.tenant.category_model)
+        self.reloader = ModelReloader(self.analyzer)
+        self.state = load_state(self.state_path)
+
+    def stop(self, *_):
+        print(f"{self.tag} kapanıyor (devam eden parça tamamlanınca)", flush=True)
+        self.stop_event.set()
+        if self.pipe is not None: self.pipe.stop()
+
+    def run_once(self) -> bool:
+        """Tek tur; başarılıysa True. Yarıda kesilen tur kontrol noktasında 'running' olarak kalır."""
+        for msg in self.reloader.check(): print(f"{self.tag} {msg}", flush=True)
+        d = os.path.dirname(self.store_path)
+        if d: os.makedirs(d, exist_ok=True)
+        reader = CommentStore(self.store_path, check_same_thread=False)
+        writer = CommentStore(self.store_path, check_same_thread=False)
+        st = self.state; t = self.tenant
+        try:
+            run = st.get("running")
+            since = run["since"] if run else st.get("since", reader.last_time())
+            if not run:
+                st["running"] = {"since": since, "started": int(time.time())}
+                save_state(self.state_path, st)
+            t0 = time.time(); n = 0
+            self.pipe = Pipeline(
+                growing_batches(iter_posts_with_comments(limit_posts=FETCH_POSTS, limit_comments=FETCH_COMMENTS,
+                                                         since=since, page=t.page_id or None,
+                                                         token=t.token or None)),
+                stages(self.analyzer, reader, writer, t.mahalleler))
+            for _posts, df in self.pipe:
+                n += len(df)
+            if self.stop_event.is_set():
+                return False
+            st["since"] = writer.last_time() or since
+            st.pop("running", None)
+            st.update(last_ok=int(time.time()), last_added=n, failures=0, last_error=None)
+            save_state(self.state_path, st)
+            print(f"{self.tag} {n} yeni yorum, {time.time()-t0:.1f} sn | {self.pipe.report()}", flush=True)
+            print(f"{self.tag} {self.analyzer.rule_stats.report()}", flush=True)
+            metrics.record(f"collector.{t.key}", time.time() - t0, n); metrics.export()
+            return True
+        except Exception as e:
+            st["failures"] = int(st.get("failures") or 0) + 1
+            st["last_error"] = f"{type(e).__name__}: {e}"
+            save_state(self.state_path, st)
+            print(f"{self.tag} tur başarısız ({st['failures']}. kez): {e}", flush=True)
+            return False
+        finally:
+            self.pipe = None
+            reader.close(); writer.close()
+
+    def next_delay(self) -> float:
+        """Aralık ±jitter kaydırılır (sayfalar aynı anda yüklenmez); hatada üstel geri çekilme."""
+        base = self.interval * (2 ** min(int(self.state.get("failures") or 0), 10))
+        base = min(base, max(self.interval, MAX_BACKOFF))
+        return base * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def run_forever(self):
+        # ilk tur da kaydırılır: birden çok toplayıcı aynı anda başlatılırsa API'ye yığılmaz
+        if self.stop_event.wait(random.uniform(0, self.interval * self.jitter)): return
+        while not self.stop_event.is_set():
+            self.run_once()
+            delay = self.next_delay()
+            print(f"{self.tag} sonraki tur {delay:.0f} sn sonra", flush=True)
+            if self.stop_event.wait(delay): break
+
+def run_tenants(tenants: List[Tenant], interval: int = COLLECTOR_INTERVAL, once: bool = False) -> bool:
+    """Her kiracı kendi iş parçacığında; tek sinyal hepsini durdurur. once=True: hepsi başarılıysa True."""
+    stop_event = threading.Event()
+    collectors = [Collector(t, interval, stop_event=stop_event) for t in tenants]
+    def stop(*_):
+        print("[collector] kapanıyor (devam eden parçalar tamamlanınca)", flush=True)
+        stop_event.set()
+        for c in collectors:
+            if c.pipe is not None: c.pipe.stop()
+    signal.signal(signal.SIGINT, stop)
+    if hasattr(signal, "SIGTERM"): signal.signal(signal.SIGTERM, stop)
+    with ThreadPoolExecutor(max_workers=len(collectors), thread_name_prefix="collector") as ex:
+        futs = [ex.submit(c.run_once if once else c.run_forever) for c in collectors]
+        # ana iş parçacığı sinyalleri alabilsin diye kısa aralıklarla bekler
+        while not all(f.done() for f in futs): time.sleep(0.2)
+    return all(f.result() for f in futs) if once else True
+
+def main():
+    ap = argparse.ArgumentParser(description="Facebook yorumlarını arka planda toplar ve analiz edip depoya yazar.")
+    ap.add_argument("--once", action="store_true", help="Tek tur çalış ve çık")
+    ap.add_argument("--interval", type=int, default=COLLECTOR_INTERVAL, help="Turlar arası ortalama süre (sn)")
+    ap.add_argument("--tenant", action="append", help="Sadece bu kiracı(lar) (tekrarlanabilir; varsayılan: hepsi)")
+    ap.add_argument("--store", help="SQLite depo yolu (tek kiracıda geçersiz kılma)")
+    ap.add_argument("--state", help="Kontrol noktası dosyası (tek kiracıda geçersiz kılma)")
+    a = ap.parse_args()
+    tenants = load_tenants()
+    if a.tenant:
+        known = {t.key: t for t in tenants}
+        missing = [k for k in a.tenant if k not in known]
+        if missing: ap.error(f"tanımsız kiracı: {', '.join(missing)} (tanımlı: {', '.join(known)})")
+        tenants = [known[k] for k in a.tenant]
+    if a.store or a.state:
+        if len(tenants) != 1: ap.error("--store/--state yalnızca tek kiracıyla kullanılabilir")
+        tenants[0].store = a.store or tenants[0].store; tenants[0].state = a.state or tenants[0].state
+    ok = run_tenants(tenants, a.interval, a.once)
+    if a.once: raise SystemExit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
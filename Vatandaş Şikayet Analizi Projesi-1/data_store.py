@@ -1,8 +1,52 @@
 # data_store.py
 import pandas as pd
-from typing import Dict, List, Optional, Tuple
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from datetime import datetime
-import os, re
+import os, re, json, sqlite3, time
+try:
+    import pyarrow  # noqa: F401
+    _TEXT_DTYPE = pd.StringDtype("pyarrow")
+except Exception:
+    _TEXT_DTYPE = object
+
+# Tekrarlı etiket kolonları kategorik (int kod + küçük sözlük), serbest metin Arrow string
+LABEL_COLS = ("post_id", "mahalle", "kategori", "t_sikayet")
+TEXT_COLS  = ("comment_id", "message", "author", "cluster_id")
+
+def compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Yorum tablosunu kompakt tiplere çevirir (yerinde) ve döner."""
+    for c in LABEL_COLS:
+        if c in df.columns and not isinstance(df[c].dtype, pd.CategoricalDtype):
+            df[c] = df[c].fillna("").astype(str).astype("category")
+    for c in TEXT_COLS:
+        if c in df.columns and (df[c].dtype != _TEXT_DTYPE or df[c].hasnans):
+            df[c] = df[c].fillna("").astype(_TEXT_DTYPE)
+    return df
+
+def append_compact(df: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    """
+    Kompakt tablo + yeni parça: sadece parça çevrilir, kategoriler birleştirilip eklenir. Mevcut satırlar
+    yeniden kodlanmaz (akışta her parçada tüm tabloyu compact_dtypes'tan geçirmek karesel maliyet).
+    """
+    new = compact_dtypes(new.copy())
+    cols = {}
+    for c in LABEL_COLS:
+        if c in df.columns and c in new.columns and isinstance(df[c].dtype, pd.CategoricalDtype):
+            extra = new[c].cat.categories.difference(df[c].cat.categories)
+            if len(extra): cols[c] = df[c].cat.add_categories(extra)
+            new[c] = new[c].cat.set_categories(df[c].cat.categories.append(extra))
+    if cols: df = df.assign(**cols)
+    return compact_dtypes(pd.concat([df, new], ignore_index=True))   # eksik kolon varsa sadece o çevrilir
+
+def _count_labels(s: pd.Series, name: str) -> pd.DataFrame:
+    # groupby yerine kategorik kodlar üzerinde bincount; boş etiket ("") sayılmaz
+    if not isinstance(s.dtype, pd.CategoricalDtype): s = s.fillna("").astype(str).astype("category")
+    codes = s.cat.codes.to_numpy()
+    cnt = np.bincount(codes[codes >= 0], minlength=len(s.cat.categories))
+    g = pd.DataFrame({name: np.asarray(s.cat.categories, dtype=object), "count": cnt})
+    g = g[(g["count"] > 0) & (g[name] != "")]
+    return g.sort_values("count", ascending=False, kind="stable").reset_index(drop=True)
 
 def load_mahalle_coords(csv_path: str) -> Dict[str, Tuple[float,float]]:
     if not os.path.exists(csv_path):
@@ -31,41 +75,272 @@ def parse_mahalle(text: str, known_names: List[str]) -> Optional[str]:
     # en uzun eşleşen
     return sorted(hits, key=len, reverse=True)[0]
 
-def flatten(posts_with_comments: List[dict]) -> pd.DataFrame:
-    """post + comments -> DataFrame: post_id, post_time, post_msg, comment_id, comment_time, author, message"""
-    rows = []
-    for p in posts_with_comments:
-        post = p.get("post", {})
-        pid = post.get("id", "")
-        pmsg = post.get("message", "") or ""
-        ptime = post.get("created_time", "")
-        for c in p.get("comments", []):
-            rows.append({
-                "post_id": pid,
-                "post_time": ptime,
-                "post_message": pmsg,
-                "comment_id": c.get("id", ""),
-                "comment_time": c.get("created_time", ""),
-                "author": (c.get("from") or {}).get("name", ""),
-                "message": c.get("message", "") or ""
-            })
-    df = pd.DataFrame(rows)
-    if len(df)==0:
-        return pd.DataFrame(columns=["post_id","post_time","post_message","comment_id","comment_time","author","message","date"])
-    # ISO -> date
-    def to_date(s):
-        try:
-            return datetime.fromisoformat(s.replace("Z","+00:00"))
-        except Exception:
-            return pd.NaT
-    df["date"] = df["comment_time"].apply(to_date)
-    df = df.sort_values("date", ascending=False).reset_index(drop=True)
-    return df
+def parse_times(s: pd.Series, name: str = "zaman") -> Tuple[pd.Series, int]:
+    """
+    ISO-8601 (Graph API: '2024-01-01T10:00:00+0000') -> tz-aware UTC datetime64, tek vektörel geçiş.
+    (seri, çözümlenemeyen dolu satır sayısı) döner; sayı > 0 ise loglanır.
+    """
+    t = pd.to_datetime(s, utc=True, format="ISO8601", errors="coerce")
+    filled = s.notna() & (s.astype(str).str.strip() != "")
+    bad = int((t.isna() & filled).sum())
+    if bad:
+        print(f"[data_store] {name}: {bad} satırın zamanı çözümlenemedi")
+    return t, bad
+
+def _one_per_cluster(df: pd.DataFrame, col: str) -> pd.Series:
+    """col etiketleri, her yakın tekrar kümesinden (near_dup) etiket başına tek satırla."""
+    if "cluster_id" not in df.columns: return df[col]
+    cl = df["cluster_id"].astype(object).fillna("")
+    key = cl.where(cl != "", df["comment_id"].astype(object))   # kümesiz yorum kendisi sayılır
+    dup = pd.DataFrame({"k": key.to_numpy(), "v": df[col].astype(object).to_numpy()}).duplicated().to_numpy()
+    return df[col][~dup]
+
+def summarize_by_mahalle(df: pd.DataFrame, clusters: bool = False) -> pd.DataFrame:
+    """clusters=True: kopyala-yapıştır kampanyaları mahalle başına bir kez sayılır."""
+    return _count_labels(_one_per_cluster(df, "mahalle") if clusters else df["mahalle"], "mahalle")
+
+def summarize_by_category(df: pd.DataFrame, clusters: bool = False) -> pd.DataFrame:
+    return _count_labels(_one_per_cluster(df, "kategori") if clusters else df["kategori"], "kategori")
+
+# ---- Kalıcı depo (SQLite) ----------------------------------------------------
+# Analiz edilmiş yorumlar diskte tutulur; uygulama açılışta geçmişi buradan okur
+# ve ağdan sadece yeni yorumları (delta) çeker. Zamanlar UTC epoch saniyesi.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts(
+  post_id TEXT PRIMARY KEY,
+  post_time INTEGER,
+  post_message TEXT,
+  post_url TEXT,
+  post_pics TEXT
+);
+CREATE TABLE IF NOT EXISTS comments(
+  comment_id TEXT PRIMARY KEY,
+  post_id TEXT,
+  comment_time INTEGER,
+  author TEXT,
+  message TEXT,
+  mahalle TEXT,
+  t_sikayet TEXT,
+  kategori TEXT,
+  model_version TEXT,
+  updated_at INTEGER,
+  cluster_id TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_comments_time ON comments(comment_time);
+CREATE INDEX IF NOT EXISTS ix_comments_mahalle ON comments(mahalle, comment_time);
+CREATE INDEX IF NOT EXISTS ix_comments_post ON comments(post_id);
+CREATE INDEX IF NOT EXISTS ix_comments_updated ON comments(updated_at);
+CREATE TABLE IF NOT EXISTS embeddings(
+  comment_id TEXT PRIMARY KEY,
+  encoder TEXT,
+  vec BLOB
+);
+CREATE TABLE IF NOT EXISTS dup_roots(
+  cluster_id TEXT PRIMARY KEY,
+  sig BLOB
+);
+"""
+
+_COMMENT_COLS = ["comment_id","post_id","comment_time","author","message",
+                 "mahalle","t_sikayet","kategori","model_version","updated_at","cluster_id"]
+
+def _epoch(s: pd.Series) -> List[Optional[int]]:
+    """datetime/ISO serisi -> epoch saniye listesi (NaT -> None)."""
+    t = pd.to_datetime(s, utc=True, errors="coerce")
+    sec = np.asarray(t.dt.tz_convert(None).values, dtype="datetime64[s]").astype("int64")
+    return [None if bad else int(v) for v, bad in zip(sec, t.isna().to_numpy())]
+
+def _utc_seconds(x) -> int:
+    t = pd.Timestamp(x)
+    t = t.tz_localize("UTC") if t.tzinfo is None else t.tz_convert("UTC")
+    return int(t.timestamp())
+
+_TOKEN_RE = re.compile(r"([?&])access_token=[^&#]*&?")
+
+def strip_token(url: str) -> str:
+    """URL'den Graph erişim anahtarını çıkarır (depoya anahtar yazılmaz; ImageService istekte ekler)."""
+    if not isinstance(url, str) or "access_token=" not in url: return url
+    return _TOKEN_RE.sub(r"\1", url).rstrip("?&")
+
+def _pics_json(pics) -> str:
+    return json.dumps([strip_token(u) for u in pics] if isinstance(pics, list) else [], ensure_ascii=False)
+
+def _from_epoch(s: pd.Series) -> pd.Series:
+    return pd.to_datetime(s, unit="s", utc=True, errors="coerce")
+
+class CommentStore:
+    """
+    Analiz edilmiş yorumlar için SQLite deposu: posts (gönderi başına bir satır) + comments.
+    - comment_id üzerinden upsert
+    - tarih/mahalle filtreleri SQL'e itilir (indeksli sorgu)
+    - load() ile sadece istenen tarih aralığı belleğe alınır (lazy)
+    """
+    def __init__(self, path: str, check_same_thread: bool = True):
+        # check_same_thread=False: bağlantı başka iş parçacığında açılıp (tek seferde tek
+        # iş parçacığı kullanmak şartıyla) akış hattı aşamasında kullanılabilir
+        d = os.path.dirname(path)
+        if d: os.makedirs(d, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=check_same_thread)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        # eski depolar: comments tablosuna sonradan eklenen kolonlar
+        have = {r[1] for r in self.conn.execute("PRAGMA table_info(comments)")}
+        if "cluster_id" not in have:
+            with self.conn: self.conn.execute("ALTER TABLE comments ADD COLUMN cluster_id TEXT")
+        # eski depolar: görsel URL'lerine gömülmüş erişim anahtarları temizlenir
+        leaked = self.conn.execute("SELECT post_id, post_pics FROM posts WHERE post_pics LIKE '%access_token=%'").fetchall()
+        if leaked:
+            with self.conn:
+                self.conn.executemany("UPDATE posts SET post_pics=? WHERE post_id=?",
+                                      [(_pics_json(json.loads(v)), pid) for pid, v in leaked])
+
+    def close(self):
+        self.conn.close()
+
+    # --- yazma ---
+    def upsert(self, posts: pd.DataFrame, comments: pd.DataFrame, model_version: str = "", encoder: str = ""):
+        """
+        Gönderi tablosunu (post_id indeksli) ve analiz edilmiş yorumları depoya yazar.
+        comments'ta "embedding" kolonu varsa (float16 vektörler) embeddings tablosuna encoder etiketiyle yazılır.
+        "cluster_id" kolonu yoksa depodaki küme bilgisi korunur.
+        """
+        now = int(time.time())
+        with self.conn:
+            if posts is not None and not posts.empty:
+                prow = zip(posts.index, _epoch(posts["post_time"]), posts["post_message"], posts["post_url"],
+                           [_pics_json(p) for p in posts["post_pics"]])
+                self.conn.executemany(
+                    "INSERT INTO posts VALUES (?,?,?,?,?) ON CONFLICT(post_id) DO UPDATE SET "
+                    "post_time=excluded.post_time, post_message=excluded.post_message, "
+                    "post_url=excluded.post_url, post_pics=excluded.post_pics", prow)
+            if comments is not None and not comments.empty:
+                com = comments[comments["comment_id"].astype(str) != ""]
+                crow = zip(com["comment_id"], com["post_id"], _epoch(com["date"]), com["author"], com["message"],
+                           com["mahalle"], com["t_sikayet"], com["kategori"],
+                           [model_version]*len(com), [now]*len(com),
+                           com["cluster_id"] if "cluster_id" in com.columns else [None]*len(com))
+                self.conn.executemany(
+                    f"INSERT INTO comments ({','.join(_COMMENT_COLS)}) VALUES ({','.join('?'*len(_COMMENT_COLS))}) "
+                    "ON CONFLICT(comment_id) DO UPDATE SET "
+                    + ", ".join(f"{c}=excluded.{c}" for c in _COMMENT_COLS[1:-1])
+                    + ", cluster_id=COALESCE(excluded.cluster_id, cluster_id)", crow)
+                if "embedding" in com.columns and encoder:
+                    erow = [(cid, encoder, np.asarray(v, dtype=np.float16).tobytes())
+                            for cid, v in zip(com["comment_id"], com["embedding"]) if v is not None]
+                    self.conn.executemany(
+                        "INSERT INTO embeddings VALUES (?,?,?) ON CONFLICT(comment_id) DO UPDATE SET "
+                        "encoder=excluded.encoder, vec=excluded.vec", erow)
+
+    def save_dup_roots(self, roots: List[Tuple[str, bytes]]):
+        """Yakın tekrar kümelerinin kökleri: (cluster_id, MinHash imzası baytları)."""
+        if not roots: return
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO dup_roots VALUES (?,?)", roots)
+
+    # --- okuma ---
+    def existing_ids(self, ids: Iterable[str]) -> Set[str]:
+        """Depoda zaten bulunan comment_id'ler (delta tespiti için)."""
+        ids = [i for i in ids if i]
+        out: Set[str] = set()
+        for k in range(0, len(ids), 500):
+            part = ids[k:k+500]
+            q = f"SELECT comment_id FROM comments WHERE comment_id IN ({','.join('?'*len(part))})"
+            out.update(r[0] for r in self.conn.execute(q, part))
+        return out
+
+    def last_time(self) -> Optional[int]:
+        r = self.conn.execute("SELECT MAX(comment_time) FROM comments").fetchone()
+        return r[0] if r and r[0] is not None else None
+
+    def last_update(self) -> int:
+        """En son yazma zamanı (epoch sn); başka süreçlerin (collector) eklediklerini fark etmek için."""
+        r = self.conn.execute("SELECT MAX(updated_at) FROM comments").fetchone()
+        return int(r[0]) if r and r[0] is not None else 0
+
+    def load_embeddings(self, encoder: str, ids: Optional[Iterable[str]] = None) -> Tuple[List[str], np.ndarray]:
+        """encoder ile üretilmiş vektörler: (comment_id listesi, float16 matris). ids verilirse sadece onlar."""
+        if ids is None:
+            rows = self.conn.execute("SELECT comment_id, vec FROM embeddings WHERE encoder = ?", (encoder,)).fetchall()
+        else:
+            ids = [i for i in ids if i]; rows = []
+            for k in range(0, len(ids), 500):
+                part = ids[k:k+500]
+                rows += self.conn.execute(f"SELECT comment_id, vec FROM embeddings WHERE encoder = ? AND "
+                                          f"comment_id IN ({','.join('?'*len(part))})", [encoder, *part]).fetchall()
+        if not rows: return [], np.zeros((0, 0), dtype=np.float16)
+        mat = np.frombuffer(b"".join(r[1] for r in rows), dtype=np.float16).reshape(len(rows), -1)
+        return [r[0] for r in rows], mat
+
+    def load_dup_roots(self) -> Tuple[List[str], np.ndarray]:
+        """(cluster_id listesi, uint32 imza matrisi) — near_dup.NearDupIndex.from_store için."""
+        rows = self.conn.execute("SELECT cluster_id, sig FROM dup_roots").fetchall()
+        if not rows: return [], np.zeros((0, 0), dtype=np.uint32)
+        return [r[0] for r in rows], np.frombuffer(b"".join(r[1] for r in rows), dtype=np.uint32).reshape(len(rows), -1)
+
+    def load_labels(self, start: Optional[datetime] = None) -> pd.DataFrame:
+        """Sadece zaman + etiketler (trends.TrendEngine için; mesaj metni okunmaz)."""
+        sql, params = "SELECT comment_time, mahalle, kategori FROM comments", []
+        if start is not None:
+            sql += " WHERE comment_time >= ?"; params.append(_utc_seconds(start))
+        df = pd.read_sql_query(sql, self.conn, params=params)
+        df["date"] = _from_epoch(df["comment_time"])
+        return compact_dtypes(df.drop(columns=["comment_time"]))
+
+    def load_by_ids(self, ids: Iterable[str]) -> pd.DataFrame:
+        """Belirli yorumlar (bellekteki tarih aralığının dışında kalabilecek benzer yorumlar için)."""
+        ids = [i for i in ids if i]; parts = []
+        for k in range(0, len(ids), 500):
+            part = ids[k:k+500]
+            parts.append(pd.read_sql_query(
+                "SELECT post_id, comment_id, message, comment_time, author, mahalle, t_sikayet, kategori "
+                f"FROM comments WHERE comment_id IN ({','.join('?'*len(part))})", self.conn, params=part))
+        df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(
+            columns=["post_id","comment_id","message","comment_time","author","mahalle","t_sikayet","kategori"])
+        df["date"] = _from_epoch(df["comment_time"])
+        return compact_dtypes(df.drop(columns=["comment_time"]))
+
+    def count(self) -> int:
+        return int(self.conn.execute("SELECT COUNT(*) FROM comments").fetchone()[0])
 
-def summarize_by_mahalle(df: pd.DataFrame) -> pd.DataFrame:
-    g = df.groupby("mahalle").size().reset_index(name="count")
-    return g.sort_values("count", ascending=False)
+    def load_posts(self, post_ids: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Gönderiler (post_id indeksli); görsel listeleri gönderi başına bir kez tutulur. post_ids verilirse sadece onlar."""
+        if post_ids is None:
+            df = pd.read_sql_query("SELECT * FROM posts", self.conn)
+        else:
+            ids = [i for i in dict.fromkeys(post_ids) if i]
+            parts = [pd.read_sql_query(f"SELECT * FROM posts WHERE post_id IN ({','.join('?'*len(ids[k:k+500]))})",
+                                       self.conn, params=ids[k:k+500]) for k in range(0, len(ids), 500)]
+            df = pd.concat(parts, ignore_index=True) if parts else pd.read_sql_query("SELECT * FROM posts LIMIT 0", self.conn)
+        df["post_time"] = _from_epoch(df["post_time"])
+        df["post_pics"] = [json.loads(v) if v else [] for v in df["post_pics"]]
+        for c in ("post_message","post_url"):
+            df[c] = df[c].fillna("")
+        return df.set_index("post_id")
 
-def summarize_by_category(df: pd.DataFrame) -> pd.DataFrame:
-    g = df.groupby("kategori").size().reset_index(name="count")
-    return g.sort_values("count", ascending=False)
+    def load(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+             mahalle: Optional[str] = None, updated_after: Optional[int] = None) -> pd.DataFrame:
+        """
+        [start, end) aralığındaki yorumlar (gönderi alanları olmadan; post_id ile load_posts'a bağlanır).
+        Filtreler WHERE koşuluna itilir; tarih yoksa tüm geçmiş okunur.
+        updated_after: sadece bu epoch saniyesinden sonra yazılmış satırlar.
+        """
+        where, params = [], []
+        if updated_after is not None:
+            where.append("updated_at > ?"); params.append(int(updated_after))
+        if start is not None:
+            where.append("comment_time >= ?"); params.append(_utc_seconds(start))
+        if end is not None:
+            where.append("comment_time < ?"); params.append(_utc_seconds(end))
+        if mahalle:
+            where.append("mahalle = ?"); params.append(mahalle)
+        sql = ("SELECT post_id, comment_id, message, comment_time, author, mahalle, t_sikayet, kategori, "
+               "model_version, cluster_id FROM comments")
+        if where: sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY comment_time"
+        df = pd.read_sql_query(sql, self.conn, params=params)
+        df["date"] = _from_epoch(df["comment_time"])
+        df = df.drop(columns=["comment_time"])
+        return compact_dtypes(df)
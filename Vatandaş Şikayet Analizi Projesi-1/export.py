@@ -0,0 +1,145 @@
+# export.py
+# Görünümlerin (filtrelenmiş yorumlar, özet tablolar) CSV / Excel / Parquet'e parça parça yazılması.
+# Tablo kopyalanmaz: satır konumları üzerinden CHUNK_ROWS'luk dilimler çevrilip yazılır, bellek
+# kullanımı dışa aktarılan satır sayısından bağımsızdır. Uygulanan filtreler ve model sürümü
+# dosyaya meta veri olarak gömülür:
+#   CSV      başta "# anahtar: değer" satırları (pandas: read_csv(yol, comment="#"))
+#   Excel    "Bilgi" sayfası (openpyxl write-only; sayfa satır sınırını aşan görünüm yeni sayfaya taşar)
+#   Parquet  şema meta verisi, META_KEY anahtarında JSON
+# Dosya önce "<ad>.part<uzantı>" olarak yazılır, bitince yerine taşınır: iptal/hata yarım dosya bırakmaz.
+# PyQt5 içe aktarmaz; GUI'de main.ExportWorker arka planda çağırır, batch_analyze Parquet yazıcısını kullanır.
+import json
+import os
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+FORMATS = (".csv", ".xlsx", ".parquet")
+CHUNK_ROWS = 50_000
+META_KEY = b"sikayet"
+EXCEL_MAX_ROWS = 1_048_575   # başlık satırı hariç sayfa başına
+
+_ILLEGAL_XML = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")   # Excel hücresine yazılamayan kontrol karakterleri
+
+def _naive_utc(df: pd.DataFrame) -> pd.DataFrame:
+    """Saat dilimli kolonlar UTC'de saat dilimsiz: Excel dilim tutmaz, CSV'de dilimli biçimleme ~6 kat yavaş."""
+    tz = [c for c in df.columns if isinstance(df[c].dtype, pd.DatetimeTZDtype)]
+    return df.assign(**{c: df[c].dt.tz_convert(None) for c in tz}) if tz else df
+
+def _with_tz_note(meta: Optional[Dict[str, str]]) -> Dict[str, str]:
+    return {**(meta or {}), "zaman dilimi": "UTC"}
+
+class ParquetSink:
+    """İlk parçanın şemasını sabitler; sonraki parçalar bu şemaya çevrilerek eklenir."""
+    def __init__(self, path: str, meta: Optional[Dict[str, str]] = None):
+        self.path = path; self.meta = meta; self.writer: Optional[pq.ParquetWriter] = None; self.schema = None
+
+    def write(self, df: pd.DataFrame):
+        if self.writer is None:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            self.schema = table.schema
+            if self.meta:
+                self.schema = self.schema.with_metadata({**(self.schema.metadata or {}),
+                                                         META_KEY: json.dumps(self.meta, ensure_ascii=False).encode("utf-8")})
+                table = table.replace_schema_metadata(self.schema.metadata)
+            self.writer = pq.ParquetWriter(self.path, self.schema, compression="zstd")
+        else:
+            try:
+                table = pa.Table.from_pandas(df, schema=self.schema, preserve_index=False)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                # parçalar arası tip kayması (ör. hep boş kolon): kolon kolon şemaya çevir, boşlar boş kalır
+                table = pa.Table.from_arrays([pa.array(df[f.name], from_pandas=True).cast(f.type)
+                                              for f in self.schema], schema=self.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None: self.writer.close()
+
+class _CsvSink:
+    def __init__(self, path: str, meta: Optional[Dict[str, str]] = None):
+        # utf-8-sig: Excel'de çift tıklayınca Türkçe karakterler doğru görünür
+        self.f = open(path, "w", encoding="utf-8-sig", newline="")
+        for k, v in _with_tz_note(meta).items():
+            self.f.write(f"# {k}: {str(v).replace(chr(10), ' ')}\n")
+        self.header = True
+
+    def write(self, df: pd.DataFrame):
+        _naive_utc(df).to_csv(self.f, header=self.header, index=False); self.header = False
+
+    def close(self): self.f.close()
+
+class _ExcelSink:
+    def __init__(self, path: str, meta: Optional[Dict[str, str]] = None):
+        try:
+            from openpyxl import Workbook
+        except ImportError:
+            raise RuntimeError("Excel çıktısı için openpyxl kurulu değil (pip install openpyxl); CSV ya da Parquet seçin.")
+        self.path = path; self.meta = _with_tz_note(meta)
+        self.wb = Workbook(write_only=True); self.ws = None; self.rows = 0; self.sheets = 0
+
+    def _values(self, df: pd.DataFrame) -> pd.DataFrame:
+        out = {}; df = _naive_utc(df)
+        for c in df.columns:
+            s = df[c].astype(object)
+            s = s.where(s.notna(), None)
+            if s.map(lambda v: isinstance(v, str)).any():
+                s = s.map(lambda v: _ILLEGAL_XML.sub("", v) if isinstance(v, str) else v)
+            out[c] = s
+        return pd.DataFrame(out, columns=df.columns)
+
+    def write(self, df: pd.DataFrame):
+        for row in self._values(df).itertuples(index=False, name=None):
+            if self.ws is None or self.rows >= EXCEL_MAX_ROWS:
+                self.sheets += 1
+                self.ws = self.wb.create_sheet("Veri" if self.sheets == 1 else f"Veri {self.sheets}")
+                self.ws.append(list(df.columns)); self.rows = 0
+            self.ws.append(list(row)); self.rows += 1
+
+    def close(self):
+        info = self.wb.create_sheet("Bilgi")
+        for k, v in self.meta.items(): info.append([k, str(v)])
+        self.wb.save(self.path)
+
+_SINKS = {".csv": _CsvSink, ".xlsx": _ExcelSink, ".parquet": ParquetSink}
+
+def export_frame(df: pd.DataFrame, path: str, meta: Optional[Dict[str, str]] = None,
+                 rows: Optional[np.ndarray] = None, columns: Optional[Sequence[str]] = None,
+                 progress: Optional[Callable[[int, int], None]] = None,
+                 cancel: Optional[threading.Event] = None, chunk_rows: int = CHUNK_ROWS) -> Optional[int]:
+    """
+    df'in rows konumlarındaki (None: hepsi) satırlarını, columns (None: hepsi) kolonlarıyla path'e yazar.
+    Biçim uzantıdan seçilir. Yazılan satır sayısını döner; cancel tetiklenirse dosya bırakılmaz, None döner.
+    progress(yazılan, toplam) her parçadan sonra çağrılır.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in _SINKS:
+        raise RuntimeError(f"Desteklenmeyen dışa aktarma biçimi: {ext or '(uzantı yok)'} ({', '.join(FORMATS)})")
+    cols: List[str] = [c for c in (columns or df.columns) if c in df.columns]
+    total = len(df) if rows is None else len(rows)
+    root, _ = os.path.splitext(path); part = f"{root}.part{ext}"
+    sink = _SINKS[ext](part, meta)
+    done = 0; cancelled = False
+    try:
+        for i in range(0, max(total, 1), chunk_rows):
+            if cancel is not None and cancel.is_set(): cancelled = True; break
+            chunk = df.iloc[i:i + chunk_rows] if rows is None else df.iloc[rows[i:i + chunk_rows]]
+            sink.write(chunk[cols]); done += len(chunk)   # boş görünümde de başlık yazılır
+            if progress is not None: progress(done, total)
+    except BaseException:
+        try: sink.close()
+        finally: _remove(part)
+        raise
+    sink.close()
+    if cancelled:
+        _remove(part); return None
+    os.replace(part, path)
+    return done
+
+def _remove(path: str):
+    try: os.remove(path)
+    except OSError: pass
@@ -1,8 +1,12 @@
 import os
+import threading
+import time
 import requests
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional
 from dotenv import load_dotenv
 
+import metrics
+
 # .env dosyasını yükle (main.py ile aynı klasörde olmalı)
 load_dotenv()
 
@@ -11,6 +15,9 @@ GRAPH_BASE = "https://graph.facebook.com/v19.0"
 # .env'den oku – kesinlikle hardcoded fallback kullanma
 FACEBOOK_ACCESS_TOKEN = os.getenv("FACEBOOK_ACCESS_TOKEN", "").strip()
 PAGE_ID_OR_USERNAME = os.getenv("FACEBOOK_PAGE_ID", "").strip()  # numeric ID ya da sayfa kullanıcı adı olabilir
+# Tüm sayfalar (kiracılar) için ortak Graph API bütçesi: saniyede istek, anlık taşma payı
+GRAPH_RATE = float(os.getenv("FACEBOOK_RATE", "5"))
+GRAPH_BURST = int(os.getenv("FACEBOOK_BURST", "10"))
 
 
 # --- Yardımcılar -------------------------------------------------------------
@@ -25,8 +32,31 @@ def _mask_token(tok: str) -> str:
 def _is_numeric_id(s: str) -> bool:
     return s.isdigit()
 
+class RateLimiter:
+    """İş parçacığı güvenli jeton kovası: aynı süreçteki tüm sayfa çekimleri tek bütçeyi paylaşır."""
+    def __init__(self, rate: float, burst: int):
+        self.rate = max(rate, 1e-6); self.burst = max(1, burst)
+        self._tokens = float(self.burst); self._t = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._t) * self.rate)
+                self._t = now
+                if self._tokens >= 1:
+                    self._tokens -= 1; return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+_LIMITER = RateLimiter(GRAPH_RATE, GRAPH_BURST)
+
 def _get(url: str, params: Dict) -> Dict:
-    r = requests.get(url, params=params, timeout=30)
+    with metrics.span("graph.wait"):
+        _LIMITER.acquire()
+    with metrics.span("graph.request"):
+        r = requests.get(url, params=params, timeout=30)
     # 200 gelse bile Facebook JSON içinde "error" döndürebilir
     try:
         js = r.json()
@@ -38,27 +68,29 @@ def _get(url: str, params: Dict) -> Dict:
     r.raise_for_status()
     return r.json()
 
-def _check_env_or_raise():
+def _check_env_or_raise(token: Optional[str] = None, page: Optional[str] = None):
+    token = FACEBOOK_ACCESS_TOKEN if token is None else token
+    page = PAGE_ID_OR_USERNAME if page is None else page
     problems = []
-    if not FACEBOOK_ACCESS_TOKEN:
+    if not token:
         problems.append("FACEBOOK_ACCESS_TOKEN boş")
-    if not PAGE_ID_OR_USERNAME:
+    if not page:
         problems.append("FACEBOOK_PAGE_ID boş")
     if problems:
         raise RuntimeError("⚠️ .env eksik: " + ", ".join(problems))
 
     # Basit format kontrolü
-    if not (FACEBOOK_ACCESS_TOKEN.startswith("EA") and len(FACEBOOK_ACCESS_TOKEN) > 40):
+    if not (token.startswith("EA") and len(token) > 40):
         raise RuntimeError("⚠️ Token formatı şüpheli. Page Access Token kullandığından emin ol. "
-                           f"Okunan: { _mask_token(FACEBOOK_ACCESS_TOKEN) }")
+                           f"Okunan: { _mask_token(token) }")
 
-def resolve_page_id(page_id_or_username: str) -> str:
+def resolve_page_id(page_id_or_username: str, token: Optional[str] = None) -> str:
     """Kullanıcı adı girildiyse numeric ID'ye çevirir; zaten numeric ise aynen döner."""
     if _is_numeric_id(page_id_or_username):
         return page_id_or_username
     # Username verilmiş → id al
     url = f"{GRAPH_BASE}/{page_id_or_username}"
-    params = {"access_token": FACEBOOK_ACCESS_TOKEN, "fields": "id"}
+    params = {"access_token": token or FACEBOOK_ACCESS_TOKEN, "fields": "id"}
     js = _get(url, params)
     pid = js.get("id")
     if not pid or not _is_numeric_id(pid):
@@ -68,12 +100,21 @@ def resolve_page_id(page_id_or_username: str) -> str:
 
 # --- Ana işlevler ------------------------------------------------------------
 
-def get_posts(limit: int = 25) -> List[Dict]:
-    _check_env_or_raise()
-    page_id = resolve_page_id(PAGE_ID_OR_USERNAME)
+_EMPTY_MSG = (
+    "Hiç gönderi/yorum gelmedi.\n"
+    "- Token bir 'Page Access Token' mı?\n"
+    "- İzinler: pages_read_user_content, pages_read_engagement var mı?\n"
+    "- PAGE_ID doğru mu (numeric ID ya da doğru kullanıcı adı)?"
+)
+
+def get_posts(limit: int = 25, page: Optional[str] = None, token: Optional[str] = None) -> List[Dict]:
+    """page/token verilmezse .env'deki sayfa kullanılır (çok sayfalı kurulum: tenants.py)."""
+    page = page or PAGE_ID_OR_USERNAME; token = token or FACEBOOK_ACCESS_TOKEN
+    _check_env_or_raise(token, page)
+    page_id = resolve_page_id(page, token)
 
     fields = "id,message,created_time,permalink_url"
-    params = {"access_token": FACEBOOK_ACCESS_TOKEN, "limit": limit, "fields": fields}
+    params = {"access_token": token, "limit": limit, "fields": fields}
 
     # 1) /posts
     url = f"{GRAPH_BASE}/{page_id}/posts"
@@ -94,40 +135,48 @@ def get_posts(limit: int = 25) -> List[Dict]:
 
     return data
 
-def get_comments_for_post(post_id: str, limit: int = 100) -> List[Dict]:
-    _check_env_or_raise()
+def get_comments_for_post(post_id: str, limit: int = 100, since: Optional[int] = None,
+                          token: Optional[str] = None, page: Optional[str] = None) -> List[Dict]:
+    page = page or PAGE_ID_OR_USERNAME; token = token or FACEBOOK_ACCESS_TOKEN
+    _check_env_or_raise(token, page)
     url = f"{GRAPH_BASE}/{post_id}/comments"
     params = {
-        "access_token": FACEBOOK_ACCESS_TOKEN,
+        "access_token": token,
         "limit": limit,
         "fields": "id,message,created_time,from"
     }
+    if since:
+        params["since"] = int(since)  # sadece bu andan sonraki yorumlar (delta)
     js = _get(url, params)
     return js.get("data", []) or []
 
-def fetch_posts_with_comments(limit_posts: int = 25, limit_comments: int = 200) -> List[Dict]:
+def iter_posts_with_comments(limit_posts: int = 25, limit_comments: int = 200,
+                             since: Optional[int] = None, page: Optional[str] = None,
+                             token: Optional[str] = None) -> Iterator[Dict]:
+    """Gönderileri yorumlarıyla birlikte tek tek üretir (akış: ilk gönderi tüm liste beklenmeden işlenebilir)."""
+    page = page or PAGE_ID_OR_USERNAME; token = token or FACEBOOK_ACCESS_TOKEN
     # Küçük bir tanı bilgi: hangi ID ve token uzunluğu yüklenmiş
-    print(f"[facebook] PAGE_ID/.env: '{PAGE_ID_OR_USERNAME}' | token: { _mask_token(FACEBOOK_ACCESS_TOKEN) }")
+    print(f"[facebook] PAGE_ID: '{page}' | token: { _mask_token(token) }")
 
-    posts = get_posts(limit_posts)
-    out = []
+    posts = get_posts(limit_posts, page, token)
+    if not posts:
+        raise RuntimeError(_EMPTY_MSG)
     for p in posts:
         pid = p.get("id", "")
         cmts = []
         if pid:
             try:
-                cmts = get_comments_for_post(pid, limit_comments)
+                cmts = get_comments_for_post(pid, limit_comments, since=since, token=token, page=page)
             except Exception as e:
                 # Her post için yorumu zorunlu kılma; post yine listelensin
                 print(f"[facebook] yorum çekilemedi ({pid}): {e}")
                 cmts = []
-        out.append({"post": p, "comments": cmts})
+        yield {"post": p, "comments": cmts}
 
+def fetch_posts_with_comments(limit_posts: int = 25, limit_comments: int = 200,
+                              since: Optional[int] = None, page: Optional[str] = None,
+                              token: Optional[str] = None) -> List[Dict]:
+    out = list(iter_posts_with_comments(limit_posts, limit_comments, since=since, page=page, token=token))
     if not out:
-        raise RuntimeError(
-            "Hiç gönderi/yorum gelmedi.\n"
-            "- Token bir 'Page Access Token' mı?\n"
-            "- İzinler: pages_read_user_content, pages_read_engagement var mı?\n"
-            "- PAGE_ID doğru mu (numeric ID ya da doğru kullanıcı adı)?"
-        )
+        raise RuntimeError(_EMPTY_MSG)
     return out
@@ -0,0 +1,222 @@
+# image_service.py
+# Gönderi görselleri için ortak servis (tüm kartlar tek örneği kullanır):
+# - bellek içi QPixmap LRU + boyutu sınırlı disk küçük-resim önbelleği (anahtar: URL ya da gönderi id)
+# - çözme/ölçekleme QThreadPool üzerinde; GUI iş parçacığı sadece QImage -> QPixmap çevirir
+# - aynı anda en fazla MAX_INFLIGHT ağ isteği; görünümden çıkan kartların istekleri cancel() ile düşer
+# - Graph API görsel çözümlemesi de (eski requests.get yerine) asenkron QNetworkAccessManager ile
+# - URL'ler anahtarsız saklanır/önbelleklenir; Graph uçlarına erişim anahtarı istek anında eklenir
+import os
+import json
+import hashlib
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, QUrl, QSize, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtNetwork import QNetworkAccessManager, QNetworkRequest, QNetworkReply
+
+from settings import DATA_DIR
+
+CACHE_DIR = os.getenv("SIKAYET_IMG_CACHE", os.path.join(DATA_DIR, "img_cache"))
+DISK_LIMIT = int(os.getenv("SIKAYET_IMG_CACHE_MB", "200")) * 1024 * 1024
+MEM_ITEMS = 300          # ~220x220 küçük resim başına ~200 KB
+MAX_INFLIGHT = 6
+PRUNE_EVERY = 50         # bu kadar diske yazmada bir boyut sınırı kontrolü
+GRAPH = "https://graph.facebook.com"
+
+def _with_token(url: str, token: str) -> str:
+    if not token or not url.startswith(GRAPH) or "access_token=" in url: return url
+    return f"{url}{'&' if '?' in url else '?'}access_token={token}"
+
+class _Signals(QObject):
+    done = pyqtSignal(int, QImage)   # iş no, görüntü (başarısızsa boş)
+
+class _Decode(QRunnable):
+    """Ağdan gelen baytı ya da disk küçük resmini çözer; ağdan geldiyse ölçekleyip diske yazar."""
+    def __init__(self, sig: _Signals, job_id: int, size: QSize,
+                 data: bytes | None = None, path: str | None = None, save_to: str | None = None):
+        super().__init__()
+        self.sig = sig; self.job_id = job_id; self.size = size
+        self.data = data; self.path = path; self.save_to = save_to
+
+    def run(self):
+        img = QImage()
+        try:
+            if self.path:
+                img.load(self.path)
+            elif self.data is not None and img.loadFromData(self.data):
+                img = img.scaled(self.size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+                if self.save_to:
+                    tmp = self.save_to + ".tmp"
+                    if img.save(tmp, "PNG" if img.hasAlphaChannel() else "JPG", 85):
+                        os.replace(tmp, self.save_to)
+        except Exception:
+            img = QImage()
+        self.sig.done.emit(self.job_id, img)
+
+class _Prune(QRunnable):
+    """Disk önbelleğini en eski erişilenlerden silerek limit altına indirir."""
+    def run(self):
+        try:
+            files = [e for e in os.scandir(CACHE_DIR) if e.is_file()]
+            st = [(e.stat().st_mtime, e.stat().st_size, e.path) for e in files]
+            total = sum(s for _t, s, _p in st)
+            for _t, s, p in sorted(st):
+                if total <= DISK_LIMIT: break
+                try: os.remove(p); total -= s
+                except OSError: pass
+        except OSError:
+            pass
+
+class _Job:
+    __slots__ = ("owner", "urls", "post_id", "token", "size", "cb", "i", "resolved", "key")
+    def __init__(self, owner, urls, post_id, token, size, cb):
+        self.owner = owner; self.urls = urls; self.post_id = post_id; self.token = token
+        self.size = size; self.cb = cb; self.i = 0; self.resolved = False; self.key = ""
+
+class ImageService(QObject):
+    _inst: "ImageService" = None
+
+    @classmethod
+    def instance(cls) -> "ImageService":
+        if cls._inst is None: cls._inst = cls()
+        return cls._inst
+
+    def __init__(self):
+        super().__init__()
+        self._net = QNetworkAccessManager(self)
+        self._pool = QThreadPool.globalInstance()
+        self._sig = _Signals(); self._sig.done.connect(self._on_decoded)
+        self._mem: "OrderedDict[str, QPixmap]" = OrderedDict()
+        self._resolved: Dict[str, str] = {}          # post id -> Graph'tan çözülen CDN URL
+        self._jobs: Dict[int, _Job] = {}
+        self._by_owner: Dict[Any, int] = {}
+        self._queue: Deque[Tuple[int, str, str]] = deque()   # (iş, url, tür)
+        self._inflight: Dict[QNetworkReply, Tuple[int, str]] = {}
+        self._next_id = 0; self._writes = 0
+        self.token = ""   # Graph uçları için varsayılan anahtar (MainWindow açık kiracınınkini yazar)
+        try: os.makedirs(CACHE_DIR, exist_ok=True); self._disk = True
+        except OSError: self._disk = False
+
+    # --- dış arayüz ---
+    def load(self, owner, urls: List[str], post_id: str | None, token: str, size: QSize,
+             cb: Callable[[Optional[QPixmap]], None]):
+        """urls sırayla denenir, olmazsa gönderi id ile Graph'tan çözülür; cb(QPixmap | None)."""
+        self.cancel(owner)
+        self._next_id += 1; jid = self._next_id
+        self._jobs[jid] = _Job(owner, list(urls), post_id, token, size, cb)
+        self._by_owner[owner] = jid
+        self._advance(jid)
+
+    def cancel(self, owner):
+        """Sahibin bekleyen işini düşürür (kuyruktaki istek atlanır, uçuştaki istek iptal edilir)."""
+        jid = self._by_owner.pop(owner, None)
+        if jid is None: return
+        self._jobs.pop(jid, None)
+        for rep, (j, _kind) in list(self._inflight.items()):
+            if j == jid: rep.abort()
+
+    # --- iş akışı ---
+    def _advance(self, jid: int):
+        job = self._jobs.get(jid)
+        if job is None: return
+        if job.i < len(job.urls):
+            url = job.urls[job.i]; job.i += 1
+            self._fetch(jid, url, _with_token(url, job.token)); return
+        if not job.resolved and job.post_id and job.token:
+            job.resolved = True
+            src = f"post:{job.post_id}"
+            if job.post_id in self._resolved:
+                self._fetch(jid, src, self._resolved[job.post_id]); return
+            if self._cached(jid, src): return
+            self._enqueue(jid, f"{GRAPH}/{job.post_id}/picture?redirect=false&access_token={job.token}", "graph1")
+            return
+        self._finish(jid, None)
+
+    def _key(self, src: str, size: QSize) -> str:
+        return f"{src}|{size.width()}x{size.height()}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(CACHE_DIR, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".img")
+
+    def _cached(self, jid: int, src: str) -> bool:
+        """Bellek ya da diskte varsa oradan servis eder."""
+        job = self._jobs[jid]; key = self._key(src, job.size); job.key = key
+        pm = self._mem.get(key)
+        if pm is not None:
+            self._mem.move_to_end(key); self._finish(jid, pm); return True
+        path = self._path(key)
+        if self._disk and os.path.exists(path):
+            try: os.utime(path, None)
+            except OSError: pass
+            self._pool.start(_Decode(self._sig, jid, job.size, path=path)); return True
+        return False
+
+    def _fetch(self, jid: int, src: str, url: str):
+        if not self._cached(jid, src):
+            self._enqueue(jid, url, "img")
+
+    def _enqueue(self, jid: int, url: str, kind: str):
+        self._queue.append((jid, url, kind)); self._pump()
+
+    def _pump(self):
+        while self._queue and len(self._inflight) < MAX_INFLIGHT:
+            jid, url, kind = self._queue.popleft()
+            if jid not in self._jobs: continue   # kart görünümden çıktı
+            req = QNetworkRequest(QUrl(url))
+            req.setRawHeader(b"User-Agent", b"Mozilla/5.0 Chrome/125 Safari/537.36")
+            req.setRawHeader(b"Referer", b"https://www.facebook.com/")
+            rep = self._net.get(req)
+            rep.sslErrors.connect(lambda _errs, r=rep: r.ignoreSslErrors())
+            rep.finished.connect(lambda r=rep: self._on_reply(r))
+            self._inflight[rep] = (jid, kind)
+
+    def _on_reply(self, rep: QNetworkReply):
+        jid, kind = self._inflight.pop(rep, (None, ""))
+        ok = rep.error() == QNetworkReply.NoError
+        data = bytes(rep.readAll()) if ok else b""
+        rep.deleteLater()
+        self._pump()
+        job = self._jobs.get(jid)
+        if job is None: return
+        if kind == "img":
+            if not ok: self._advance(jid); return
+            path = self._path(job.key) if self._disk else None
+            self._pool.start(_Decode(self._sig, jid, job.size, data=data, save_to=path))
+            if path:
+                self._writes += 1
+                if self._writes % PRUNE_EVERY == 0: self._pool.start(_Prune())
+            return
+        # Graph çözümlemesi: önce picture?redirect=false, sonra full_picture/picture alanları
+        cdn = None
+        try:
+            j = json.loads(data.decode("utf-8")) if ok else {}
+            if kind == "graph1":
+                cdn = ((j.get("data") or {}).get("url"))
+            else:
+                cdn = next((j[k] for k in ("full_picture", "picture") if isinstance(j.get(k), str)), None)
+        except Exception:
+            cdn = None
+        if isinstance(cdn, str) and cdn.lower().startswith(("http://", "https://")):
+            self._resolved[job.post_id] = cdn
+            self._fetch(jid, f"post:{job.post_id}", cdn); return
+        if kind == "graph1":
+            self._enqueue(jid, f"{GRAPH}/{job.post_id}?fields=full_picture,picture&type=large&access_token={job.token}", "graph2")
+            return
+        self._finish(jid, None)
+
+    def _on_decoded(self, jid: int, img: QImage):
+        job = self._jobs.get(jid)
+        if job is None: return
+        if img.isNull():
+            self._advance(jid); return
+        pm = QPixmap.fromImage(img)
+        self._mem[job.key] = pm; self._mem.move_to_end(job.key)
+        while len(self._mem) > MEM_ITEMS: self._mem.popitem(last=False)
+        self._finish(jid, pm)
+
+    def _finish(self, jid: int, pm: Optional[QPixmap]):
+        job = self._jobs.pop(jid, None)
+        if job is None: return
+        if self._by_owner.get(job.owner) == jid: del self._by_owner[job.owner]
+        job.cb(pm)
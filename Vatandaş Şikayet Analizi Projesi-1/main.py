@@ -1,11 +1,17 @@
 # main.py — Neutral Corporate v2 + Soft Green Chips (left & right), Blue Buttons
 
+import html
 import os
 import sys
-from typing import List, Dict, Any, Iterable, Tuple
+import bisect
+import threading
+from typing import List, Dict, Any, Tuple
+from collections import OrderedDict
+import numpy as np
 import pandas as pd
 
-from PyQt5.QtCore import Qt, QDate, QUrl, QSize, QRect, QRectF
+from PyQt5.QtCore import (Qt, QDate, QUrl, QSize, QRect, QRectF, QAbstractTableModel, QModelIndex, QTimer,
+                          QThread, pyqtSignal)
 from PyQt5.QtGui import (
     QColor, QPixmap, QDesktopServices, QCursor, QPalette,
     QFont, QPainter, QLinearGradient
@@ -13,10 +19,11 @@ from PyQt5.QtGui import (
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QStackedWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QLineEdit, QPushButton, QComboBox, QDateEdit, QMessageBox,
-    QTableWidget, QTableWidgetItem, QGraphicsDropShadowEffect,
-    QScrollArea, QFrame, QSizePolicy, QListView, QHeaderView, QSplashScreen
+    QTableView, QAbstractItemView, QGraphicsDropShadowEffect,
+    QScrollArea, QFrame, QSizePolicy, QListView, QHeaderView, QSplashScreen, QShortcut, QDialog, QCheckBox,
+    QListWidget, QListWidgetItem, QFileDialog, QProgressDialog
 )
-from PyQt5.QtNetwork import QNetworkAccessManager, QNetworkRequest, QNetworkReply
+from PyQt5.QtGui import QKeySequence
 
 # =============== Theme ===============
 NAVY        = "#111827"     # headings/dark text
@@ -62,7 +69,7 @@ QHeaderView::section {{
   background:{TABLE_HDR_BG}; border:none; padding:8px 10px;
   font-weight:800; color:{TABLE_HDR_FG};
 }}
-QTableWidget {{
+QTableView {{
   font-size:13pt;
 }}
 QTableView::item:alternate {{
@@ -82,17 +89,6 @@ def ellipsize(t: str, n: int = 120) -> str:
     s = (t or "").strip()
     return s if len(s) <= n else s[:n-1] + "…"
 
-def safe_url(u) -> str | None:
-    try:
-        if u is None: return None
-        if isinstance(u, float) and pd.isna(u): return None
-    except Exception:
-        pass
-    if isinstance(u, str):
-        s = u.strip()
-        return s if s.lower().startswith(("http://", "https://")) else None
-    return None
-
 def section_header(text: str) -> QWidget:
     # Left panel section headers: 270° white -> light blue
     wrap = QWidget()
@@ -138,12 +134,10 @@ class SmallPopupComboBox(QComboBox):
 
 # =============== IMAGE LOADER ===============
 class ImageLabel(QLabel):
-    _manager: QNetworkAccessManager = None
+    """Tek görsel; indirme/çözme/önbellek ImageService'te, etiket sadece sonucu gösterir."""
     def __init__(self, urls: List[str], post_id: str | None = None,
                  size: QSize = QSize(220,220), click_url: str | None = None):
         super().__init__()
-        if ImageLabel._manager is None:
-            ImageLabel._manager = QNetworkAccessManager()
         self.setFixedSize(size)
         self.setAlignment(Qt.AlignCenter)
         self.setStyleSheet(f"border-radius:12px;background:#fff;border:1px solid {BORDER_C};")
@@ -151,63 +145,22 @@ class ImageLabel(QLabel):
         if self._click_url:
             self.setCursor(QCursor(Qt.PointingHandCursor))
         self._post_id = post_id
-        self._fb_token = os.getenv("FACEBOOK_ACCESS_TOKEN") or os.getenv("FB_ACCESS_TOKEN") or ""
+        self._fb_token = ImageService.instance().token
         self._candidates = [u for u in urls if safe_url(u)]
-        self._idx = 0
-        if self._candidates: self._try(self._candidates[0])
-        else: self._resolve_and_try()
+        if not self._candidates and not (self._post_id and self._fb_token):
+            self._set_placeholder("Görsel yok"); return
+        ImageService.instance().load(self, self._candidates, self._post_id, self._fb_token, size, self._on_image)
 
     def mousePressEvent(self, e):
         if self._click_url: QDesktopServices.openUrl(QUrl(self._click_url))
 
-    def _resolve_and_try(self):
-        if not (self._post_id and self._fb_token):
-            self._set_placeholder("Görsel yok"); return
-        try:
-            import requests
-            u1 = f"https://graph.facebook.com/{self._post_id}/picture?redirect=false&access_token={self._fb_token}"
-            r1 = requests.get(u1, timeout=10)
-            if r1.ok:
-                data = r1.json() or {}
-                cdn = (((data.get("data") or {}).get("url")))
-                if safe_url(cdn):
-                    self._candidates = [cdn]; self._idx = 0
-                    self._try(self._candidates[0]); return
-            u2 = f"https://graph.facebook.com/{self._post_id}?fields=full_picture,picture&type=large&access_token={self._fb_token}"
-            r2 = requests.get(u2, timeout=10)
-            if r2.ok:
-                j = r2.json() or {}
-                for k in ("full_picture", "picture"):
-                    if safe_url(j.get(k)):
-                        self._candidates = [j[k]]; self._idx = 0
-                        self._try(self._candidates[0]); return
-        except Exception:
-            pass
-        self._set_placeholder("Görsel yüklenemedi")
-
-    def _try(self, url: str):
-        req = QNetworkRequest(QUrl(url))
-        req.setRawHeader(b"User-Agent", b"Mozilla/5.0 Chrome/125 Safari/537.36")
-        req.setRawHeader(b"Referer", b"https://www.facebook.com/")
-        rep = ImageLabel._manager.get(req)
-        rep.sslErrors.connect(lambda _errs, r=rep: r.ignoreSslErrors())
-        rep.finished.connect(lambda r=rep: self._on_done(r))
-
-    def _on_done(self, rep: QNetworkReply):
-        ok = False
-        if rep.error() == QNetworkReply.NoError:
-            data = rep.readAll(); pm = QPixmap()
-            if pm.loadFromData(data):
-                pm = pm.scaled(self.width(), self.height(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                self.setPixmap(pm); ok = True
-        rep.deleteLater()
-        if ok: return
-        self._idx += 1
-        if self._idx < len(self._candidates):
-            self._try(self._candidates[self._idx]); return
-        if self._post_id and self._fb_token:
-            self._resolve_and_try(); return
-        self._set_placeholder("Görsel yüklenemedi")
+    def cancel(self):
+        """Kart görünümden çıkınca bekleyen indirmeyi bırakır."""
+        ImageService.instance().cancel(self)
+
+    def _on_image(self, pm: QPixmap | None):
+        if pm is None: self._set_placeholder("Görsel yüklenemedi")
+        else: self.setPixmap(pm)
 
     def _set_placeholder(self, text: str):
         self.setText(f"🖼️  {text}")
@@ -234,11 +187,24 @@ class ImageCarousel(QWidget):
         self._left.clicked.connect(self.prev); self._right.clicked.connect(self.next)
         self._update_nav()
 
+    def set_post(self, urls: List[str], post_id: str | None, click_url: str | None):
+        """Kart geri dönüştürülürken başka bir gönderinin görsellerine geçer."""
+        self._urls = [u for u in urls if safe_url(u)]
+        self._post_id = post_id; self._click_url = click_url; self._i = 0
+        self._refresh(); self._update_nav()
+
     def _update_nav(self):
         many = len(self._urls)>1
         self._left.setVisible(many); self._right.setVisible(many)
 
+    def cancel(self):
+        l = self._box.layout()
+        for i in range(l.count()):
+            w = l.itemAt(i).widget()
+            if isinstance(w, ImageLabel): w.cancel()
+
     def _refresh(self):
+        self.cancel()
         l = self._box.layout()
         while l.count():
             w=l.takeAt(0).widget()
@@ -254,13 +220,101 @@ class ImageCarousel(QWidget):
         if not self._urls: return
         self._i=(self._i-1)%len(self._urls); self._refresh()
 
+# =============== Table model ===============
+def _fmt_date(d) -> str:
+    return d.strftime("%Y-%m-%d %H:%M") if hasattr(d,"strftime") else ""
+
+class FrameModel(QAbstractTableModel):
+    """
+    DataFrame'i kopyalamadan gösteren tablo modeli.
+    - hücre metinleri data() içinde, sadece görünen hücreler için üretilir
+    - gösterilen satırlar konum dizisiyle seçilir: set_frame(df, rows) filtre gibi çalışır
+    - sıralama bu konum dizisinin kolon değerlerine göre yeniden düzenlenmesidir
+    columns: (başlık, kolon adı, biçimleyici, hizalama) listesi.
+    """
+    def __init__(self, columns: List[Tuple[str, str, Any, Any]], parent=None):
+        super().__init__(parent)
+        self._spec = columns
+        self._cols: Dict[str, Any] = {}
+        self._base = np.array([], dtype=np.int64)   # filtrelenmiş, sıralanmamış konumlar
+        self._rows = self._base
+        self._sort: Tuple[int, Any] = (-1, Qt.AscendingOrder)
+
+    def set_frame(self, df: pd.DataFrame | None, rows: np.ndarray | None = None):
+        self.beginResetModel()
+        self._cols = {c: df[c].array for _h, c, _f, _a in self._spec if c in df.columns} if df is not None else {}
+        n = len(df) if df is not None else 0
+        self._base = np.arange(n, dtype=np.int64) if rows is None else np.asarray(rows, dtype=np.int64)
+        self._rows = self._sorted(self._base)
+        self.endResetModel()
+
+    def _sorted(self, rows: np.ndarray) -> np.ndarray:
+        col, order = self._sort
+        if col < 0 or not len(rows) or self._spec[col][1] not in self._cols: return rows
+        vals = self._cols[self._spec[col][1]].take(rows)
+        return rows[vals.argsort(ascending=order==Qt.AscendingOrder, kind="stable")]
+
+    # --- Qt arayüzü ---
+    def rowCount(self, parent=QModelIndex()): return 0 if parent.isValid() else len(self._rows)
+    def columnCount(self, parent=QModelIndex()): return 0 if parent.isValid() else len(self._spec)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal: return self._spec[section][0]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid(): return None
+        _h, col, fmt, align = self._spec[index.column()]
+        if role == Qt.TextAlignmentRole: return align
+        if role not in (Qt.DisplayRole, Qt.UserRole) or col not in self._cols: return None
+        v = self._cols[col][self._rows[index.row()]]
+        if v is None or v is pd.NA or v is pd.NaT or (isinstance(v, float) and np.isnan(v)): v = ""
+        if role == Qt.UserRole: return v
+        return fmt(v) if fmt else str(v)
+
+    def position(self, row: int) -> int:
+        """Görünen satırın DataFrame'deki konumu."""
+        return int(self._rows[row])
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.layoutAboutToBeChanged.emit()
+        self._sort = (column, order)
+        self._rows = self._sorted(self._base)
+        self.layoutChanged.emit()
+
 # =============== Post feed ===============
+class PostFeedModel:
+    """
+    PostFeed'in veri modeli: gönderi sırası + her gönderinin (filtrelenmiş) yorum satırları.
+    Kart içeriği group(i) ile sadece kart görünür olduğunda üretilir.
+    """
+    def __init__(self, posts: pd.DataFrame, comments: pd.DataFrame | None,
+                 items: List[Tuple[str, np.ndarray]], fmt):
+        self.posts = posts; self.comments = comments; self.items = items; self._fmt = fmt
+
+    def __len__(self): return len(self.items)
+    def key(self, i: int) -> str: return self.items[i][0]
+    def n_rows(self, i: int) -> int: return len(self.items[i][1])
+
+    def group(self, i: int) -> Tuple[str,str,str,pd.DataFrame | None,np.ndarray,List[str],str]:
+        pid, idx = self.items[i]
+        post = self.posts.loc[pid]
+        pmsg = post["post_message"]
+        ptitle = ellipsize(pmsg) if pmsg else (f"Gönderi {pid}" if pid else "Gönderi")
+        return (pid, ptitle, self._fmt(post["post_time"]), self.comments, idx, post["post_pics"] or [], post["post_url"])
+
 class PostCard(QWidget):
-    def __init__(self, post_id: str, post_title: str, post_time: str,
-                 rows: Iterable[Dict[str, Any]], image_urls: List[str], post_url: str | None):
+    """Gönderi kartı; bind() ile farklı gönderiler için yeniden kullanılır."""
+    ROW_H = 32
+    _chrome_h: int | None = None
+    commentOpened = pyqtSignal(str, str)   # comment_id, tam metin (yoruma çift tıklama)
+
+    def __init__(self):
         super().__init__()
+        self._comments: pd.DataFrame | None = None
         self.setStyleSheet(f"background:#fff;border:1px solid {BORDER_C};border-radius:14px;")
         add_shadow(self, blur=18, dy=6, alpha=90)
+        self._post_url = None
 
         v = QVBoxLayout(self); v.setContentsMargins(14,14,14,14); v.setSpacing(10)
 
@@ -268,9 +322,9 @@ class PostCard(QWidget):
         header.setStyleSheet(f"background:#fff;border:1px solid {BORDER_C};border-radius:10px;")
         hv = QHBoxLayout(header); hv.setContentsMargins(10,8,10,8); hv.setSpacing(10)
 
-        carousel = ImageCarousel(image_urls, post_id=post_id, click_url=post_url, size=QSize(220,220))
-        carousel.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
-        hv.addWidget(carousel)
+        self._carousel = ImageCarousel([], post_id=None, click_url=None, size=QSize(220,220))
+        self._carousel.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        hv.addWidget(self._carousel)
 
         title_box = QVBoxLayout(); title_box.setSpacing(6)
 
@@ -280,102 +334,446 @@ class PostCard(QWidget):
         title_chip = QWidget()
         title_chip.setStyleSheet(chip_qss)
         tc_l = QHBoxLayout(title_chip); tc_l.setContentsMargins(10,8,10,8)
-        title = QLabel(f"{post_title}")
-        title.setStyleSheet("color:#111827; font-size:15.5pt; font-weight:800;")
-        tc_l.addWidget(title)
-        s_post_url = safe_url(post_url)
-        if s_post_url:
-            title.setCursor(QCursor(Qt.PointingHandCursor))
-            title.mousePressEvent = lambda _e: QDesktopServices.openUrl(QUrl(s_post_url))
+        self._title = QLabel()
+        self._title.setStyleSheet("color:#111827; font-size:15.5pt; font-weight:800;")
+        self._title.mousePressEvent = self._open_post
+        tc_l.addWidget(self._title)
         title_box.addWidget(title_chip)
 
         time_chip = QWidget()
         time_chip.setStyleSheet(chip_qss)
         ts_l = QHBoxLayout(time_chip); ts_l.setContentsMargins(10,8,10,8)
-        ts = QLabel(post_time); ts.setStyleSheet("color:#111827; font-size:12.5pt; font-weight:600;")
-        ts_l.addWidget(ts)
+        self._ts = QLabel(); self._ts.setStyleSheet("color:#111827; font-size:12.5pt; font-weight:600;")
+        ts_l.addWidget(self._ts)
         title_box.addWidget(time_chip)
 
         hv.addLayout(title_box, 1)
         v.addWidget(header)
 
-        table = QTableWidget(); table.setColumnCount(4)
-        table.setHorizontalHeaderLabels(["Yorum", "Tarih", "Mahalle", "Kategori"])
+        self._model = FrameModel([("Yorum","message",ellipsize,None), ("Tarih","date",_fmt_date,None),
+                                  ("Mahalle","mahalle",None,None), ("Kategori","kategori",None,None)], self)
+        table = QTableView(); table.setModel(self._model)
         table.horizontalHeader().setStretchLastSection(True)
-        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        table.setSortingEnabled(True)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         table.setAlternatingRowColors(True)
         table.setStyleSheet(
-            "QTableWidget{background:#fff;border:1px solid #e6ebf2;border-radius:10px;}"
-            f"QTableWidget::item:selected{{background:{SELECTION_BG}; color:{SELECTION_FG};}}"
+            "QTableView{background:#fff;border:1px solid #e6ebf2;border-radius:10px;}"
+            f"QTableView::item:selected{{background:{SELECTION_BG}; color:{SELECTION_FG};}}"
         )
-        rows_list = list(rows); table.setRowCount(len(rows_list))
-        table.verticalHeader().setDefaultSectionSize(32)
-        show_rows = max(10, min(16, len(rows_list)))
-        table.setMinimumHeight(int(32*show_rows + 50))
-
-        for r, row in enumerate(rows_list):
-            msg = row.get("message",""); date = row.get("date","")
-            it0 = QTableWidgetItem(ellipsize(msg)); it0.setData(Qt.UserRole, msg)
-            it1 = QTableWidgetItem(date.strftime("%Y-%m-%d %H:%M") if hasattr(date,"strftime") else "")
-            it2 = QTableWidgetItem(row.get("mahalle","")); it3 = QTableWidgetItem(row.get("kategori",""))
-            table.setItem(r,0,it0); table.setItem(r,1,it1); table.setItem(r,2,it2); table.setItem(r,3,it3)
-        table.itemDoubleClicked.connect(self._open_full)
+        table.verticalHeader().setDefaultSectionSize(self.ROW_H)
+        table.setFixedHeight(self.table_height(0))
+        table.doubleClicked.connect(self._open_full)
         v.addWidget(table)
-
-    def _open_full(self, it: QTableWidgetItem):
-        txt = it.data(Qt.UserRole)
-        if txt: QMessageBox.information(self, "Yorum", txt)
+        self._table = table
+
+    @classmethod
+    def table_height(cls, n_rows: int) -> int:
+        show_rows = max(10, min(16, n_rows))
+        return int(cls.ROW_H*show_rows + 50)
+
+    @classmethod
+    def card_height(cls, n_rows: int) -> int:
+        """Kartı oluşturmadan yüksekliğini verir (sanal akışta yerleşim için)."""
+        if cls._chrome_h is None:
+            probe = cls()
+            cls._chrome_h = probe.sizeHint().height() - cls.table_height(0)
+            probe.deleteLater()
+        return cls._chrome_h + cls.table_height(n_rows)
+
+    def bind(self, post_id: str, post_title: str, post_time: str, comments: pd.DataFrame | None,
+             rows: np.ndarray, image_urls: List[str], post_url: str | None):
+        self._carousel.set_post(image_urls, post_id, post_url)
+        self._title.setText(f"{post_title}")
+        self._post_url = safe_url(post_url)
+        self._title.setCursor(QCursor(Qt.PointingHandCursor if self._post_url else Qt.ArrowCursor))
+        self._ts.setText(post_time)
+
+        table = self._table
+        table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self._comments = comments
+        self._model.set_frame(comments, rows if comments is not None else None)
+        table.setFixedHeight(self.table_height(len(rows)))
+        table.scrollToTop()
+
+    def release(self):
+        self._carousel.cancel()
+
+    def _open_post(self, _e):
+        if self._post_url: QDesktopServices.openUrl(QUrl(self._post_url))
+
+    def _open_full(self, index: QModelIndex):
+        txt = self._model.index(index.row(), 0).data(Qt.UserRole)
+        if not txt: return
+        cid = ""
+        if self._comments is not None and "comment_id" in self._comments.columns:
+            cid = str(self._comments["comment_id"].iat[self._model.position(index.row())])
+        self.commentOpened.emit(cid, str(txt))
 
 class PostFeed(QScrollArea):
+    """
+    Sanal akış: sadece görünür alan (± bir ekran) için PostCard bağlanır; kaydırınca
+    ekrandan çıkan kartlar havuza döner ve yeni gönderilere yeniden bağlanır.
+    """
+    MARGIN = 10; SPACING = 16
+    commentOpened = pyqtSignal(str, str)   # kartlardan gelen çift tıklama
+
     def __init__(self):
         super().__init__()
-        self.setWidgetResizable(True)
+        self.setWidgetResizable(False)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         self.setStyleSheet("QScrollArea{background:transparent;border:none;}")
         self._wrap = QWidget()
-        self._lay = QVBoxLayout(self._wrap); self._lay.setContentsMargins(10,10,10,10); self._lay.setSpacing(16)
         self.setWidget(self._wrap)
-    def populate(self, groups: Iterable[Tuple[str,str,str,List[Dict[str,Any]],List[str],str]]):
-        while self._lay.count():
-            w=self._lay.takeAt(0).widget()
-            if w: w.setParent(None)
-        for pid,title,ptime,rows,imgs,purl in groups:
-            self._lay.addWidget(PostCard(pid,title,ptime,rows,imgs,purl))
-        spacer=QFrame(); spacer.setFixedHeight(8); spacer.setStyleSheet("background:transparent;")
-        self._lay.addWidget(spacer)
+        self._model: PostFeedModel | None = None
+        self._tops: List[int] = []; self._heights: List[int] = []
+        self._live: Dict[int, PostCard] = {}    # model indeksi -> bağlı kart
+        self._pool: List[PostCard] = []         # boştaki kartlar
+        self.verticalScrollBar().valueChanged.connect(self._layout_visible)
+
+    def populate(self, model: PostFeedModel):
+        """
+        Yeni sonucu mevcut akışla karşılaştırır: aynı gönderi aynı yorum satırlarıyla duruyorsa
+        kartı yeniden bağlamadan yeni konumuna taşır; sadece değişen/yeni kartlar bağlanır.
+        """
+        old, live = self._model, self._live
+        if model is old: return
+        with metrics.span("render.populate", len(model)), profiling.sample():
+            self._populate(old, live, model)
+
+    def _populate(self, old: "PostFeedModel | None", live: Dict[int, PostCard], model: PostFeedModel):
+        self._model, self._live = model, {}
+        y0 = self.verticalScrollBar().value()
+        anchor = next(((old.key(i), y0 - self._tops[i]) for i in sorted(live) if self._tops[i] + self._heights[i] > y0), None) \
+            if old is not None else None
+        keep: Dict[str, Tuple[int, PostCard]] = {}
+        if old is not None and old.comments is model.comments:
+            keep = {old.key(i): (i, c) for i, c in live.items()}
+        else:
+            for c in live.values(): c.release(); c.hide(); self._pool.append(c)
+
+        self._heights = [PostCard.card_height(model.n_rows(i)) for i in range(len(model))]
+        self._tops = []; y = self.MARGIN
+        for h in self._heights:
+            self._tops.append(y); y += h + self.SPACING
+        self._wrap.resize(self.viewport().width(), y + self.MARGIN)
+
+        pos = {model.key(j): j for j in range(len(model))} if keep or anchor else {}
+        for pid, (i, card) in keep.items():
+            j = pos.get(pid)
+            if j is not None and np.array_equal(old.items[i][1], model.items[j][1]):
+                self._live[j] = card; self._place(j, card)
+            else:
+                card.release(); card.hide(); self._pool.append(card)
+        j = pos.get(anchor[0]) if anchor else None
+        self.verticalScrollBar().setValue(self._tops[j] + anchor[1] if j is not None else 0)
+        self._layout_visible()
+
+    def resizeEvent(self, e):
+        super().resizeEvent(e)
+        self._wrap.resize(self.viewport().width(), self._wrap.height())
+        for i, card in self._live.items(): self._place(i, card)
+        self._layout_visible()
+
+    def _place(self, i: int, card: PostCard):
+        card.setGeometry(self.MARGIN, self._tops[i], max(0, self.viewport().width()-2*self.MARGIN), self._heights[i])
+
+    def _release(self, i: int):
+        card = self._live.pop(i)
+        card.release(); card.hide(); self._pool.append(card)
+
+    def _new_card(self) -> PostCard:
+        card = PostCard(); card.commentOpened.connect(self.commentOpened)
+        return card
+
+    def _layout_visible(self, *_):
+        if self._model is None: return
+        y0 = self.verticalScrollBar().value(); vh = self.viewport().height()
+        lo = max(0, bisect.bisect_right(self._tops, y0 - vh) - 1)
+        hi = min(len(self._tops), bisect.bisect_left(self._tops, y0 + 2*vh))
+        for i in [i for i in self._live if not lo <= i < hi]:
+            self._release(i)
+        todo = [i for i in range(lo, hi) if i not in self._live]
+        if not todo: return
+        with metrics.span("render.bind", len(todo)), profiling.sample():
+            for i in todo:
+                card = self._pool.pop() if self._pool else self._new_card()
+                card.setParent(self._wrap)
+                card.bind(*self._model.group(i))
+                self._place(i, card); card.show()
+                self._live[i] = card
 
 # =============== Project modules ===============
-from facebook_client import fetch_posts_with_comments
-from models import TextClassifier
-from model_kodu import mahalle_bul_olur
-from data_store import summarize_by_mahalle, summarize_by_category
+from facebook_client import iter_posts_with_comments
+from analysis import safe_url, Analyzer, ModelReloader, stages as analysis_stages
+from data_store import (summarize_by_mahalle, summarize_by_category, CommentStore,
+                        compact_dtypes, append_compact)
+from summary_cube import SummaryCube
+from trends import TrendEngine
+from search_index import CommentIndex
+from vector_index import VectorIndex
+from image_service import ImageService
+from export import export_frame
+from pipeline import Pipeline, growing_batches
+import metrics
+import profiling
+from settings import STORE_POLL_MS, MODEL_POLL_MS, FETCH_POSTS, FETCH_COMMENTS
+from tenants import get_tenant
 
 # =============== Data ===============
-OLUR_MAHALLELER = [
-    "Akbayır","Aktepe","Altunkaya","Aşağıçayırlı","Cumhuriyet","Aşağıkaracasu","Atlı",
-    "Beğendik","Beşkaya","Boğazgören","Bozdoğan","Hastane","Çataksu","Coşkunlar","Eğlek",
-    "Ekinlik","Filizli","Güngöründü","Ilıkaynak","Kaban","Kaledibi","Karaköçlar","Keçili",
-    "Kekikli","Köprübaşı","Merkez","Oğuzkent","Olgun","Olurdere","Ormanağzı","Saribaşak",
-    "Soğukgöze","Süngübayır","Şalpazarı","Taşgeçit","Taşlıköy","Ürünlü","Uzunharman",
-    "Yaylabaşı","Yeşilbağlar","Yıldızkaya","Yolgözler","Yukarıçayırlı","Yukarıkızılkale"
-]
-COMPLAINT_MODEL_DIR = "./models/sikayet_egitim_modeli"
-CATEGORY_MODEL_DIR  = "./models/berturk_kategori_modeli"
+PIPELINE_BUFFER = 4        # aşamalar arası kuyruk boyu (parça)
+PIPELINE_BATCH = 32        # parça başına en fazla gönderi (1, 2, 4, ... diye büyür)
+FILTER_DEBOUNCE_MS = 250   # filtre değişikliklerinde yeniden çizim gecikmesi
+VIEW_CACHE_SIZE = 12       # filtre anahtarı başına saklanan akış/özet sonuçları
+SIMILAR_K = 20             # benzer yorumlar penceresinde gösterilen sonuç
+MODEL_SWAP_POLL_MS = 1000  # yeni model arka planda yüklenirken değişimin devralınma aralığı
+ALERTS_SHOWN = 8           # sol paneldeki ani artış uyarısı sayısı
+ALERT_WINDOWS = {"saat": "son saat", "gün": "son gün", "hafta": "son 7 gün"}
+EXPORT_COLS = ["date","mahalle","kategori","t_sikayet","message","author","comment_id","post_id","cluster_id"]
+EXPORT_FILTERS = {"CSV (*.csv)": ".csv", "Excel (*.xlsx)": ".xlsx", "Parquet (*.parquet)": ".parquet"}
+
+# =============== Fetch worker ===============
+class FetchWorker(QThread):
+    """
+    Akış hattını arka planda çalıştırır: gönderi çek -> düzleştir -> delta -> mahalle ->
+    sınıflandır -> depoya yaz. Her gönderi grubu hazır olunca `chunk` ile GUI'ye gelir.
+    """
+    chunk = pyqtSignal(object, object)   # gönderiler, analiz edilmiş yorumlar
+    failed = pyqtSignal(str, str)        # başlık, mesaj
+
+    def __init__(self, win: "MainWindow", since: int | None):
+        super().__init__(win)
+        self.win = win; self.since = since; self.pipe: Pipeline | None = None
+
+    def run(self):
+        profiling.attach()   # profil modunda bu QThread de cProfile'a dahil
+        w = self.win
+        # delta (okuma) ve store (yazma) aşamaları ayrı iş parçacıkları: her biri kendi bağlantısı
+        reader = writer = None
+        if w.store is not None:
+            try:
+                reader = CommentStore(w.store.path, check_same_thread=False)
+                writer = CommentStore(w.store.path, check_same_thread=False)
+            except Exception as e:
+                print(f"[store] hat bağlantısı açılamadı: {e}"); reader = writer = None
+        self.pipe = Pipeline(
+            growing_batches(iter_posts_with_comments(limit_posts=FETCH_POSTS, limit_comments=FETCH_COMMENTS,
+                                                     since=self.since, page=w.tenant.page_id or None,
+                                                     token=w.tenant.token or None), limit=PIPELINE_BATCH),
+            analysis_stages(w.analyzer, reader, writer, w.tenant.mahalleler),
+            maxsize=PIPELINE_BUFFER)
+        try:
+            for posts, df in self.pipe:
+                self.chunk.emit(posts, df)
+        except Exception as e:
+            title = "Depo Hatası" if self.pipe.failed_stage == "store" else "Facebook Hatası"
+            self.failed.emit(title, str(e))
+        finally:
+            print(f"[pipeline] {self.pipe.report()}")
+            print(f"[rules] {w.analyzer.rule_stats.report()}")
+            for st in (reader, writer):
+                if st is not None: st.close()
+
+    def stop(self):
+        if self.pipe is not None: self.pipe.stop()
+
+class VectorLoader(QThread):
+    """Depodaki gömmeleri okuyup benzerlik indeksini arka planda kurar (büyük geçmişte birkaç saniye)."""
+    done = pyqtSignal(object)   # VectorIndex
+
+    def __init__(self, win: "MainWindow"):
+        super().__init__(win)
+        self.path = win.store.path; self.encoder = win._vec_encoder
+
+    def run(self):
+        vi = VectorIndex()
+        try:
+            st = CommentStore(self.path, check_same_thread=False)
+            try:
+                with metrics.span("vectors.load") as sp:
+                    ids, mat = st.load_embeddings(self.encoder); sp.items(len(ids))
+            finally:
+                st.close()
+            vi.add(ids, mat); vi.build()
+        except Exception as e:
+            print(f"[vectors] indeks kurulamadı: {e}")
+        self.done.emit(vi)
+
+class VectorBuilder(QThread):
+    """Büyüyen indeksin IVF listelerini arka planda yeniden kurar; takma GUI iş parçacığında (install)."""
+    done = pyqtSignal(object)   # vector_index.Layout | None
+
+    def __init__(self, win: "MainWindow", vi: VectorIndex):
+        super().__init__(win)
+        self.vi = vi; self.args = vi.snapshot()
+
+    def run(self):
+        lay = None
+        try:
+            with metrics.span("vectors.build", self.args[0]): lay = VectorIndex.plan(*self.args)
+        except Exception as e:
+            print(f"[vectors] IVF kurulamadı: {e}")
+        self.done.emit(lay)
+
+class ExportWorker(QThread):
+    """Görünümü parça parça dosyaya yazar (export.py); GUI donmaz, tablo kopyalanmaz."""
+    progress = pyqtSignal(int, int)   # yazılan, toplam
+    done = pyqtSignal(str, int)       # yol, satır (-1: iptal)
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, win: "MainWindow", df: pd.DataFrame, path: str, meta: Dict[str, str],
+                 rows: np.ndarray | None = None, columns: List[str] | None = None):
+        super().__init__(win)
+        self.df = df; self.path = path; self.meta = meta; self.rows = rows; self.columns = columns
+        self._cancel = threading.Event()
+
+    def cancel(self): self._cancel.set()
+
+    def run(self):
+        try:
+            with metrics.span("export") as sp:
+                n = export_frame(self.df, self.path, self.meta, self.rows, self.columns,
+                                 progress=self.progress.emit, cancel=self._cancel)
+                sp.items(n or 0)
+        except Exception as e:
+            self.failed.emit("Dışa Aktarma Hatası", str(e)); return
+        self.done.emit(self.path, -1 if n is None else n)
+
+# =============== Similar comments ===============
+class SimilarDialog(QDialog):
+    """Çift tıklanan yorumun tam metni + gömme benzerliğine göre en yakın yorumlar."""
+    def __init__(self, text: str, rows: pd.DataFrame | None, note: str, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Yorum"); self.resize(960, 620)
+        v = QVBoxLayout(self); v.setContentsMargins(14,14,14,14); v.setSpacing(10)
+        body = QLabel(text); body.setWordWrap(True); body.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        body.setStyleSheet(f"background:#fff;border:1px solid {BORDER_C};border-radius:10px;padding:10px;")
+        v.addWidget(body)
+        v.addWidget(section_header("Benzer Yorumlar"))
+        info = QLabel(note); info.setStyleSheet("font-size:11.5pt;color:#475569;")
+        v.addWidget(info)
+        self._model = FrameModel([("Benzerlik","score",lambda x: f"{x:.0%}",Qt.AlignCenter),
+                                  ("Yorum","message",ellipsize,None), ("Tarih","date",_fmt_date,None),
+                                  ("Mahalle","mahalle",None,None), ("Kategori","kategori",None,None)], self)
+        self._model.set_frame(rows)
+        table = QTableView(); table.setModel(self._model)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.setAlternatingRowColors(True); table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        table.setStyleSheet("QTableView{background:#fff;border:1px solid #e6ebf2;border-radius:10px;}")
+        table.doubleClicked.connect(self._open_full)
+        table.setVisible(rows is not None and not rows.empty)
+        v.addWidget(table, 1)
+        row = QHBoxLayout(); row.addStretch(1)
+        b = QPushButton("Kapat"); b.clicked.connect(self.accept)
+        b.setStyleSheet(f"QPushButton{{background:#F3F4F6;border:1px solid {BORDER_C};border-radius:10px;padding:6px 14px;}}")
+        row.addWidget(b); v.addLayout(row)
+
+    def _open_full(self, index: QModelIndex):
+        txt = self._model.index(index.row(), 1).data(Qt.UserRole)
+        if txt: QMessageBox.information(self, "Yorum", txt)
+
+# =============== Diagnostics ===============
+class DiagnosticsPanel(QWidget):
+    """metrics span özetleri (toplam süreye göre); görünürken saniyede bir yenilenir."""
+    REFRESH_MS = 1000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        v = QVBoxLayout(self); v.setContentsMargins(12,12,12,12); v.setSpacing(8)
+        self.info = QLabel(); self.info.setStyleSheet("font-size:11.5pt;color:#475569;")
+        v.addWidget(self.info)
+        ms = lambda x: f"{x:,.1f}"
+        self.table = QTableView(); self.table.setModel(FrameModel(
+            [("Adım","span",None,None), ("Çağrı","calls",None,Qt.AlignCenter),
+             ("Toplam (sn)","total_s",lambda x: f"{x:,.2f}",Qt.AlignRight|Qt.AlignVCenter),
+             ("Ort. (ms)","mean_ms",ms,Qt.AlignRight|Qt.AlignVCenter),
+             ("En uzun (ms)","max_ms",ms,Qt.AlignRight|Qt.AlignVCenter),
+             ("Son (ms)","last_ms",ms,Qt.AlignRight|Qt.AlignVCenter),
+             ("Öğe","items",None,Qt.AlignCenter), ("RSS (MB)","rss_mb",lambda x: f"{x:,.0f}",Qt.AlignCenter),
+             ("Hata","errors",None,Qt.AlignCenter)], self))
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setAlternatingRowColors(True); self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.setStyleSheet("QTableView{background:#fff;border:1px solid #e6ebf2;border-radius:10px;font-size:11pt;}")
+        v.addWidget(self.table, 1)
+        row = QHBoxLayout(); row.addStretch(1)
+        for text, slot in (("Sıfırla", self._reset), ("Dışa Aktar", self._export)):
+            b = QPushButton(text); b.clicked.connect(slot)
+            b.setStyleSheet(f"QPushButton{{background:#F3F4F6;border:1px solid {BORDER_C};border-radius:10px;padding:6px 14px;}}")
+            row.addWidget(b)
+        v.addLayout(row)
+        self._timer = QTimer(self); self._timer.setInterval(self.REFRESH_MS); self._timer.timeout.connect(self.refresh)
+
+    def showEvent(self, e):
+        super().showEvent(e); self.refresh(); self._timer.start()
+
+    def hideEvent(self, e):
+        self._timer.stop(); super().hideEvent(e)
+
+    def refresh(self):
+        if not metrics.ENABLED:
+            self.info.setText("Ölçüm kapalı: uygulamayı SIKAYET_METRICS=1 ile başlatın "
+                              "(SIKAYET_METRICS_PROM / SIKAYET_METRICS_JSON ile dosyaya da yazılır)."); return
+        self.info.setText(f"Bellek (RSS): {metrics.rss()/2**20:,.0f} MB"
+                          + (f" &nbsp;|&nbsp; Prometheus: {metrics.PROM_PATH}" if metrics.PROM_PATH else "")
+                          + (f" &nbsp;|&nbsp; JSON: {metrics.JSON_PATH}" if metrics.JSON_PATH else ""))
+        self.table.model().set_frame(pd.DataFrame(metrics.snapshot()))
+
+    def _reset(self): metrics.reset(); self.refresh()
+    def _export(self): metrics.export(); self.refresh()
 
 # =============== Main Window ===============
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
-        self.setWindowTitle("Olur Belediyesi — Şikâyet Analizi")
+        # SIKAYET_TENANT ile hangi belediye/sayfa açılacağı seçilir (tenants.json yoksa .env sayfası)
+        self.tenant = get_tenant()
+        # görseller açık kiracının anahtarıyla çözülür (kiracıda yoksa .env'deki)
+        ImageService.instance().token = (self.tenant.token or os.getenv("FACEBOOK_ACCESS_TOKEN")
+                                         or os.getenv("FB_ACCESS_TOKEN") or "").strip()
+        self.setWindowTitle(f"{self.tenant.name} — Şikâyet Analizi")
         self.setStyleSheet(BASE_QSS)
         self.resize(1600, 980)
 
-        try: self.complaint_clf = TextClassifier(COMPLAINT_MODEL_DIR)
-        except Exception: self.complaint_clf = None
-        try: self.category_clf  = TextClassifier(CATEGORY_MODEL_DIR)
-        except Exception: self.category_clf  = None
-
-        self.df: pd.DataFrame | None = None
+        self.analyzer = Analyzer.load(self.tenant.complaint_model, self.tenant.category_model)
+        self.model_version = self.analyzer.version
+        self._reloader = ModelReloader(self.analyzer)   # kayıt defterinde yeni sürüm: arka planda yükle + tak
+
+        try: self.store = CommentStore(self.tenant.store)
+        except Exception: self.store = None
+
+        self.df: pd.DataFrame | None = None       # yorumlar (post_id ile self.posts'a bağlı)
+        self.posts: pd.DataFrame | None = None    # gönderiler (post_id indeksli, görseller tek kopya)
+        self._loaded_since = None   # depodan belleğe alınmış en eski gün
+        self.cube: SummaryCube | None = None   # gün × mahalle × kategori sayımları
+        self.trends = TrendEngine()            # ani artış uyarıları (son haftalar, pencereden bağımsız)
+        self.index: CommentIndex | None = None     # tarih/mahalle/metin filtre indeksi (satır konumları)
+        self._commented: set = set()               # en az bir yorumu yüklü gönderiler
+        self._view_cache: OrderedDict = OrderedDict()   # (görünüm, filtre anahtarı) -> sonuç
+        self._fetcher: FetchWorker | None = None
+        self._profile: profiling.ProfileSession | None = None   # SIKAYET_PROFILE / --profile
+        self._store_mark = 0        # depodan en son okunan yazma zamanı (updated_at)
+        self._fetch_chunks = 0
+        # benzer yorum indeksi: şikâyet modeli gömme üretiyorsa; depodaki geçmiş arka planda yüklenir
+        self.vectors: VectorIndex | None = None
+        self._vec_pending: List[Tuple[List[str], np.ndarray]] = []   # indeks hazır olmadan gelen vektörler
+        self._vec_loader: VectorLoader | None = None
+        self._vec_builder: VectorBuilder | None = None   # IVF yeniden kurulumu (search() kurmaz)
+        self._vec_encoder = ""      # indeksteki vektörlerin modeli (model değişince indeks yeniden kurulur)
+        self._exporter: ExportWorker | None = None
         self._build_ui()
+        self._load_history()
+        self._start_vectors()
+        # collector.py gibi başka süreçlerin depoya eklediklerini düzenli aralıkla al
+        if self.store is not None:
+            self._poll_timer=QTimer(self); self._poll_timer.setInterval(STORE_POLL_MS)
+            self._poll_timer.timeout.connect(self._poll_store); self._poll_timer.start()
+        self._model_timer=QTimer(self); self._model_timer.setInterval(MODEL_POLL_MS)
+        self._model_timer.timeout.connect(self._poll_models); self._model_timer.start()
 
     def _build_ui(self):
         # Root background gradient: 90° white -> light blue
@@ -393,9 +791,15 @@ class MainWindow(QMainWindow):
 
         top = QWidget(); top.setStyleSheet(f"background:#fff;border:1px solid {BORDER_C};border-radius:14px;")
         tl = QHBoxLayout(top); tl.setContentsMargins(18,10,18,10)
-        title = QLabel("Olur Belediyesi — Şikâyet Analizi")
+        title = QLabel(f"{self.tenant.name} — Şikâyet Analizi")
         title.setStyleSheet(f"color:{NAVY};font-weight:900;font-size:18pt;letter-spacing:.2px;")
         tl.addWidget(title); tl.addStretch(1)
+        # tanılama: ölçüm açıkken görünür; F12 her durumda açar
+        self.btn_diag=QPushButton("Tanılama"); self.btn_diag.setVisible(metrics.ENABLED)
+        self.btn_diag.setStyleSheet(
+            f"QPushButton{{background:#F3F4F6;border:1px solid {BORDER_C};color:{NAVY};border-radius:10px;padding:6px 12px;font-size:11.5pt;}}"
+            f"QPushButton:hover{{background:#E5E7EB;}}")
+        tl.addWidget(self.btn_diag)
         outer.addWidget(top); add_shadow(top, blur=16, dy=3, alpha=80)
 
         content = QWidget(); cl = QHBoxLayout(content); cl.setContentsMargins(0,0,0,0); cl.setSpacing(14)
@@ -447,8 +851,13 @@ class MainWindow(QMainWindow):
             f"QComboBox QAbstractItemView::item{{min-height:22px;}}"
         )
         self.cmb_mahalle.addItem("Tümü", None)
-        for n in sorted(OLUR_MAHALLELER): self.cmb_mahalle.addItem(n, n.lower())
+        for n in sorted(self.tenant.mahalleler): self.cmb_mahalle.addItem(n, n.lower())
         left.addWidget(self.cmb_mahalle)
+        # özet tablolarda kopyala-yapıştır kampanyaları (near_dup kümeleri) tek şikâyet sayılır
+        self.chk_clusters=QCheckBox("Benzer yorumları tek say")
+        self.chk_clusters.setStyleSheet(f"QCheckBox{{color:{TEXT};padding:4px 2px;}}")
+        self.chk_clusters.setToolTip("Mahalle/Kategori özetinde aynı ya da neredeyse aynı yorumlar bir kez sayılır.")
+        left.addWidget(self.chk_clusters)
 
         # ===== SOL PANEL CHIPLER (SOFT YEŞİL) =====
         chip_row = QHBoxLayout(); chip_row.setSpacing(8)
@@ -469,7 +878,17 @@ class MainWindow(QMainWindow):
         self.btn_show_mh=QPushButton("Mahalleye Göre"); self.btn_show_cat=QPushButton("Kategoriye Göre")
         self.btn_show_mh.setStyleSheet(btn_style); self.btn_show_cat.setStyleSheet(btn_style)
         row.addWidget(self.btn_show_mh); row.addWidget(self.btn_show_cat)
-        left.addLayout(row); left.addStretch(1)
+        left.addLayout(row)
+        self.btn_export=QPushButton("Dışa Aktar (CSV / Excel / Parquet)"); self.btn_export.setStyleSheet(btn_style)
+        left.addWidget(self.btn_export)
+
+        left.addWidget(section_header("Uyarılar"))
+        self.list_alerts=QListWidget(); self.list_alerts.setMaximumHeight(170)
+        self.list_alerts.setStyleSheet(
+            f"QListWidget{{border:1px solid {BORDER_C};border-radius:10px;background:#fff;color:{TEXT};font-size:10pt;}}"
+            f"QListWidget::item{{padding:4px 6px;}} QListWidget::item:selected{{background:{SELECTION_BG};color:{TEXT};}}"
+        )
+        left.addWidget(self.list_alerts); left.addStretch(1)
         cl.addWidget(left_card, 4)
 
         # Right panel
@@ -506,29 +925,41 @@ class MainWindow(QMainWindow):
 
         # Feed
         self.post_feed=PostFeed(); self.right_stack.addWidget(self.post_feed)
+        self.post_feed.commentOpened.connect(self.show_similar)
 
         # Summaries
-        self.table_mh=QTableWidget(); self.table_mh.setColumnCount(2)
-        self.table_mh.setHorizontalHeaderLabels(["Mahalle","Şikâyet Sayısı"])
+        self.table_mh=QTableView(); self.table_mh.setModel(FrameModel(
+            [("Mahalle","mahalle",None,None), ("Şikâyet Sayısı","count",None,Qt.AlignCenter)], self))
         self._style_summary_table(self.table_mh, count_col=1)
         self.page_mh_card=Card(self.table_mh); self.right_stack.addWidget(self.page_mh_card)
 
-        self.table_cat=QTableWidget(); self.table_cat.setColumnCount(2)
-        self.table_cat.setHorizontalHeaderLabels(["Kategori","Şikâyet Sayısı"])
+        self.table_cat=QTableView(); self.table_cat.setModel(FrameModel(
+            [("Kategori","kategori",None,None), ("Şikâyet Sayısı","count",None,Qt.AlignCenter)], self))
         self._style_summary_table(self.table_cat, count_col=1)
         self.page_cat_card=Card(self.table_cat); self.right_stack.addWidget(self.page_cat_card)
 
+        self.page_diag=DiagnosticsPanel(); self.right_stack.addWidget(self.page_diag)
+
         cl.addWidget(right_back, 6)
 
         # signals
         self.btn_fetch.clicked.connect(self.fetch_data)
         self.btn_show_mh.clicked.connect(self.show_mh_table)
         self.btn_show_cat.clicked.connect(self.show_cat_table)
+        self.list_alerts.itemClicked.connect(self._open_alert)
+        self.btn_export.clicked.connect(self.export_view)
         self.btn_back.clicked.connect(self.go_back_to_comments)
-        self.search_edit.textChanged.connect(self.apply_filters)
-        self.cmb_mahalle.currentIndexChanged.connect(self.apply_filters)
-        self.date_from.dateChanged.connect(self.apply_filters)
-        self.date_to.dateChanged.connect(self.apply_filters)
+        self.btn_diag.clicked.connect(self.show_diagnostics)
+        QShortcut(QKeySequence("F12"), self, activated=self.show_diagnostics)
+        # filtreler: art arda gelen değişiklikler tek yeniden çizime indirgenir
+        self._filter_timer=QTimer(self); self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(FILTER_DEBOUNCE_MS)
+        self._filter_timer.timeout.connect(self.apply_filters)
+        self.search_edit.textChanged.connect(self.schedule_filters)
+        self.cmb_mahalle.currentIndexChanged.connect(self.schedule_filters)
+        self.chk_clusters.toggled.connect(self.schedule_filters)
+        self.date_from.dateChanged.connect(self.schedule_filters)
+        self.date_to.dateChanged.connect(self.schedule_filters)
 
         self.update_welcome()
         self._update_left_chips_text()
@@ -550,25 +981,26 @@ class MainWindow(QMainWindow):
         self.chip_date._label.setText(f"Tarih: {dr}")
 
     # ------- table style helpers -------
-    def _style_summary_table(self, table: QTableWidget, count_col: int):
+    def _style_summary_table(self, table: QTableView, count_col: int):
         table.horizontalHeader().setStretchLastSection(False)
         table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
         table.horizontalHeader().setSectionResizeMode(count_col, QHeaderView.ResizeToContents)
         table.verticalHeader().setDefaultSectionSize(32)
-        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         table.setAlternatingRowColors(True)
         table.setStyleSheet(
-            "QTableWidget{background:#fff;border:1px solid #e6ebf2;border-radius:10px;}"
-            f"QTableWidget::item:selected{{background:{SELECTION_BG}; color:{SELECTION_FG};}}"
+            "QTableView{background:#fff;border:1px solid #e6ebf2;border-radius:10px;}"
+            f"QTableView::item:selected{{background:{SELECTION_BG}; color:{SELECTION_FG};}}"
         )
         h = table.horizontalHeader()
         h.setDefaultAlignment(Qt.AlignCenter)
+        h.setSortIndicator(-1, Qt.AscendingOrder); table.setSortingEnabled(True)
         table.setMinimumHeight(300)
 
     # ===== screens =====
     def update_welcome(self):
         total = int(len(self.df)) if isinstance(self.df, pd.DataFrame) else 0
-        msg = (f"<b style='color:{NAVY};font-size:18pt;'>Olur Belediyesi — Şikâyet Analizi</b><br><br>"
+        msg = (f"<b style='color:{NAVY};font-size:18pt;'>{html.escape(self.tenant.name)} — Şikâyet Analizi</b><br><br>"
                f"<ul style='font-size:14pt; line-height:170%; text-align:left; margin:0 24px;'>"
                f"<li>Soldan <b>Facebook'tan Yorumları Çek</b> ile verileri al</li>"
                f"<li>Ardından <b>Mahalleye Göre</b> veya <b>Kategoriye Göre</b> özet tabloları aç</li>"
@@ -593,213 +1025,422 @@ class MainWindow(QMainWindow):
         self.update_back_visibility()
 
     # ===== data fetch =====
-    def fetch_posts_df(self) -> pd.DataFrame:
-        bundle = fetch_posts_with_comments(limit_posts=30, limit_comments=300)
-
-        fb_token = os.getenv("FACEBOOK_ACCESS_TOKEN") or os.getenv("FB_ACCESS_TOKEN") or ""
-        def image_candidates(post: Dict[str, Any]) -> List[str]:
-            c=[]
-            pid = post.get("id","")
-            if pid and fb_token:
-                c.extend([
-                    f"https://graph.facebook.com/{pid}/picture?type=large&access_token={fb_token}",
-                    f"https://graph.facebook.com/{pid}/picture?type=normal&access_token={fb_token}",
-                    f"https://graph.facebook.com/{pid}/picture?width=800&access_token={fb_token}",
-                ])
-            for k in ("full_picture","picture"):
-                if post.get(k): c.append(post[k])
-            atts=post.get("attachments") or {}; data=atts.get("data") or []
-            if isinstance(data,list) and data:
-                d0=data[0]
-                m=((d0.get("media") or {}).get("image") or {}).get("src")
-                if m: c.append(m)
-                subs=(d0.get("subattachments") or {}).get("data") or []
-                if isinstance(subs,list):
-                    for s in subs:
-                        mm=((s.get("media") or {}).get("image") or {}).get("src")
-                        if mm: c.append(mm)
-                if d0.get("picture"): c.append(d0["picture"])
-            uniq=[]
-            for u in c:
-                su=safe_url(u)
-                if su and su not in uniq: uniq.append(su)
-            return uniq
-
-        rows=[]
-        for item in bundle:
-            post=item.get("post",{}) or {}
-            pid=post.get("id","")
-            pmsg=(post.get("message") or "").strip()
-            ptime=post.get("created_time","")
-            purl=post.get("permalink_url","")
-            pics=image_candidates(post)
-
-            coms=item.get("comments",[]) or []
-            if coms:
-                for c in coms:
-                    rows.append({
-                        "post_id":pid,"post_message":pmsg,"post_time":ptime,"post_url":purl,"post_pics":pics,
-                        "comment_id":c.get("id",""),"message":(c.get("message") or "").strip(),
-                        "created":c.get("created_time",""),"author":(c.get("from",{}) or {}).get("name","")
-                    })
-            else:
-                rows.append({
-                    "post_id":pid,"post_message":pmsg,"post_time":ptime,"post_url":purl,"post_pics":pics,
-                    "comment_id":"","message":"","created":ptime,"author":""
-                })
-
-        df=pd.DataFrame(rows)
-        if df.empty: return df
-        for col in ("created","post_time"):
-            if col in df.columns: df[col]=pd.to_datetime(df[col], errors="coerce")
-        df["date"]=df["created"] if "created" in df.columns else pd.NaT
-
-        wl=OLUR_MAHALLELER
-        df["mahalle"]= [(mahalle_bul_olur(t, wl) or "") for t in df["message"].astype(str).tolist()]
-
-        try: df["t_sikayet"]=self.complaint_clf.predict(df["message"].tolist()) if self.complaint_clf else ""
-        except Exception: df["t_sikayet"]=""
-        try: df["kategori"]=self.category_clf.predict(df["message"].tolist()) if self.category_clf else df.get("kategori","")
-        except Exception:
-            if "kategori" not in df.columns: df["kategori"]=""
-
-        if "post_pics" in df.columns:
-            df["post_pics"]=df["post_pics"].apply(lambda x: x if isinstance(x,list) else ([] if pd.isna(x) else [x]))
-        else: df["post_pics"]= [[]]
-        def sanitize_list(lst):
-            out=[]
-            for u in lst:
-                su=safe_url(u)
-                if su and su not in out: out.append(su)
-            return out
-        df["post_pics"]=df["post_pics"].apply(sanitize_list)
-        df["post_url"]=df["post_url"].apply(safe_url)
-        return df
-
     def fetch_data(self):
+        """Çekme işlemini akış hattında başlatır; gönderiler analiz edildikçe görünüme eklenir."""
+        if self._fetcher is not None and self._fetcher.isRunning(): return
+        since=self.store.last_time() if self.store is not None else None
+        self._fetch_chunks=0
+        self._profile=profiling.session("fetch")
+        self.btn_fetch.setEnabled(False); self.btn_fetch.setText("Yorumlar çekiliyor…")
+        self._fetcher=FetchWorker(self, since)
+        self._fetcher.chunk.connect(self._on_fetch_chunk)
+        self._fetcher.failed.connect(self._soft_error)
+        self._fetcher.finished.connect(self._on_fetch_done)
+        self._fetcher.start()
+
+    def _on_fetch_chunk(self, posts: pd.DataFrame, df: pd.DataFrame):
+        if "embedding" in df.columns:
+            # vektörler indekse gider (depoya store aşaması yazdı); tabloda tutulmaz
+            self._add_vectors(df["comment_id"].astype(str).tolist(), df["embedding"].tolist(),
+                              df.attrs.get("encoder", self._vec_encoder))
+            df=df.drop(columns=["embedding"])
+        first=self._fetch_chunks==0
+        self._fetch_chunks+=1
+        self.trends.add(df)
+        if self.store is None and first:
+            self._set_data(posts, df)   # depo yoksa her çekme önceki oturum verisinin yerini alır
+        else:
+            self._merge_posts(posts); self._append_rows(df)
+        # ilk gönderi hemen görünür; sonrakiler filtre zamanlayıcısıyla toplu yeniden çizilir
+        if first: self.show_comments_page()
+        else: self._filter_timer.start()
+
+    def _merge_posts(self, posts: pd.DataFrame):
+        if posts is None or posts.empty: return
+        if self.posts is None or self.posts.empty: self.posts=posts
+        else: self.posts=pd.concat([self.posts.drop(posts.index, errors="ignore"), posts])
+        self._view_cache.clear()
+
+    def _on_fetch_done(self):
+        self.btn_fetch.setEnabled(True); self.btn_fetch.setText("Facebook'tan Yorumları Çek")
+        self._fetcher=None
+        metrics.export()
+        empty=(self.df is None or self.df.empty) and (self.posts is None or self.posts.empty)
+        if self._fetch_chunks and not empty: self.apply_filters()
+        self._refresh_alerts()
+        # tur, son yeniden çizim dahil profillenir
+        if self._profile is not None: self._profile.stop(); self._profile=None
+        if self._fetch_chunks and empty: self._soft_info("Bilgi","Hiç kayıt gelmedi.")
+
+    def closeEvent(self, e):
+        if self._fetcher is not None:
+            self._fetcher.stop(); self._fetcher.wait(3000)
+        if self._vec_loader is not None: self._vec_loader.wait(3000)
+        if self._vec_builder is not None: self._vec_builder.wait(3000)
+        if self._exporter is not None:
+            self._exporter.cancel(); self._exporter.wait(3000)
+        super().closeEvent(e)
+
+    # ===== local store =====
+    def _load_history(self):
+        """Açılışta depodaki geçmişi (seçili tarih aralığı kadar) belleğe alır."""
+        if self.store is None: return
         try:
-            self.df=self.fetch_posts_df()
+            self._reload_window()
+            self.trends=TrendEngine.from_store(self.store)
         except Exception as e:
-            self._soft_error("Facebook Hatası", str(e)); return
-        if self.df is None or self.df.empty:
-            self._soft_info("Bilgi","Hiç kayıt gelmedi."); return
-        self.show_comments_page()
+            print(f"[store] geçmiş okunamadı: {e}"); return
+        self._refresh_alerts()
+        if self.df is not None and not self.df.empty: self.show_comments_page()
+
+    def _reload_window(self):
+        since=self.date_from.date().toPyDate()
+        self._store_mark=self.store.last_update()
+        self._set_data(self.store.load_posts(), self.store.load(start=since))
+        self._loaded_since=since
+
+    def _poll_store(self):
+        """Depoya başka süreçlerin (collector.py) yazdığı yeni yorumları görünüme ekler."""
+        if self.store is None or self._fetcher is not None: return
+        try:
+            mark=self.store.last_update()
+            if mark<=self._store_mark: return
+            df=self.store.load(start=self._loaded_since, updated_after=self._store_mark)
+            self._store_mark=mark
+            if not df.empty and self.df is not None and not self.df.empty:
+                df=df[~df["comment_id"].isin(self.df["comment_id"])]   # kendi çektiklerimiz zaten yüklü
+            if not df.empty:   # sadece yeni satırların gönderileri (tüm tablo her yoklamada okunmaz)
+                self._merge_posts(self.store.load_posts(df["post_id"].astype(str).unique()))
+            self._append_rows(df); self.trends.add(df)
+            if not df.empty and self._vec_encoder:
+                ids, mat = self.store.load_embeddings(self._vec_encoder, df["comment_id"].astype(str).tolist())
+                self._add_vectors(ids, mat, self._vec_encoder)
+        except Exception as e:
+            print(f"[store] yoklama başarısız: {e}"); return
+        if not df.empty: self._filter_timer.start(); self._refresh_alerts()
+
+    # ===== spike alerts =====
+    def _refresh_alerts(self):
+        """Sol paneldeki uyarılar: mahalle × kategori ani artışları (trends.py), z skoruna göre."""
+        self.list_alerts.clear()
+        al=self.trends.alerts().drop_duplicates(["mahalle","kategori"])   # çift başına en güçlü pencere
+        if al.empty:
+            it=QListWidgetItem("Olağan dışı artış yok"); it.setFlags(Qt.NoItemFlags)
+            self.list_alerts.addItem(it); return
+        for r in al.head(ALERTS_SHOWN).itertuples(index=False):
+            it=QListWidgetItem(f"{r.mahalle} · {r.kategori}: {ALERT_WINDOWS[r.pencere]} {r.count} (olağan ~{r.baseline:g})")
+            it.setToolTip(f"z = {r.z:g}"); it.setData(Qt.UserRole, (r.mahalle, r.kategori))
+            self.list_alerts.addItem(it)
+
+    def _open_alert(self, item: QListWidgetItem):
+        """Uyarıya tıklama: mahalle filtresi seçilir ve kategori özeti açılır."""
+        data=item.data(Qt.UserRole)
+        if not data: return
+        i=self.cmb_mahalle.findText(data[0])
+        if i>=0: self.cmb_mahalle.setCurrentIndex(i)
+        self.show_cat_table()
+
+    # ===== model registry =====
+    def _poll_models(self):
+        """Kayıt defterinde etkin sürüm değiştiyse model arka planda yüklenir; takılınca burada devralınır."""
+        for msg in self._reloader.check(): print(f"[models] {msg}")
+        if self._reloader.busy: QTimer.singleShot(MODEL_SWAP_POLL_MS, self._poll_models)
+        if self.analyzer.version == self.model_version: return
+        self.model_version=self.analyzer.version
+        # farklı modelin gömmeleri aynı uzayda değil: indeks yeni modelin depodaki vektörleriyle kurulur
+        if self.analyzer.encoder != self._vec_encoder: self._start_vectors()
+
+    # ===== similar comments =====
+    def _start_vectors(self):
+        self.vectors=None; self._vec_pending=[]; self._vec_loader=None; self._vec_builder=None
+        self._vec_encoder=self.analyzer.encoder
+        if not self._vec_encoder: return   # model yok: gömme de yok
+        if self.store is None: self.vectors=VectorIndex(); return
+        loader=VectorLoader(self); self._vec_loader=loader
+        loader.done.connect(lambda vi, l=loader: self._on_vectors_ready(vi, l))
+        loader.start()
+
+    def _on_vectors_ready(self, vi: VectorIndex, loader: VectorLoader):
+        if loader is not self._vec_loader: return   # bu arada model değişti: eski modelin indeksi
+        for ids, mat in self._vec_pending: vi.add(ids, mat)
+        self._vec_pending=[]; self.vectors=vi; self._vec_loader=None
+        print(f"[vectors] {len(vi):,} yorum vektörü hazır")
+        self._maybe_build_vectors()
+
+    def _add_vectors(self, ids: List[str], vecs, encoder: str):
+        if not len(ids) or encoder != self._vec_encoder: return   # değişim öncesi modelin vektörleri
+        mat=np.stack(vecs) if isinstance(vecs, list) else vecs
+        if self.vectors is not None: self.vectors.add(ids, mat); self._maybe_build_vectors()
+        elif self._vec_loader is not None: self._vec_pending.append((ids, mat))
+
+    def _maybe_build_vectors(self):
+        """Listeler eskidiyse arka planda yeniden kur; o sırada yeni satırlar kuyruktan taranır."""
+        vi=self.vectors
+        if vi is None or self._vec_builder is not None or not vi.needs_build(): return
+        b=VectorBuilder(self, vi); self._vec_builder=b
+        b.done.connect(lambda lay, b=b: self._on_vectors_built(lay, b))
+        b.start()
+
+    def _on_vectors_built(self, lay, builder: VectorBuilder):
+        if builder is not self._vec_builder: return   # bu arada indeks değişti (model değişimi)
+        self._vec_builder=None
+        if lay is not None and builder.vi is self.vectors:
+            self.vectors.install(lay); self._maybe_build_vectors()   # kurulum sürerken çok satır geldiyse
+
+    def show_similar(self, cid: str, text: str):
+        """Yoruma çift tıklama: tam metin + en benzer SIMILAR_K yorum."""
+        rows=None
+        if not self._vec_encoder:
+            note="Benzer yorum araması için şikâyet modeli gerekli."
+        elif self.vectors is None:
+            note="Benzerlik indeksi hazırlanıyor, birazdan tekrar deneyin."
+        elif not cid or cid not in self.vectors:
+            note="Bu yorum için vektör yok (model olmadan analiz edilmiş)."
+        else:
+            with metrics.span("similar.search") as sp:
+                hits=self.vectors.search(cid, k=SIMILAR_K); sp.items(len(hits))
+            rows=self._similar_rows(hits)
+            note=f"{len(self.vectors):,} yorum içinde en benzer {len(rows)} yorum"
+        SimilarDialog(text, rows, note, self).exec_()
+
+    def _similar_rows(self, hits: List[Tuple[str, float]]) -> pd.DataFrame:
+        """(comment_id, skor) -> yorum satırları; yüklü pencerede olmayanlar depodan okunur."""
+        ids=[c for c, _ in hits]; score=dict(hits)
+        cols=["comment_id","message","date","mahalle","kategori"]
+        parts=[]
+        if self.df is not None and not self.df.empty:
+            parts.append(self.df.loc[self.df["comment_id"].isin(ids).to_numpy(), cols].astype(object))
+        missing=set(ids)-set(parts[0]["comment_id"]) if parts else set(ids)
+        if missing and self.store is not None:
+            parts.append(self.store.load_by_ids(list(missing))[cols].astype(object))
+        rows=pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=cols)
+        rows["score"]=[score.get(c, 0.0) for c in rows["comment_id"]]
+        return rows.sort_values("score", ascending=False, kind="stable").reset_index(drop=True)
+
+    def _set_data(self, posts: pd.DataFrame, df: pd.DataFrame):
+        """
+        Veri setini değiştirir. Yorumlar tarihe göre artan sırada tutulur (tarihsiz satırlar
+        tarih filtresinden hiç geçemediği için atılır); özet küpü ve filtre indeksi bir kez kurulur.
+        """
+        if df is not None and not df.empty:
+            df=df[df["date"].notna()].sort_values("date", kind="stable").reset_index(drop=True)
+        self.posts, self.df=posts, df
+        self._view_cache.clear()
+        self.cube=SummaryCube(df)
+        self.index=CommentIndex(df) if df is not None and not df.empty else None
+        self._commented=set(df["post_id"].unique()) if df is not None and not df.empty else set()
+
+    def _append_rows(self, df: pd.DataFrame):
+        """Yeni analiz edilmiş yorumları tabloya, küpe ve indekse artımlı ekler."""
+        if df is None or df.empty: return
+        df=df[df["date"].notna()]
+        if self._loaded_since is not None:
+            # yüklü pencereden eski satırlar depoda; _ensure_loaded gerektiğinde okur
+            df=df[df["date"].dt.date>=self._loaded_since]
+        if df.empty: return
+        df=df.sort_values("date", kind="stable")
+        if self.df is None or self.df.empty or self.index is None:
+            self._set_data(self.posts, df); return
+        merged=append_compact(self.df, df)
+        if not self.index.can_append(df):
+            # sıralama bozuluyor: indeksi baştan kur
+            self._set_data(self.posts, merged); return
+        self.df=merged; self._view_cache.clear()
+        self.cube.add(df); self.index.add(df)
+        self._commented.update(df["post_id"].unique())
+
+    def _ensure_loaded(self):
+        """Tarih aralığı geriye genişletilince eksik dilimi depodan tembelce yükler."""
+        if self.store is None or self._loaded_since is None: return
+        s=self.date_from.date().toPyDate()
+        if s >= self._loaded_since: return
+        older=self.store.load(start=s, end=self._loaded_since)
+        self._loaded_since=s
+        if older.empty: return
+        # eski dilim başa gelir; satır konumları kaydığı için indeks yeniden kurulur
+        df=older if self.df is None or self.df.empty else pd.concat([older, self.df], ignore_index=True)
+        self._set_data(self.posts, compact_dtypes(df))
 
     # ===== pages =====
     def show_comments_page(self):
-        df=self.get_filtered_df()
-        if df is None or df.empty:
+        groups=self._cached_view("feed", self._post_groups) if self.posts is not None else None
+        if not groups:
             q=(self.search_edit.text() or "").strip()
             mh=self.cmb_mahalle.currentText() if self.cmb_mahalle.currentData() else ""
             dr=f"{self.date_from.date().toString('yyyy-MM-dd')} → {self.date_to.date().toString('yyyy-MM-dd')}"
             self.show_no_results("Yorumlar", q, mh, dr); return
 
-        groups=[]
-        df_sorted=df.sort_values(by=["post_time","date"], ascending=False, na_position="last")
-        for (pid,pmsg,ptime,purl), g in df_sorted.groupby(["post_id","post_message","post_time","post_url"], dropna=False):
-            merged_pics=[]
-            for lst in g["post_pics"].tolist():
-                if isinstance(lst,list):
-                    for u in lst:
-                        su=safe_url(u)
-                        if su and su not in merged_pics: merged_pics.append(su)
-            ptitle=ellipsize(pmsg) if pmsg else (f"Gönderi {pid}" if pid else "Gönderi")
-            rows=[{"message":r.get("message",""),"date":r.get("date",None),
-                   "mahalle":r.get("mahalle",""),"kategori":r.get("kategori","")} for _,r in g.iterrows()]
-            groups.append((pid, ptitle, self._fmt(ptime), rows, merged_pics or [], purl))
-
         self.post_feed.populate(groups)
         self.right_title.setText("Yorumlar")
         self.right_stack.setCurrentWidget(self.post_feed)
         self.update_back_visibility()
 
-    def show_mh_table(self):
-        df=self.get_filtered_df()
-        if df is None or df.empty:
-            q=(self.search_edit.text() or "").strip()
-            mh=self.cmb_mahalle.currentText() if self.cmb_mahalle.currentData() else ""
-            dr=f"{self.date_from.date().toString('yyyy-MM-dd')} → {self.date_to.date().toString('yyyy-MM-dd')}"
-            self.show_no_results("Mahalle Özeti", q, mh, dr); return
-        try:
-            g=summarize_by_mahalle(df[df["mahalle"]!=""])
-        except Exception:
-            tmp=df[df["mahalle"]!=""].copy(); tmp["count"]=1
-            g=tmp.groupby("mahalle", as_index=False)["count"].count() if not tmp.empty else pd.DataFrame(columns=["mahalle","count"])
+    def _post_groups(self) -> PostFeedModel:
+        """
+        Filtrelenmiş yorumları post_id üzerinden gönderi tablosuna bağlar (gönderi alanları tek kopya).
+        Satırlar self.df içindeki konumlardır; böylece aynı veri üzerindeki iki sonuç karşılaştırılabilir.
+        """
+        by_post={}
+        rows=self.get_filtered_rows()[::-1]   # tablo tarihe göre artan; akış yeniden eskiye
+        if len(rows):
+            pid_col=self.df["post_id"].iloc[rows]
+            local=pid_col.groupby(pid_col, sort=False, observed=True).indices
+            by_post={pid: rows[i] for pid, i in local.items()}
+        pids=[p for p in by_post if p in self.posts.index]
+        if not (self.search_edit.text() or "").strip() and not self.cmb_mahalle.currentData():
+            pids+=self._posts_without_comments()
+        order=self.posts.loc[pids, "post_time"].sort_values(ascending=False, na_position="last").index
+        empty=np.array([], dtype=np.int64)
+        items=[(pid, by_post.get(pid, empty)) for pid in order]
+        return PostFeedModel(self.posts, self.df, items, self._fmt)
+
+    def _posts_without_comments(self) -> List[str]:
+        """Seçili tarih aralığında paylaşılmış, henüz yorumu olmayan gönderiler."""
+        if self.posts is None or self.posts.empty: return []
+        have=self._commented
+        s=self.date_from.date().toPyDate(); e=self.date_to.date().toPyDate()
+        d=self.posts["post_time"].dt.date
+        return [pid for pid in self.posts.index[(d>=s)&(d<=e)] if pid not in have]
 
+    def show_mh_table(self):
+        g=self._cached_view("mahalle", lambda: self._summary_frame("mahalle"))
         if g is None or g.empty:
             self.show_no_results("Mahalle Özeti", (self.search_edit.text() or "").strip(),
                                  self.cmb_mahalle.currentText() if self.cmb_mahalle.currentData() else "",
                                  f"{self.date_from.date().toString('yyyy-MM-dd')} → {self.date_to.date().toString('yyyy-MM-dd')}")
             return
 
-        self.table_mh.setRowCount(len(g))
-        for r,row in g.reset_index(drop=True).iterrows():
-            name = str(row.get("mahalle",""))
-            cnt  = str(int(row.get("count",0)))
-            self.table_mh.setItem(r,0,QTableWidgetItem(name))
-            it = QTableWidgetItem(cnt); it.setTextAlignment(Qt.AlignCenter)
-            self.table_mh.setItem(r,1,it)
+        self.table_mh.model().set_frame(g.reset_index(drop=True))
 
         self.right_title.setText("Mahalle Özeti"); self.right_stack.setCurrentWidget(self.page_mh_card)
         self.update_back_visibility()
 
     def show_cat_table(self):
-        df=self.get_filtered_df()
-        if df is None or df.empty:
-            q=(self.search_edit.text() or "").strip()
-            mh=self.cmb_mahalle.currentText() if self.cmb_mahalle.currentData() else ""
-            dr=f"{self.date_from.date().toString('yyyy-MM-dd')} → {self.date_to.date().toString('yyyy-MM-dd')}"
-            self.show_no_results("Kategori Özeti", q, mh, dr); return
-        try:
-            g=summarize_by_category(df[df["kategori"]!=""])
-        except Exception:
-            tmp=df[df["kategori"]!=""].copy(); tmp["count"]=1
-            g=tmp.groupby("kategori", as_index=False)["count"].count() if not tmp.empty else pd.DataFrame(columns=["kategori","count"])
-
+        g=self._cached_view("kategori", lambda: self._summary_frame("kategori"))
         if g is None or g.empty:
             self.show_no_results("Kategori Özeti", (self.search_edit.text() or "").strip(),
                                  self.cmb_mahalle.currentText() if self.cmb_mahalle.currentData() else "",
                                  f"{self.date_from.date().toString('yyyy-MM-dd')} → {self.date_to.date().toString('yyyy-MM-dd')}")
             return
 
-        self.table_cat.setRowCount(len(g))
-        for r,row in g.reset_index(drop=True).iterrows():
-            name = str(row.get("kategori",""))
-            cnt  = str(int(row.get("count",0)))
-            self.table_cat.setItem(r,0,QTableWidgetItem(name))
-            it = QTableWidgetItem(cnt); it.setTextAlignment(Qt.AlignCenter)
-            self.table_cat.setItem(r,1,it)
+        self.table_cat.model().set_frame(g.reset_index(drop=True))
 
         self.right_title.setText("Kategori Özeti"); self.right_stack.setCurrentWidget(self.page_cat_card)
         self.update_back_visibility()
 
+    def _summary_frame(self, dim: str) -> pd.DataFrame | None:
+        """
+        Özet tablo: arama yoksa küpten (geçmiş boyutundan bağımsız), varsa filtrelenmiş yorumlardan.
+        "Benzer yorumları tek say" seçiliyse küme bilgisi küpte olmadığı için filtrelenmiş yorumlardan.
+        """
+        if self.df is None or self.df.empty: return None
+        q=(self.search_edit.text() or "").strip(); clusters=self.chk_clusters.isChecked()
+        if not q and not clusters and self.cube is not None:
+            s=self.date_from.date().toPyDate(); e=self.date_to.date().toPyDate()
+            mh=self.cmb_mahalle.currentData()
+            return self.cube.by_mahalle(s, e, mh) if dim=="mahalle" else self.cube.by_category(s, e, mh)
+        df=self.get_filtered_df()
+        if df is None or df.empty: return None
+        return summarize_by_mahalle(df, clusters) if dim=="mahalle" else summarize_by_category(df, clusters)
+
     def go_back_to_comments(self): self.show_comments_page()
 
+    def show_diagnostics(self):
+        self.right_title.setText("Tanılama"); self.right_stack.setCurrentWidget(self.page_diag)
+        self.update_back_visibility()
+
     def update_back_visibility(self):
         cur=self.right_stack.currentWidget()
         self.btn_back.setVisible(not (cur is self.post_feed or cur is self.page_welcome_card))
 
+    def schedule_filters(self):
+        """Filtre sinyalleri: etiketler hemen, sonuçlar yazma/seçim durulunca güncellenir."""
+        self._update_left_chips_text()
+        self._filter_timer.start()
+
+    def _filter_key(self) -> Tuple:
+        return (self.date_from.date().toPyDate(), self.date_to.date().toPyDate(),
+                self.cmb_mahalle.currentData(), (self.search_edit.text() or "").strip(),
+                self.chk_clusters.isChecked())
+
+    def _cached_view(self, kind: str, build):
+        """Akış/özet sonuçlarını filtre anahtarıyla saklar; önceki bir filtreye dönüş yeniden hesaplamaz."""
+        key=(kind,)+self._filter_key()
+        if key in self._view_cache:
+            self._view_cache.move_to_end(key); return self._view_cache[key]
+        out=build()
+        self._view_cache[key]=out
+        while len(self._view_cache)>VIEW_CACHE_SIZE: self._view_cache.popitem(last=False)
+        return out
+
     def apply_filters(self):
+        self._filter_timer.stop()
         self._update_left_chips_text()
+        try: self._ensure_loaded()
+        except Exception as e: print(f"[store] yüklenemedi: {e}")
         if self.df is None: self.update_welcome(); return
         cur=self.right_stack.currentWidget()
-        if   cur is self.post_feed: self.show_comments_page()
-        elif cur is self.page_mh_card: self.show_mh_table()
-        elif cur is self.page_cat_card: self.show_cat_table()
-        else: self.show_comments_page()
+        if cur is self.page_diag: return
+        with metrics.span("render.filters"):
+            if   cur is self.post_feed: self.show_comments_page()
+            elif cur is self.page_mh_card: self.show_mh_table()
+            elif cur is self.page_cat_card: self.show_cat_table()
+            else: self.show_comments_page()
+
+    def get_filtered_rows(self) -> np.ndarray:
+        """Filtrelere uyan satır konumları (self.df içinde, tarihe göre artan); tablo kopyalanmaz."""
+        if self.index is None: return np.array([], dtype=np.int64)
+        s=self.date_from.date().toPyDate(); e=self.date_to.date().toPyDate()
+        return self.index.select(s, e, self.cmb_mahalle.currentData(), (self.search_edit.text() or "").strip())
 
     def get_filtered_df(self) -> pd.DataFrame | None:
         if self.df is None or self.df.empty: return self.df
-        df=self.df.copy()
-        try:
-            s=self.date_from.date().toPyDate(); e=self.date_to.date().toPyDate()
-            if s and e and "date" in df.columns: df=df[(df["date"].dt.date>=s)&(df["date"].dt.date<=e)]
-        except Exception: pass
-        mh=self.cmb_mahalle.currentData()
-        if mh: df=df[df["mahalle"].str.lower()==mh]
-        q=(self.search_edit.text() or "").strip().lower()
-        if q: df=df[df["message"].str.lower().str.contains(q, na=False)]
-        return df
+        rows=self.get_filtered_rows()
+        if len(rows) and rows[-1]-rows[0]+1==len(rows):
+            return self.df.iloc[rows[0]:rows[-1]+1]   # ardışık aralık: dilim
+        return self.df.iloc[rows]
+
+    # ===== export =====
+    def _export_meta(self, view: str, rows: int) -> Dict[str, str]:
+        """Dosyaya gömülen bilgi: görünüm, uygulanan filtreler, model sürümü."""
+        return {"görünüm": view, "sayfa": self.tenant.name,
+                "tarih aralığı": f"{self.date_from.date().toString('yyyy-MM-dd')} → {self.date_to.date().toString('yyyy-MM-dd')}",
+                "mahalle": self.cmb_mahalle.currentText() if self.cmb_mahalle.currentData() else "Tümü",
+                "arama": (self.search_edit.text() or "").strip(),
+                "benzer yorumlar tek": "evet" if self.chk_clusters.isChecked() else "hayır",
+                "model sürümü": self.model_version, "satır": str(rows),
+                "oluşturma": pd.Timestamp.now(tz="UTC").strftime("%Y-%m-%d %H:%M UTC")}
+
+    def export_view(self):
+        """Açık görünüm (özet tablo ya da filtrelenmiş yorumlar) arka planda dosyaya yazılır."""
+        if self._exporter is not None: return
+        cur=self.right_stack.currentWidget(); rows=cols=None
+        if cur in (self.page_mh_card, self.page_cat_card):
+            dim="mahalle" if cur is self.page_mh_card else "kategori"
+            view="Mahalle Özeti" if dim=="mahalle" else "Kategori Özeti"
+            frame=self._cached_view(dim, lambda: self._summary_frame(dim))
+        else:
+            view="Yorumlar"; frame=self.df; cols=EXPORT_COLS
+            rows=self.get_filtered_rows() if frame is not None and not frame.empty else None
+        n=0 if frame is None else (len(frame) if rows is None else len(rows))
+        if not n: self._soft_info("Dışa Aktar","Dışa aktarılacak kayıt yok."); return
+        name=f"{view.replace(' ','_')}_{pd.Timestamp.now().strftime('%Y%m%d_%H%M')}"
+        path, flt=QFileDialog.getSaveFileName(self, "Dışa Aktar", name, ";;".join(EXPORT_FILTERS))
+        if not path: return
+        ext=EXPORT_FILTERS.get(flt, ".csv")
+        if os.path.splitext(path)[1].lower() not in EXPORT_FILTERS.values(): path+=ext
+        dlg=QProgressDialog(f"{view}: {n:,} satır yazılıyor…", "İptal", 0, n, self)
+        dlg.setWindowTitle("Dışa Aktar"); dlg.setWindowModality(Qt.WindowModal); dlg.setMinimumDuration(400)
+        self._exporter=w=ExportWorker(self, frame, path, self._export_meta(view, n), rows, cols)
+        w.progress.connect(lambda done, total: dlg.setValue(done))
+        dlg.canceled.connect(w.cancel)
+        def finish(p: str, written: int):
+            dlg.reset(); self._exporter=None; self.btn_export.setEnabled(True)
+            if written>=0: self._soft_info("Dışa Aktar", f"{written:,} satır yazıldı:\n{p}")
+        def fail(t: str, m: str):
+            dlg.reset(); self._exporter=None; self.btn_export.setEnabled(True); self._soft_error(t, m)
+        w.done.connect(finish); w.failed.connect(fail)
+        self.btn_export.setEnabled(False); w.start()
 
     def _fmt(self, x) -> str:
         try:
@@ -813,6 +1454,8 @@ class MainWindow(QMainWindow):
 
 # ======= App entry: Splash =======
 if __name__ == "__main__":
+    if "--profile" in sys.argv:
+        sys.argv.remove("--profile"); profiling.enable()
     app = QApplication(sys.argv); app.setStyle("Fusion")
     pal=app.palette()
     pal.setColor(QPalette.ButtonText, QColor(NAVY))
@@ -0,0 +1,50 @@
+# memory_report.py — yorum tablosunun satır başı bellek kullanımı (sentetik veri)
+# Kullanım: python memory_report.py [satır_sayısı]
+import sys
+import numpy as np
+import pandas as pd
+from data_store import compact_dtypes
+
+MAHALLELER = ["Akbayır","Aktepe","Altunkaya","Cumhuriyet","Merkez","Olurdere","Kaban","Eğlek","Ilıkaynak",""]
+KATEGORILER = ["Aydınlatma","Diğer","Park/Oyun Alanı","Su/Altyapı","Teşekkür","Yol/Kaldırım","Çöp/Temizlik"]
+KELIMELER = "su yok yol çukur lamba yanmıyor çöp alınmadı teşekkürler park köpek kanalizasyon taştı".split()
+
+def synthetic(n: int, per_post: int = 300, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n_posts = max(1, n // per_post)
+    words = np.array(KELIMELER, dtype=object)
+    msgs = [" ".join(words[rng.integers(0, len(words), rng.integers(3, 12))]) for _ in range(n)]
+    return pd.DataFrame({
+        "post_id": np.char.add("post_", (rng.integers(0, n_posts, n)).astype(str)).astype(object),
+        "comment_id": np.char.add("c_", np.arange(n).astype(str)).astype(object),
+        "message": pd.Series(msgs, dtype=object),
+        "author": np.char.add("kişi ", rng.integers(0, 50_000, n).astype(str)).astype(object),
+        "date": pd.Timestamp("2024-01-01", tz="UTC") + pd.to_timedelta(rng.integers(0, 86400*365, n), unit="s"),
+        "mahalle": np.array(MAHALLELER, dtype=object)[rng.integers(0, len(MAHALLELER), n)],
+        "t_sikayet": np.array(["0","1"], dtype=object)[rng.integers(0, 2, n)],
+        "kategori": np.array(KATEGORILER, dtype=object)[rng.integers(0, len(KATEGORILER), n)],
+    })
+
+def denormalized(df: pd.DataFrame) -> pd.DataFrame:
+    # eski düzen: gönderi alanları ve görsel listesi her yorum satırına kopyalanıyordu
+    out = df.copy()
+    out["post_message"] = ("Belediyemiz tarafından yürütülen çalışmalar hakkında " + out["post_id"]).astype(object)
+    out["post_url"] = ("https://www.facebook.com/" + out["post_id"]).astype(object)
+    out["post_time"] = out["date"]
+    out["post_pics"] = [["https://graph.facebook.com/x/picture?type=large"]] * len(out)
+    return out
+
+def bytes_per_row(df: pd.DataFrame) -> float:
+    return df.memory_usage(deep=True).sum() / max(1, len(df))
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    base = synthetic(n)
+    rows = [
+        ("gönderi alanları satırda (object)", bytes_per_row(denormalized(base))),
+        ("posts/comments ayrık (object)", bytes_per_row(base)),
+        ("kategorik + Arrow string", bytes_per_row(compact_dtypes(base.copy()))),
+    ]
+    print(f"{n:,} yorum — satır başı bellek")
+    for name, b in rows:
+        print(f"  {name:<36} {b:8.1f} B/satır  ({b*n/2**20:8.1f} MiB)")
@@ -0,0 +1,139 @@
+# metrics.py
+# Hafif süre/sayı/bellek ölçümü: Graph API istekleri, akış hattı aşamaları, tokenizasyon ve
+# BERT ileri geçişleri, akış çizimi. Yenileme yavaşsa hangi adımın payı büyük, buradan görülür.
+#   SIKAYET_METRICS=1                 ölçümü açar (kapalıyken span() paylaşılan boş nesne döner)
+#   SIKAYET_METRICS_PROM=metrics.prom Prometheus metin dosyası (node_exporter textfile collector)
+#   SIKAYET_METRICS_JSON=metrics.jsonl her span için bir JSON satırı
+# Kullanım:
+#   with metrics.span("graph.request") as sp:
+#       data = ...; sp.items(len(data))
+import atexit
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List
+
+PROM_PATH = os.getenv("SIKAYET_METRICS_PROM", "")
+JSON_PATH = os.getenv("SIKAYET_METRICS_JSON", "")
+ENABLED = os.getenv("SIKAYET_METRICS", "") not in ("", "0") or bool(PROM_PATH or JSON_PATH)
+
+try:
+    import psutil
+    _PROC = psutil.Process()
+    def rss() -> int: return _PROC.memory_info().rss
+except ImportError:
+    def rss() -> int:
+        # Linux: /proc; diğerlerinde (psutil yoksa) 0
+        try:
+            with open("/proc/self/statm", "rb") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, AttributeError):
+            return 0
+
+_LOCK = threading.Lock()
+_STATS: Dict[str, List[float]] = {}   # ad -> [çağrı, toplam sn, en uzun sn, son sn, öğe, son rss, hata]
+_LOG = None
+
+class _NoSpan:
+    __slots__ = ()
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+    def items(self, n: int): pass
+
+_NOOP = _NoSpan()
+
+class _Span:
+    __slots__ = ("name", "n", "t0")
+    def __init__(self, name: str, n: int):
+        self.name = name; self.n = n; self.t0 = 0.0
+
+    def __enter__(self):
+        self.t0 = time.perf_counter(); return self
+
+    def __exit__(self, exc_type, *_):
+        record(self.name, time.perf_counter() - self.t0, self.n, error=exc_type is not None)
+        return False
+
+    def items(self, n: int):
+        self.n = int(n)
+
+def span(name: str, n: int = 0):
+    """Süre ölçen bağlam yöneticisi; kapalıyken tek paylaşılan boş nesne (ayırma yok)."""
+    return _Span(name, n) if ENABLED else _NOOP
+
+def timed(name: str):
+    """Fonksiyon süsleyici; kapalıyken fonksiyonu olduğu gibi döner (çağrı başı ek yük yok)."""
+    def deco(fn):
+        if not ENABLED: return fn
+        def wrap(*a, **k):
+            with _Span(name, 0): return fn(*a, **k)
+        wrap.__name__ = fn.__name__; wrap.__doc__ = fn.__doc__; wrap.__wrapped__ = fn
+        return wrap
+    return deco
+
+def record(name: str, seconds: float, n: int = 0, error: bool = False):
+    if not ENABLED: return
+    mem = rss()
+    with _LOCK:
+        st = _STATS.get(name)
+        if st is None: st = _STATS[name] = [0, 0.0, 0.0, 0.0, 0, 0, 0]
+        st[0] += 1; st[1] += seconds; st[2] = max(st[2], seconds); st[3] = seconds
+        st[4] += n; st[5] = mem; st[6] += int(error)
+        if JSON_PATH: _log({"ts": round(time.time(), 3), "span": name, "sec": round(seconds, 6),
+                            "n": n, "rss": mem, "error": error})
+
+def _log(row: Dict[str, Any]):
+    global _LOG
+    if _LOG is None:
+        d = os.path.dirname(JSON_PATH)
+        if d: os.makedirs(d, exist_ok=True)
+        _LOG = open(JSON_PATH, "a", encoding="utf-8")
+    _LOG.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+def snapshot() -> List[Dict[str, Any]]:
+    """Tanılama paneli için: span başına özet (toplam süreye göre azalan)."""
+    with _LOCK:
+        items = [(k, list(v)) for k, v in _STATS.items()]
+    rows = [{"span": k, "calls": int(c), "total_s": tot, "mean_ms": tot / c * 1000 if c else 0.0,
+             "max_ms": mx * 1000, "last_ms": last * 1000, "items": int(n),
+             "rss_mb": mem / 2**20, "errors": int(err)}
+            for k, (c, tot, mx, last, n, mem, err) in items]
+    return sorted(rows, key=lambda r: -r["total_s"])
+
+def reset():
+    with _LOCK: _STATS.clear()
+
+def prometheus_text() -> str:
+    def lbl(k: str) -> str: return k.replace("\\", "\\\\").replace('"', '\\"')
+    out = ["# HELP sikayet_span_seconds Span süreleri (toplam / adet)",
+           "# TYPE sikayet_span_seconds summary"]
+    rows = snapshot()
+    for r in rows:
+        out.append(f'sikayet_span_seconds_sum{{span="{lbl(r["span"])}"}} {r["total_s"]:.6f}')
+        out.append(f'sikayet_span_seconds_count{{span="{lbl(r["span"])}"}} {r["calls"]}')
+    out += ["# HELP sikayet_span_max_seconds En uzun span süresi", "# TYPE sikayet_span_max_seconds gauge"]
+    out += [f'sikayet_span_max_seconds{{span="{lbl(r["span"])}"}} {r["max_ms"]/1000:.6f}' for r in rows]
+    out += ["# HELP sikayet_span_items_total Span içinde işlenen öğe (yorum, gönderi, kart)",
+            "# TYPE sikayet_span_items_total counter"]
+    out += [f'sikayet_span_items_total{{span="{lbl(r["span"])}"}} {r["items"]}' for r in rows]
+    out += ["# HELP sikayet_span_errors_total Hata ile biten span", "# TYPE sikayet_span_errors_total counter"]
+    out += [f'sikayet_span_errors_total{{span="{lbl(r["span"])}"}} {r["errors"]}' for r in rows]
+    out += ["# HELP sikayet_process_rss_bytes Süreç bellek kullanımı", "# TYPE sikayet_process_rss_bytes gauge",
+            f"sikayet_process_rss_bytes {rss()}"]
+    return "\n".join(out) + "\n"
+
+def export():
+    """Prometheus dosyasını atomik yazar, JSON günlüğünü diske boşaltır (tur/çekme sonlarında çağrılır)."""
+    if not ENABLED: return
+    with _LOCK:
+        if _LOG is not None: _LOG.flush()
+    if PROM_PATH:
+        d = os.path.dirname(PROM_PATH)
+        if d: os.makedirs(d, exist_ok=True)
+        tmp = PROM_PATH + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(prometheus_text())
+        os.replace(tmp, PROM_PATH)
+
+if ENABLED: atexit.register(export)
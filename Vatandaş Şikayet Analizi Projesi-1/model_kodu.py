@@ -67,6 +67,8 @@ def analiz_et(texts: List[str]) -> Tuple[List[str], List[str]]:
 # "mah./mahallesi/mh.", "köyü/mezrası" kalıplarını da destekler.
 
 import re
+from functools import lru_cache
+from normalization import simplify
 try:
     from rapidfuzz import process, fuzz
     _RF = True
@@ -78,11 +80,17 @@ _IGNORE_TOKENS = {
     "mahcup", "mahkum", "mahalleli", "mahsul", "mahsus", "mahsuru"
 }
 
+# varyantları kapsayan regex kalıbı (bir kez derlenir)
+_MAH_OLUR = re.compile(r"([a-zçğıöşü0-9\-\']{2,}(?:\s+[a-zçğıöşü0-9\-\']{2,})*)\s+(mah(?:\.|allesi)?|mh\.?|köyü|mezrası)\b")
+
 def _norm(s: str) -> str:
-    s = s.lower()
-    s = re.sub(r"[^\wçğıöşü\-\' ]+", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+    # Türkçe küçük harf ('I' -> 'ı'); tire ve kesme işareti isimlerde kalır
+    return simplify(s, keep="-'")
+
+@lru_cache(maxsize=32)
+def _whitelist(names: tuple) -> tuple:
+    """Normalize isim -> listedeki yazılış; aynı liste her yorumda yeniden normalize edilmez."""
+    return tuple((_norm(w), w.strip()) for w in names if w and w.strip())
 
 def mahalle_bul_olur(text: str, whitelist: list[str]) -> str | None:
     """
@@ -102,37 +110,37 @@ def mahalle_bul_olur(text: str, whitelist: list[str]) -> str | None:
         if f" {bad} " in tlow:
             return None
 
-    # whitelist'i normalize et
-    wl = [_norm(w) for w in whitelist if w and w.strip()]
-    # varyantları kapsayan regex kalıbı
-    pat = re.compile(r"([a-zçğıöşü0-9\-\']{2,}(?:\s+[a-zçğıöşü0-9\-\']{2,})*)\s+(mah(?:\.|allesi)?|mh\.?|köyü|mezrası)\b")
+    # whitelist'i normalize et; dönen ad listedeki yazılıştır (filtre birebir eşleşsin)
+    pairs = _whitelist(tuple(whitelist))
+    wl = [w for w, _ in pairs]
+    display = dict(pairs)
 
     # 1) kalıp: "X mah(., mahallesi, mh.)" / "X köyü/mezrası"
-    m = pat.search(tlow)
+    m = _MAH_OLUR.search(tlow)
     if m:
         cand = _norm(m.group(1))
         # önce doğrudan whitelist kapsaması
         for w in wl:
             if f" {w} " in f" {cand} " or f" {cand} " in f" {w} ":
-                return " ".join(t.capitalize() for t in w.split())
+                return display[w]
         # fuzzy (yüksek eşik)
         if _RF:
             hit = process.extractOne(cand, wl, scorer=fuzz.token_set_ratio)
             if hit and hit[1] >= 92:
                 w = hit[0]
-                return " ".join(t.capitalize() for t in w.split())
+                return display[w]
 
     # 2) whitelist ismi metinde tam kelime olarak geçiyorsa
     for w in wl:
         if f" {w} " in tlow:
-            return " ".join(t.capitalize() for t in w.split())
+            return display[w]
 
     # 3) genel fuzzy (çok yüksek eşik; yanlış pozitifleri engeller)
     if _RF:
         hit = process.extractOne(tlow, wl, scorer=fuzz.token_set_ratio)
         if hit and hit[1] >= 94:
             w = hit[0]
-            return " ".join(t.capitalize() for t in w.split())
+            return display[w]
 
     return None
 # ====== /Olur whitelist tabanlı mahalle bulucu ======
@@ -0,0 +1,191 @@
+# model_registry.py
+# Yerel model kayıt defteri: her görev (sikayet / kategori) için sürümlü klasörler + tek manifest.
+#   <kök>/<görev>/v001/   HF model dosyaları + label_mapping.json + preprocess.json (train.save_model çıktısı)
+#   <kök>/manifest.json   {"<görev>": {"current": "v002", "versions": {"v001": {...}, "v002": {...}}}}
+# Sürüm kaydı: etiketler (label_mapping.json), ön işleme modu, metrikler, parmak izi (TextClassifier.version
+# ile aynı etiket) ve dosyaların sha256 özeti. Sürüm klasörleri kayıttan sonra değişmez; etkin sürüm
+# manifestte tek alan, yükseltme / geri alma tek atomik yazma. GUI ve collector manifesti yoklar, yeni
+# sürümü arka planda yükleyip ısıtır ve çalışan analizciye takar (analysis.ModelReloader).
+# Model tanımı (settings.COMPLAINT_MODEL, tenants.json): klasör yolu ya da "registry:<görev>[@sürüm]";
+# sürümsüz tanım etkin sürümü, defter boşsa settings'teki eski klasörü gösterir.
+# PyQt5 / torch içe aktarmaz.
+#   python model_registry.py list
+#   python model_registry.py register kategori ./models/berturk_kategori_modeli --metrics test_metrics.json
+#   python model_registry.py activate kategori v001      # geri alma da aynı komut
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from typing import Any, Dict, List, Optional
+
+from settings import MODEL_REGISTRY, COMPLAINT_MODEL_DIR, CATEGORY_MODEL_DIR
+
+PREFIX = "registry:"
+FALLBACK_DIRS = {"sikayet": COMPLAINT_MODEL_DIR, "kategori": CATEGORY_MODEL_DIR}   # defter boşken
+
+def model_fingerprint(model_dir: str) -> str:
+    """Model klasörü için kısa sürüm etiketi: '<klasör>@<config+ağırlık özeti>'."""
+    h = hashlib.sha1()
+    for fn in sorted(os.listdir(model_dir)):
+        fp = os.path.join(model_dir, fn)
+        if not os.path.isfile(fp): continue
+        if fn.endswith(".json"):
+            with open(fp, "rb") as f: h.update(f.read())
+        else:
+            h.update(f"{fn}:{os.path.getsize(fp)}".encode())
+    return f"{os.path.basename(os.path.normpath(model_dir))}@{h.hexdigest()[:8]}"
+
+def read_preprocess(model_dir: str) -> Optional[str]:
+    """train.py'nin model klasörüne yazdığı preprocess.json'daki mod (yoksa None)."""
+    fp = os.path.join(model_dir, "preprocess.json")
+    if not os.path.isfile(fp): return None
+    with open(fp, encoding="utf-8") as f:
+        return json.load(f).get("mode")
+
+def read_labels(model_dir: str) -> Dict[str, str]:
+    """id -> etiket: label_mapping.json (train.py / defterler), yoksa config.json'daki id2label."""
+    for fn in ("label_mapping.json", "config.json"):
+        fp = os.path.join(model_dir, fn)
+        if os.path.isfile(fp):
+            with open(fp, encoding="utf-8") as f:
+                m = json.load(f).get("id2label")
+            if m: return {str(k): v for k, v in m.items()}
+    return {}
+
+def content_hash(model_dir: str) -> str:
+    """Tüm dosyaların sha256 özeti (kayıttan sonra klasörün değişmediğini doğrulamak için)."""
+    h = hashlib.sha256()
+    for fn in sorted(os.listdir(model_dir)):
+        fp = os.path.join(model_dir, fn)
+        if not os.path.isfile(fp): continue
+        h.update(fn.encode("utf-8") + b"\0")
+        with open(fp, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""): h.update(block)
+    return h.hexdigest()
+
+class ModelRegistry:
+    def __init__(self, root: str = MODEL_REGISTRY):
+        self.root = root
+        self.manifest_path = os.path.join(root, "manifest.json")
+
+    # --- manifest ---
+    def manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                m = json.load(f)
+            return m if isinstance(m, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, m: Dict[str, Any]):
+        """collector.save_state gibi: geçici dosya + fsync + os.replace (okuyan yarım manifest görmez)."""
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(m, f, ensure_ascii=False, indent=1)
+            f.flush(); os.fsync(f.fileno())
+        os.replace(tmp, self.manifest_path)
+
+    def versions(self, task: str) -> Dict[str, Dict[str, Any]]:
+        return (self.manifest().get(task) or {}).get("versions") or {}
+
+    def current(self, task: str) -> Optional[str]:
+        return (self.manifest().get(task) or {}).get("current")
+
+    def path(self, task: str, version: Optional[str] = None) -> Optional[str]:
+        """Sürüm klasörü (version None: etkin sürüm); kayıtlı değilse None."""
+        version = version or self.current(task)
+        if not version or version not in self.versions(task): return None
+        return os.path.join(self.root, task, version)
+
+    def resolve(self, spec: str) -> str:
+        """Model tanımı -> yüklenecek klasör."""
+        if not spec.startswith(PREFIX): return spec
+        task, _, version = spec[len(PREFIX):].partition("@")
+        p = self.path(task, version or None)
+        if p: return p
+        if version: raise RuntimeError(f"Kayıt defterinde böyle bir sürüm yok: {task}@{version} ({self.root})")
+        if task not in FALLBACK_DIRS: raise RuntimeError(f"Kayıt defterinde '{task}' görevi için sürüm yok ({self.root})")
+        return FALLBACK_DIRS[task]
+
+    # --- yazma ---
+    def register(self, task: str, src: str, metrics: Optional[Dict[str, float]] = None,
+                 note: str = "", activate: bool = True) -> str:
+        """src klasörünü yeni sürüm olarak kopyalar; activate=True ise etkin sürüm olur. Sürüm adını döner."""
+        if not re.fullmatch(r"[a-z0-9_]+", task): raise RuntimeError(f"Geçersiz görev adı: {task}")
+        if not os.path.isfile(os.path.join(src, "config.json")):
+            raise RuntimeError(f"Model klasörü değil (config.json yok): {src}")
+        nums = [int(v[1:]) for v in self.versions(task) if re.fullmatch(r"v\d+", v)]
+        version = f"v{max(nums, default=0) + 1:03d}"
+        dest = os.path.join(self.root, task, version)
+        tmp = dest + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        shutil.copytree(src, tmp)   # yarım kopya sürüm klasörü olarak görünmesin
+        os.replace(tmp, dest)
+        entry = {"created": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "source": os.path.abspath(src),
+                 "fingerprint": model_fingerprint(dest), "sha256": content_hash(dest),
+                 "preprocess": read_preprocess(dest), "labels": read_labels(dest),
+                 "metrics": metrics or {}, "note": note}
+        m = self.manifest()
+        t = m.setdefault(task, {"current": None, "versions": {}})
+        t["versions"][version] = entry
+        if activate or not t.get("current"): t["current"] = version
+        self._save(m)
+        return version
+
+    def activate(self, task: str, version: str):
+        """Etkin sürümü değiştirir (yükseltme ya da geri alma); çalışan uygulamalar yoklamada alır."""
+        m = self.manifest()
+        if version not in ((m.get(task) or {}).get("versions") or {}):
+            raise RuntimeError(f"Kayıt defterinde böyle bir sürüm yok: {task}@{version}")
+        m[task]["current"] = version
+        self._save(m)
+
+    def verify(self, task: str, version: str) -> bool:
+        p = self.path(task, version)
+        return p is not None and content_hash(p) == self.versions(task)[version].get("sha256")
+
+def resolve_model(spec: str) -> str:
+    """Varsayılan defterle model tanımı -> klasör (tek seferlik işler: batch_analyze)."""
+    return ModelRegistry().resolve(spec)
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description="Yerel model kayıt defteri (sürümlü model klasörleri + manifest).")
+    ap.add_argument("--root", default=MODEL_REGISTRY, help="Defter klasörü (varsayılan: settings.MODEL_REGISTRY)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list", help="Görevler, sürümler ve etkin sürüm")
+    r = sub.add_parser("register", help="Model klasörünü yeni sürüm olarak ekle")
+    r.add_argument("task"); r.add_argument("src")
+    r.add_argument("--metrics", help="Metrikler: JSON dosyası")
+    r.add_argument("--note", default="")
+    r.add_argument("--no-activate", action="store_true", help="Eklenen sürümü etkinleştirme")
+    a_ = sub.add_parser("activate", help="Etkin sürümü değiştir (geri alma dahil)")
+    a_.add_argument("task"); a_.add_argument("version")
+    v = sub.add_parser("verify", help="Sürüm klasörünün özeti manifestle aynı mı")
+    v.add_argument("task"); v.add_argument("version")
+    a = ap.parse_args(argv)
+    reg = ModelRegistry(a.root)
+    if a.cmd == "list":
+        for task, t in sorted(reg.manifest().items()):
+            for ver, e in sorted((t.get("versions") or {}).items()):
+                mark = "*" if ver == t.get("current") else " "
+                met = " ".join(f"{k}={v:.4f}" for k, v in (e.get("metrics") or {}).items() if isinstance(v, (int, float)))
+                print(f"{mark} {task}@{ver}  {e.get('fingerprint', '')}  {len(e.get('labels') or {})} etiket  {met}")
+    elif a.cmd == "register":
+        metrics = None
+        if a.metrics:
+            with open(a.metrics, encoding="utf-8") as f: metrics = json.load(f)
+        ver = reg.register(a.task, a.src, metrics, a.note, not a.no_activate)
+        print(f"[registry] {a.task}@{ver} kaydedildi" + ("" if a.no_activate else " ve etkinleştirildi"))
+    elif a.cmd == "activate":
+        reg.activate(a.task, a.version); print(f"[registry] etkin sürüm: {a.task}@{a.version}")
+    elif a.cmd == "verify":
+        ok = reg.verify(a.task, a.version)
+        print(f"[registry] {a.task}@{a.version}: {'tamam' if ok else 'ÖZET UYUŞMUYOR'}")
+        raise SystemExit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,17 @@
 # models.py
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import torch
-from typing import List
+import threading
+from typing import List, Optional, Tuple
+import numpy as np
+
+import metrics
+import profiling
+from model_registry import model_fingerprint, read_preprocess   # torch'suz modülde: defter de kullanır
+from normalization import MODES, preprocess_batch
 
 class TextClassifier:
-    def __init__(self, model_dir: str, max_len: int = 160):
+    def __init__(self, model_dir: str, max_len: int = 160, preprocess: Optional[str] = None):
         # models.py -> TextClassifier.__init__ içinde
         self.tokenizer = AutoTokenizer.from_pretrained(model_dir, local_files_only=True)
         self.model     = AutoModelForSequenceClassification.from_pretrained(model_dir, local_files_only=True)
@@ -12,12 +19,45 @@ class TextClassifier:
         self.model.eval()
         self.max_len = max_len
         self.id2label = self.model.config.id2label
+        # girdi ön işleme eğitimdekiyle aynı olmalı: <model>/preprocess.json > parametre > ham metin
+        self.preprocess = read_preprocess(model_dir) or preprocess or "raw"
+        if self.preprocess not in MODES:
+            raise RuntimeError(f"Bilinmeyen ön işleme modu: {self.preprocess} ({model_dir})")
+        self.version = model_fingerprint(model_dir) + ("" if self.preprocess == "raw" else f"+{self.preprocess}")
+        self.dim = self.model.config.hidden_size
+        # tek örnek birden çok sayfa/iş parçacığına hizmet eder; hızlı tokenizer eşzamanlı çağrıyı kaldırmaz
+        self._lock = threading.Lock()
+
+    def predict(self, texts: List[str], batch_size: int = 64) -> List[str]:
+        return self._run(texts, batch_size, False)[0]
+
+    def predict_with_embeddings(self, texts: List[str], batch_size: int = 64) -> Tuple[List[str], np.ndarray]:
+        """Etiketler + aynı ileri geçişin son katmanından ortalama havuzlanmış, birim uzunlukta float16 gömmeler."""
+        return self._run(texts, batch_size, True)
 
-    def predict(self, texts: List[str]) -> List[str]:
+    def _run(self, texts: List[str], batch_size: int, embed: bool):
+        # küçük parçalar: bellek ve gecikme metin sayısıyla değil batch_size ile sınırlı
         if isinstance(texts, str): texts = [texts]
-        inputs = self.tokenizer(texts, padding=True, truncation=True,
-                                max_length=self.max_len, return_tensors="pt")
-        with torch.no_grad():
-            logits = self.model(**inputs).logits
-            preds = torch.argmax(logits, dim=-1).cpu().numpy().tolist()
-        return [self.id2label[int(p)] for p in preds]
+        if self.preprocess != "raw":
+            with metrics.span("predict.preprocess", len(texts)):
+                texts = preprocess_batch(texts, self.preprocess)
+        preds: List[int] = []
+        embs: List[np.ndarray] = []
+        with profiling.model_pass(self.version):
+            for i in range(0, len(texts), batch_size):
+                batch = texts[i:i+batch_size]
+                with self._lock, torch.no_grad():
+                    with metrics.span("predict.tokenize", len(batch)):
+                        inputs = self.tokenizer(batch, padding=True, truncation=True,
+                                                max_length=self.max_len, return_tensors="pt")
+                    with metrics.span("predict.forward", len(batch)):
+                        out = self.model(**inputs, output_hidden_states=embed)
+                    preds.extend(torch.argmax(out.logits, dim=-1).cpu().numpy().tolist())
+                    if embed:
+                        mask = inputs["attention_mask"].unsqueeze(-1).to(out.hidden_states[-1].dtype)
+                        pooled = (out.hidden_states[-1] * mask).sum(1) / mask.sum(1).clamp(min=1)
+                        pooled = torch.nn.functional.normalize(pooled, dim=-1)
+                        embs.append(pooled.cpu().numpy().astype(np.float16))
+        labels = [self.id2label[int(p)] for p in preds]
+        if not embed: return labels, None
+        return labels, (np.concatenate(embs) if embs else np.zeros((0, self.dim), dtype=np.float16))
@@ -0,0 +1,184 @@
+# near_dup.py
+# Kopyala-yapıştır / küçük değişiklikli toplu yorumlar ("X mahallesinde su yok!!" x200) için
+# yakın tekrar kümeleme: normalize metnin karakter SHINGLE-gramları -> MinHash imzası -> LSH bantları.
+# Akış hattında delta'dan sonra çalışır; her yeni yoruma bir cluster_id (kümenin ilk yorumunun
+# comment_id'si) verir. Maliyet yorum sayısıyla doğrusal: imzalar numpy ile toplu hesaplanır, aday
+# arama bant anahtarı eşleşmesidir (sıralı dizi + son eklenenler için sözlük).
+# Aday, kümenin ilk yorumuyla (kök) tahmini Jaccard >= THRESHOLD ise kümeye girer; köke göre
+# karşılaştırma zincirlenmeyi (A~B~C ama A≁C) önler. Kökler imzalarıyla depoda saklanır
+# (data_store.dup_roots) ve sonraki turlar kümeleri aynı id ile sürdürür.
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from normalization import simplify_batch
+
+SHINGLE = 5        # karakter
+NUM_PERM = 64      # imza uzunluğu
+BANDS = 16         # 16 bant x 4 satır: tahmini Jaccard ~0.5 üstü yüksek olasılıkla aday olur
+THRESHOLD = 0.7    # kümeye katılmak için kökle en az tahmini Jaccard
+BATCH_SHINGLES = 100_000   # imza hesabında ara matris boyu (NUM_PERM x shingle)
+
+_rng = np.random.default_rng(20240617)   # sabit tohum: imzalar süreçler ve oturumlar arasında aynı
+# a*h + b (mod 2^32), a tek: 32 bitte permütasyon; (NUM_PERM, 1) biçiminde çünkü ara matris
+# perm x shingle tutulur (reduceat bitişik satırlarda ~5 kat hızlı)
+_A = (_rng.integers(0, 2**32, (NUM_PERM, 1), dtype=np.uint64) | np.uint64(1)).astype(np.uint32)
+_B = _rng.integers(0, 2**32, (NUM_PERM, 1), dtype=np.uint64).astype(np.uint32)
+_ROW_MUL = _rng.integers(1, 2**63, NUM_PERM // BANDS, dtype=np.uint64) | np.uint64(1)
+_BAND_SALT = _rng.integers(0, 2**63, BANDS, dtype=np.uint64)
+_POW = np.array([31 ** (SHINGLE - 1 - j) for j in range(SHINGLE)], dtype=np.uint64)
+
+def _mix(h: np.ndarray) -> np.ndarray:
+    """64 bit karıştırma (splitmix64 sonu); taşma bilerek sarmalanır."""
+    h = h ^ (h >> np.uint64(30)); h = h * np.uint64(0xBF58476D1CE4E5B9)
+    h = h ^ (h >> np.uint64(27)); h = h * np.uint64(0x94D049BB133111EB)
+    return h ^ (h >> np.uint64(31))
+
+def _signature_batch(texts: List[str]) -> np.ndarray:
+    """Boş olmayan normalize metinler -> (n, NUM_PERM) uint32 MinHash."""
+    padded = [t.ljust(SHINGLE) for t in texts]
+    lens = np.fromiter((len(t) for t in padded), dtype=np.int64, count=len(padded))
+    cps = np.frombuffer("".join(padded).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    ends = np.cumsum(lens); starts = ends - lens
+    # her metnin pencere başlangıçları: [start, end - SHINGLE]
+    counts = lens - SHINGLE + 1
+    first = np.repeat(starts, counts)
+    pos = first + (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts))
+    h = np.zeros(len(pos), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for j in range(SHINGLE): h += cps[pos + j] * _POW[j]
+        h = (_mix(h) >> np.uint64(32)).astype(np.uint32)
+        vals = _A * h[None, :] + _B
+    return np.minimum.reduceat(vals, np.cumsum(counts) - counts, axis=1).T
+
+def signatures(texts: Sequence[str], normalized: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """(imzalar (n, NUM_PERM) uint32, boş maskesi). Normalize metni boş olanların imzası sıfırdır."""
+    norm = list(texts) if normalized else simplify_batch(list(texts))
+    codes, uniq = pd.factorize(pd.Series(norm, dtype=object))   # aynı metnin imzası bir kez
+    usig = np.zeros((len(uniq), NUM_PERM), dtype=np.uint32)
+    todo = [k for k, t in enumerate(uniq) if t]
+    i = 0
+    while i < len(todo):   # ara matris BATCH_SHINGLES sütunu aşmasın
+        j = i; total = 0
+        while j < len(todo) and (j == i or total + len(uniq[todo[j]]) <= BATCH_SHINGLES):
+            total += len(uniq[todo[j]]); j += 1
+        usig[todo[i:j]] = _signature_batch([uniq[k] for k in todo[i:j]])
+        i = j
+    empty = np.fromiter((not t for t in uniq), dtype=bool, count=len(uniq))
+    return usig[codes], empty[codes]
+
+def band_keys(sig: np.ndarray) -> np.ndarray:
+    """(n, NUM_PERM) -> (n, BANDS) uint64; bant numarası anahtara karışır (tek sıralı dizi yeterli)."""
+    r = NUM_PERM // BANDS
+    with np.errstate(over="ignore"):
+        rows = sig.reshape(len(sig), BANDS, r).astype(np.uint64) * _ROW_MUL[None, None, :]
+        return _mix(rows.sum(axis=2) ^ _BAND_SALT[None, :])
+
+class NearDupIndex:
+    """
+    Kök imzaları + bant anahtarları. assign() akış sırasıyla çağrılır (tek iş parçacığı);
+    take_new_roots() başka bir aşamadan (depoya yazma) çağrılabilir.
+    """
+    MERGE_MIN = 20_000   # son eklenen kök sayısı bunu (ve ana dizinin %25'ini) aşınca sıralı diziye katılır
+
+    def __init__(self, threshold: float = THRESHOLD):
+        self.threshold = threshold
+        self.root_ids: List[str] = []
+        self._sigs = np.zeros((0, NUM_PERM), dtype=np.uint32)
+        self._n = 0
+        self._keys = np.zeros(0, dtype=np.uint64)      # sıralı bant anahtarları (ana dizi)
+        self._owner = np.zeros(0, dtype=np.int64)      # anahtarın kök indeksi
+        self._recent: Dict[int, int] = {}              # ana diziye henüz katılmamış anahtarlar
+        self._recent_roots = 0
+        self._lock = threading.Lock()
+        self._new: List[Tuple[str, bytes]] = []        # depoya yazılacak yeni kökler
+
+    def __len__(self): return self._n
+
+    @classmethod
+    def from_store(cls, store) -> "NearDupIndex":
+        idx = cls()
+        ids, sigs = store.load_dup_roots()
+        if ids: idx._add_roots(ids, sigs)
+        return idx
+
+    def _reserve(self, extra: int):
+        need = self._n + extra
+        if need > len(self._sigs):
+            grown = np.zeros((max(need, 2 * len(self._sigs), 1024), NUM_PERM), dtype=np.uint32)
+            grown[:self._n] = self._sigs[:self._n]; self._sigs = grown
+
+    def _add_roots(self, ids: List[str], sigs: np.ndarray):
+        """Depodan yükleme: kökler doğrudan sıralı diziye."""
+        self._reserve(len(ids))
+        need = self._n + len(ids)
+        self._sigs[self._n:need] = sigs
+        self._keys = np.concatenate([self._keys, band_keys(sigs).ravel()])
+        self._owner = np.concatenate([self._owner, np.repeat(np.arange(self._n, need), BANDS)])
+        o = np.argsort(self._keys, kind="stable"); self._keys, self._owner = self._keys[o], self._owner[o]
+        self.root_ids.extend(ids); self._n = need
+
+    def _add_recent(self, cid: str, sig: np.ndarray, keys: List[int]):
+        """assign içinde yeni kök (kapasite _reserve ile önceden ayrılmış)."""
+        r = self._n
+        self._sigs[r] = sig
+        for key in keys: self._recent.setdefault(key, r)
+        self.root_ids.append(cid); self._n += 1; self._recent_roots += 1
+
+    def _merge(self):
+        if not self._recent: return
+        keys = np.fromiter(self._recent.keys(), dtype=np.uint64, count=len(self._recent))
+        owner = np.fromiter(self._recent.values(), dtype=np.int64, count=len(self._recent))
+        keys = np.concatenate([self._keys, keys]); owner = np.concatenate([self._owner, owner])
+        o = np.argsort(keys, kind="stable")
+        self._keys, self._owner = keys[o], owner[o]
+        self._recent = {}; self._recent_roots = 0
+
+    def _main_hits(self, keys: np.ndarray) -> np.ndarray:
+        """Ana dizide eşleşen kök (yoksa -1), keys ile aynı biçimde."""
+        if not len(self._keys): return np.full(keys.shape, -1, dtype=np.int64)
+        flat = keys.ravel()
+        pos = np.minimum(np.searchsorted(self._keys, flat), len(self._keys) - 1)
+        hit = np.where(self._keys[pos] == flat, self._owner[pos], -1)
+        return hit.reshape(keys.shape)
+
+    def assign(self, ids: Sequence[str], texts: Sequence[str]) -> List[str]:
+        """Her yorum için cluster_id; benzer kök yoksa yorum kendi kümesinin kökü olur."""
+        ids = [str(c) for c in ids]
+        sig, empty = signatures(texts)
+        keys = band_keys(sig)
+        # ana dizideki kökler toplu: her yorumun BANDS adayıyla benzerliği tek matris işlemi
+        main = self._main_hits(keys)
+        best = np.full(len(ids), -1, dtype=np.int64)
+        if len(self._keys) and len(ids):
+            sims = (self._sigs[np.maximum(main, 0)] == sig[:, None, :]).sum(axis=2) / NUM_PERM
+            sims[main < 0] = -1
+            rows = np.arange(len(ids)); pick = sims.argmax(axis=1)
+            best = np.where(sims[rows, pick] >= self.threshold, main[rows, pick], -1)
+        self._reserve(len(ids))
+        klist = keys.tolist()
+        out: List[str] = []
+        for i, cid in enumerate(ids):
+            if empty[i]:   # metinsiz (çıkartma, görsel) yorumlar kümelenmez
+                out.append(cid); continue
+            if best[i] >= 0:
+                out.append(self.root_ids[best[i]]); continue
+            # bu tur ve son turlarda açılan kökler (sözlük); yoksa yorum yeni kök
+            b, b_sim = -1, self.threshold
+            for c in {r for r in map(self._recent.get, klist[i]) if r is not None}:
+                s = np.count_nonzero(self._sigs[c] == sig[i]) / NUM_PERM
+                if s >= b_sim: b, b_sim = c, s
+            if b >= 0:
+                out.append(self.root_ids[b]); continue
+            self._add_recent(cid, sig[i], klist[i])
+            with self._lock: self._new.append((cid, sig[i].tobytes()))
+            out.append(cid)
+        if self._recent_roots > max(self.MERGE_MIN, len(self.root_ids) // 4): self._merge()
+        return out
+
+    def take_new_roots(self) -> List[Tuple[str, bytes]]:
+        with self._lock:
+            new, self._new = self._new, []
+        return new
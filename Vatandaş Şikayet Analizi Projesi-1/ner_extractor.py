@@ -1,15 +1,12 @@
 # ner_extractor.py
 from __future__ import annotations
 from typing import Dict, Tuple, Optional, List
-import re
 from rapidfuzz import process, fuzz
+from normalization import simplify
 
 def _norm(s: str) -> str:
-    s = s.lower()
-    # sadeleştirme
-    s = re.sub(r"[\.\,\!\?\:\;\'\"\(\)\[\]\{\}\-_/]", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+    # sadeleştirme: Türkçe küçük harf, noktalama -> boşluk
+    return simplify(s)
 
 def _build_variants(name: str) -> List[str]:
     # "yeşil mahalle" -> ["yeşil mahalle", "yeşil mahallesi", "yeşil mh", "yeşil mh.", "yeşil mah."]
@@ -0,0 +1,105 @@
+# normalization.py
+# Eğitim (temizleme.ipynb) ve çalışma zamanı (models, rules, mahalle/NER eşleştirme, arama)
+# için ortak metin normalizasyonu. Kalıplar bir kez derlenir; toplu API tekrar eden metinleri
+# bir kez işler (yorumlarda aynı metin çok tekrar eder) ve girdi tipini korur.
+#   clean()     temizleme.ipynb'deki temizle(): URL/@/#/rakam/noktalama silinir, tek boşluk
+#   simplify()  eşleştirme için: noktalama -> boşluk (keep ile korunacak karakterler), tek boşluk
+#   tr_lower()  Türkçe küçük harf: 'I' -> 'ı', 'İ' -> 'i' (str.lower() 'i' ve 'i̇' üretir)
+# python normalization.py: clean() ile defterdeki sıralı temizle()'nin uç örneklerde aynı olduğunu doğrular.
+import re
+import sys
+import string
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List
+
+import numpy as np
+import pandas as pd
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# NLTK 'turkish' durak kelime listesi (nltk kurulu olmadan da aynı sonuç)
+STOPWORDS_TR: FrozenSet[str] = frozenset("""
+acaba ama aslında az bazı belki biri birkaç birşey biz bu çok çünkü da daha de defa diye eğer en
+gibi hem hep hepsi her hiç için ile ise kez ki kim mı mu mü nasıl ne neden nerde nerede nereye
+niçin niye o sanki şey siz şu tüm ve veya ya yani
+""".split())
+
+# temizle()'deki sıra: önce URL'ler (tek geçişte '@http...' / '#http...' URL'nin başını yerdi),
+# sonra @/#/rakam/noktalama tek geçişte (bunlar birbirinden bağımsız, sıra sonucu değiştirmez)
+_URL = re.compile(r"http\S+")
+_CLEAN = re.compile(r"@\w+|#\w+|\d+|[" + re.escape(string.punctuation) + "]")
+_SIMPLIFY: Dict[str, "re.Pattern"] = {}
+_TR_UPPER = str.maketrans({"I": "ı", "İ": "i"})
+
+MODES = ("raw", "clean", "clean+stop")   # model girdisi ön işleme modları (models.TextClassifier)
+
+def tr_lower(s: str) -> str:
+    return s.translate(_TR_UPPER).lower()
+
+def clean(text: Any, stopwords: bool = False) -> str:
+    """temizle() ile aynı çıktı (Türkçe küçük harf hariç); stopwords=True durak kelimeleri de atar."""
+    words = _CLEAN.sub("", _URL.sub("", tr_lower(str(text)))).split()
+    if stopwords: words = [w for w in words if w not in STOPWORDS_TR]
+    return " ".join(words)
+
+def simplify(text: Any, keep: str = "") -> str:
+    """Harf/rakam/boşluk ve keep dışındaki karakterler boşluk olur; boşluklar teklenir."""
+    pat = _SIMPLIFY.get(keep)
+    if pat is None:
+        pat = _SIMPLIFY[keep] = re.compile(r"[^\w\s" + re.escape(keep) + "]+")
+    return " ".join(pat.sub(" ", tr_lower(str(text))).split())
+
+def _map_unique(fn: Callable[[str], str], values) -> Any:
+    """fn'i sadece tekrarsız değerlere uygular; Series / Arrow dizisi / liste tipini korur."""
+    arrow = pa is not None and isinstance(values, (pa.Array, pa.ChunkedArray))
+    if arrow: seq = values.to_pandas()
+    elif isinstance(values, pd.Series): seq = values
+    else: seq = pd.Series(values if isinstance(values, np.ndarray) else list(values), dtype=object)
+    codes, uniq = pd.factorize(seq, use_na_sentinel=True)
+    mapped = np.array([fn(u) for u in uniq] + [""], dtype=object)   # -1 (boş değer) -> ""
+    out = mapped[codes]
+    if arrow: return pa.array(out, type=pa.string())
+    if isinstance(values, pd.Series):
+        dtype = values.dtype if pd.api.types.is_string_dtype(values.dtype) else object
+        return pd.Series(out, index=values.index, name=values.name, dtype=dtype)
+    return out.tolist()
+
+def clean_batch(values, stopwords: bool = False):
+    return _map_unique(lambda t: clean(t, stopwords), values)
+
+def simplify_batch(values, keep: str = ""):
+    return _map_unique(lambda t: simplify(t, keep), values)
+
+def preprocess_batch(texts: Iterable[str], mode: str = "raw") -> List[str]:
+    """Model girdisi: eğitim verisi hangi işlemden geçtiyse tahminde de aynısı."""
+    if mode == "raw": return list(texts)
+    if mode not in MODES: raise RuntimeError(f"Bilinmeyen ön işleme modu: {mode} ({', '.join(MODES)})")
+    return clean_batch(list(texts), stopwords=mode == "clean+stop")
+
+# --- temizle() ile eşlik denetimi ---
+PARITY_SAMPLES = [
+    "bak @https://x.com/a yorum", "x#http://y.com z", "5@http://x.co/q?a=1 son", "@ali #etiket 2024 yılı!",
+    "Yol bozuk!!! http://a.b/c?d=1&e=2 #olur @belediye", "#@a @#b", "h1ttp://x", "  Çöp   ALINMIYOR... ",
+]
+
+def _temizle(text: Any) -> str:
+    """temizleme.ipynb'deki temizle() (küçük harf tr_lower ile): altı sıralı re.sub."""
+    text = tr_lower(str(text))
+    text = re.sub(r"http\S+", "", text)
+    text = re.sub(r"@\w+", "", text)
+    text = re.sub(r"#\w+", "", text)
+    text = re.sub(r"\d+", "", text)
+    text = re.sub(rf"[{re.escape(string.punctuation)}]", "", text)
+    text = re.sub(r"\s+", " ", text)
+    return text.strip()
+
+def parity(samples: Iterable[str] = PARITY_SAMPLES) -> List[str]:
+    """clean() ile temizle()'nin ayrıldığı örnekler (boş liste: eşlik tamam)."""
+    return [t for t in samples if clean(t) != _temizle(t)]
+
+if __name__ == "__main__":
+    bad = parity()
+    for t in bad: print(f"[normalization] ayrışma: {t!r}: clean={clean(t)!r} temizle={_temizle(t)!r}")
+    print(f"[normalization] temizle() eşliği: {len(PARITY_SAMPLES) - len(bad)}/{len(PARITY_SAMPLES)}")
+    sys.exit(1 if bad else 0)
@@ -0,0 +1,112 @@
+# pipeline.py
+# Aşamalı (streaming) işleme: kaynak -> aşama 1 -> ... -> aşama n -> tüketici.
+# Her aşama kendi iş parçacığında çalışır ve aşamalar arasında sınırlı kuyruk vardır:
+# - aşamalar üst üste biner (gönderi 2 çekilirken gönderi 1 sınıflandırılır)
+# - hızlı bir aşama yavaşın önüne en fazla `maxsize` parça yığabilir; bellek toplam veri
+#   boyundan bağımsız kalır
+# Aşama fonksiyonu bir parça alır, bir parça döner; None dönerse parça düşürülür.
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import metrics
+
+_END = object()
+
+def growing_batches(items: Iterable, first: int = 1, limit: int = 32) -> Iterator[list]:
+    """
+    Parçaları giderek büyüyen gruplar halinde verir (1, 2, 4, ... limit): ilk sonuç hemen
+    görünür, sonrasında parça başı sabit maliyetler (DataFrame kurma, birleştirme) azalır.
+    """
+    batch, size = [], max(1, first)
+    for x in items:
+        batch.append(x)
+        if len(batch) >= size:
+            yield batch
+            batch, size = [], min(limit, size * 2)
+    if batch: yield batch
+
+class _Failed:
+    def __init__(self, stage: str, exc: BaseException):
+        self.stage = stage; self.exc = exc
+
+class Pipeline:
+    def __init__(self, source: Iterable, stages: List[Tuple[str, Callable[[Any], Any]]], maxsize: int = 4):
+        self.source = source
+        self.stages = stages
+        self.maxsize = maxsize
+        self.failed_stage: Optional[str] = None
+        self.stats: Dict[str, List[float]] = {}   # aşama -> [parça sayısı, toplam süre sn]
+        self._stop = threading.Event()
+
+    def stop(self):
+        """Tüm aşamaları durdurur (kuyruktaki parçalar bırakılır)."""
+        self._stop.set()
+
+    def _put(self, q: "queue.Queue", x) -> bool:
+        while not self._stop.is_set():
+            try:
+                q.put(x, timeout=0.1); return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: "queue.Queue"):
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _run_source(self, out: "queue.Queue"):
+        try:
+            t = time.perf_counter()
+            for item in self.source:
+                self._tick("source", t)
+                if not self._put(out, item): return
+                t = time.perf_counter()
+        except BaseException as e:
+            self._put(out, _Failed("source", e)); return
+        self._put(out, _END)
+
+    def _run_stage(self, name: str, fn: Callable, inp: "queue.Queue", out: "queue.Queue"):
+        while True:
+            item = self._get(inp)
+            if item is _END or isinstance(item, _Failed):
+                self._put(out, item); return
+            try:
+                t = time.perf_counter()
+                res = fn(item)
+                self._tick(name, t)
+            except BaseException as e:
+                self._put(out, _Failed(name, e)); return
+            if res is not None and not self._put(out, res): return
+
+    def _tick(self, name: str, t0: float):
+        dt = time.perf_counter() - t0
+        st = self.stats.setdefault(name, [0, 0.0])
+        st[0] += 1; st[1] += dt
+        metrics.record(f"pipeline.{name}", dt)
+
+    def __iter__(self) -> Iterator:
+        qs = [queue.Queue(maxsize=self.maxsize) for _ in range(len(self.stages) + 1)]
+        threads = [threading.Thread(target=self._run_source, args=(qs[0],), daemon=True)]
+        for i, (name, fn) in enumerate(self.stages):
+            threads.append(threading.Thread(target=self._run_stage, args=(name, fn, qs[i], qs[i+1]), daemon=True))
+        for t in threads: t.start()
+        try:
+            while True:
+                item = self._get(qs[-1])
+                if item is _END: break
+                if isinstance(item, _Failed):
+                    self.failed_stage = item.stage
+                    raise item.exc
+                yield item
+        finally:
+            self.stop()
+            for t in threads: t.join(timeout=1.0)
+
+    def report(self) -> str:
+        return " | ".join(f"{k}: {int(n)} parça {s:.2f} sn" for k, (n, s) in self.stats.items())
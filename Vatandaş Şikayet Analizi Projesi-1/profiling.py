@@ -0,0 +1,224 @@
+# profiling.py
+# İsteğe bağlı profil modu: bir "Facebook'tan çek" turunun tamamını profiller.
+#   SIKAYET_PROFILE=1  ya da  python main.py --profile
+#   SIKAYET_PROFILE_DIR=./data/profiles   (her tur için <zaman>/ klasörü)
+# Üretilenler:
+#   cprofile.prof      tüm iş parçacıklarının birleşik cProfile çıktısı (snakeviz / pstats)
+#   populate.folded    PostFeed çizimi sırasında örneklenen Python yığınları
+#                      (katlanmış biçim: flamegraph.pl, speedscope, inferno)
+#   workers.folded     Python 3.12+: iş parçacıklarının (attach çağıranlar) örneklenen yığınları
+#   torch_ops.txt      model geçişlerinin torch.profiler operatör tablosu (+ torch_<n>.json Chrome izi)
+#   summary.txt        en çok süre alan fonksiyonlar
+# Python 3.12+ cProfile'ı sys.monitoring üzerine kurar ve aynı anda tek profilleyiciye izin verir:
+# iş parçacığı başına cProfile yerine oturumu açan iş parçacığında tek cProfile, diğer tüm iş parçacıkları
+# yığın örneklemesiyle izlenir.
+# Kapalıyken session() None döner, sample() / model_pass() paylaşılan boş bağlamdır.
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional
+
+from settings import DATA_DIR
+
+ENABLED = os.getenv("SIKAYET_PROFILE", "") not in ("", "0")
+OUT_DIR = os.getenv("SIKAYET_PROFILE_DIR", os.path.join(DATA_DIR, "profiles"))
+SAMPLE_INTERVAL = 0.001   # yığın örnekleme aralığı (sn)
+TOP_N = 30
+PER_THREAD = sys.version_info < (3, 12)   # iş parçacığı başına cProfile (3.12+: tek profilleyici)
+
+_NULL = nullcontext()
+_CURRENT: Optional["ProfileSession"] = None
+
+def enable():
+    """CLI bayrağı (--profile) için: ortam değişkeni gibi profil modunu açar."""
+    global ENABLED
+    ENABLED = True
+
+def _frame_name(f) -> str:
+    co = f.f_code
+    return f"{co.co_name} ({os.path.basename(co.co_filename)}:{co.co_firstlineno})"
+
+class StackSampler:
+    """
+    Hedef iş parçacığının yığınını sys._current_frames() ile düzenli örnekler. Sadece
+    active() bağlamı açıkken kayıt yapar; sonuç katlanmış yığın sayımlarıdır.
+    follow_all açıkken diğer tüm iş parçacıkları sürekli örneklenir (worker_stacks, kök: iş parçacığı adı;
+    follow() ile threading dışı iş parçacıklarına ad verilir).
+    """
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id; self.interval = interval
+        self.stacks: Counter = Counter()
+        self.worker_stacks: Counter = Counter()
+        self._follow: Dict[int, str] = {}
+        self.follow_all = False
+        self._depth = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self): self._thread.start()
+
+    def stop(self):
+        self._stop.set(); self._thread.join(timeout=1.0)
+
+    def follow(self, thread_id: int, name: str):
+        self._follow[thread_id] = name
+
+    @contextmanager
+    def active(self):
+        self._depth += 1
+        try: yield
+        finally: self._depth -= 1
+
+    @staticmethod
+    def _stack(f) -> List[str]:
+        names = []
+        while f is not None:
+            names.append(_frame_name(f)); f = f.f_back
+        return names[::-1]
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if not (self._depth or self.follow_all): continue
+            frames = sys._current_frames()
+            if self._depth:
+                names = self._stack(frames.get(self.thread_id))
+                if names: self.stacks[";".join(names)] += 1
+            if not self.follow_all: continue
+            known = {t.ident: t.name for t in threading.enumerate()}
+            for tid, f in frames.items():
+                if tid in (self.thread_id, self._thread.ident): continue
+                name = self._follow.get(tid) or known.get(tid) or f"thread-{tid}"
+                self.worker_stacks[";".join([name] + self._stack(f))] += 1
+
+    def folded(self, stacks: Optional[Counter] = None) -> str:
+        return "".join(f"{k} {v}\n" for k, v in (self.stacks if stacks is None else stacks).most_common())
+
+    def top_self(self, n: int = TOP_N, stacks: Optional[Counter] = None) -> List[tuple]:
+        leaf = Counter()
+        for k, v in (self.stacks if stacks is None else stacks).items(): leaf[k.rsplit(";", 1)[-1]] += v
+        return leaf.most_common(n)
+
+class ProfileSession:
+    """start() ile stop() arasındaki her şey: GUI iş parçacığı + yeni başlayan iş parçacıkları + attach() çağıranlar."""
+    def __init__(self, label: str = "fetch"):
+        self.label = label
+        self.dir = os.path.join(OUT_DIR, time.strftime("%Y%m%d-%H%M%S") + f"-{label}")
+        self._profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+        self._torch_lock = threading.Lock()
+        self._torch_tables: List[str] = []
+        self._t0 = 0.0
+        self.sampler = StackSampler(threading.get_ident())
+
+    def start(self):
+        global _CURRENT
+        _CURRENT = self
+        self._t0 = time.perf_counter()
+        self.sampler.start()   # örnekleyicinin kendisi profillenmesin diye setprofile'dan önce
+        self._enable()
+        if PER_THREAD: threading.setprofile(self._bootstrap)   # akış hattı aşamaları threading.Thread ile başlar
+        else: self.sampler.follow_all = True
+        print(f"[profile] başladı -> {self.dir}")
+
+    def _bootstrap(self, *_):
+        self.attach()
+
+    def _enable(self):
+        p = cProfile.Profile()
+        try: p.enable()
+        except ValueError as e:   # 3.12+: başka bir profilleyici (ör. hata ayıklayıcı) zaten açık
+            print(f"[profile] cProfile açılamadı, sadece yığın örneklemesi: {e}"); return
+        with self._lock: self._profiles.append(p)
+
+    def attach(self):
+        """Çağıran iş parçacığını oturuma katar (QThread.run gibi threading dışı iş parçacıkları için):
+        3.12 öncesi kendi cProfile'ı, sonrası yığın örneklemesi."""
+        if PER_THREAD: self._enable()
+        else: self.sampler.follow(threading.get_ident(), threading.current_thread().name)
+
+    def stop(self) -> str:
+        global _CURRENT
+        if PER_THREAD: threading.setprofile(None)
+        self.sampler.stop()
+        if _CURRENT is self: _CURRENT = None
+        with self._lock: profiles = list(self._profiles)
+        for p in profiles: p.disable()   # sadece çağıran iş parçacığınınkini kapatır; diğerleri zaten bitti
+        elapsed = time.perf_counter() - self._t0
+        os.makedirs(self.dir, exist_ok=True)
+        stats = None
+        for p in profiles:
+            try:
+                if stats is None: stats = pstats.Stats(p)
+                else: stats.add(p)
+            except TypeError:
+                continue   # hiç olay kaydetmemiş iş parçacığı
+        if stats is not None: stats.dump_stats(os.path.join(self.dir, "cprofile.prof"))
+        with open(os.path.join(self.dir, "populate.folded"), "w", encoding="utf-8") as f:
+            f.write(self.sampler.folded())
+        if self.sampler.worker_stacks:
+            with open(os.path.join(self.dir, "workers.folded"), "w", encoding="utf-8") as f:
+                f.write(self.sampler.folded(self.sampler.worker_stacks))
+        if self._torch_tables:
+            with open(os.path.join(self.dir, "torch_ops.txt"), "w", encoding="utf-8") as f:
+                f.write("\n\n".join(self._torch_tables))
+        with open(os.path.join(self.dir, "summary.txt"), "w", encoding="utf-8") as f:
+            f.write(self._summary(stats, elapsed))
+        print(f"[profile] {elapsed:.1f} sn, {len(profiles)} iş parçacığı -> {self.dir}")
+        return self.dir
+
+    def _summary(self, stats: Optional[pstats.Stats], elapsed: float) -> str:
+        out = [f"{self.label}: {elapsed:.2f} sn", ""]
+        if stats is not None:
+            for key, title in (("tottime", "kendi süresi"), ("cumulative", "toplam süre")):
+                buf = io.StringIO(); stats.stream = buf
+                stats.sort_stats(key).print_stats(TOP_N)
+                out += [f"== cProfile: en çok {title} ==", buf.getvalue().strip(), ""]
+        total = sum(self.sampler.stacks.values())
+        if total:
+            out.append(f"== PostFeed çizimi: en sık örneklenen fonksiyonlar ({total} örnek) ==")
+            out += [f"{v:6d} {v/total:6.1%}  {k}" for k, v in self.sampler.top_self()]
+        total = sum(self.sampler.worker_stacks.values())
+        if total:
+            out.append("")
+            out.append(f"== İş parçacıkları: en sık örneklenen fonksiyonlar ({total} örnek) ==")
+            out += [f"{v:6d} {v/total:6.1%}  {k}" for k, v in self.sampler.top_self(stacks=self.sampler.worker_stacks)]
+        return "\n".join(out) + "\n"
+
+    @contextmanager
+    def torch_pass(self, name: str):
+        try:
+            from torch.profiler import profile, ProfilerActivity
+        except ImportError:
+            yield; return
+        # torch profilleyicisi iç içe açılamaz: profil modunda model geçişleri sıraya girer
+        with self._torch_lock:
+            with profile(activities=[ProfilerActivity.CPU], record_shapes=True) as prof:
+                yield
+            n = len(self._torch_tables)
+            os.makedirs(self.dir, exist_ok=True)
+            try: prof.export_chrome_trace(os.path.join(self.dir, f"torch_{n}.json"))
+            except Exception as e: print(f"[profile] Chrome izi yazılamadı: {e}")
+            self._torch_tables.append(f"== {name} #{n} ==\n"
+                                      + prof.key_averages().table(sort_by="self_cpu_time_total", row_limit=20))
+
+def session(label: str = "fetch") -> Optional[ProfileSession]:
+    """Profil modu açıksa yeni oturum başlatır; değilse None."""
+    if not ENABLED or _CURRENT is not None: return None
+    s = ProfileSession(label); s.start()
+    return s
+
+def attach():
+    if _CURRENT is not None: _CURRENT.attach()
+
+def sample():
+    """PostFeed çizimi gibi GUI iş parçacığı bölümleri: oturum varken yığın örneklenir."""
+    return _CURRENT.sampler.active() if _CURRENT is not None else _NULL
+
+def model_pass(name: str):
+    return _CURRENT.torch_pass(name) if _CURRENT is not None else _NULL
@@ -0,0 +1,223 @@
+# rules.py
+# Kategori_Ekleme.ipynb'deki RULES sözlüğünün çalışma zamanı hali: tüm kalıplar tek bir
+# adlandırılmış-gruplu alternation'a derlenir, mesaj tek geçişte tüm kategorilere karşı puanlanır.
+# BERT kategori modelinin önünde hızlı yol olarak kullanılır:
+#   - sadece modelin etiket kümesindeki kategoriler sayılır (model olmayan etiket üretilmez)
+#   - tek kategoriye en az MIN_HITS isabet ya da STRONG kalıplardan biri -> model atlanır
+#   - birden çok kategori, tek zayıf isabet ("kanal", "sürü" gibi kısa kökler) ya da isabet yok -> BERT
+#   - atlananların AUDIT_RATE kadarı yine de modele sorulur (kural/model uyumu raporu için)
+#   - model yüklü değilse kurallar sadece verilen etiket kümesiyle (labels) etiketler; o da yoksa boş kalır
+import hashlib
+import random
+import re
+import threading
+from collections import Counter
+from typing import AbstractSet, Dict, List, Optional, Sequence, Set, Tuple
+
+from normalization import simplify
+
+RULES: Dict[str, List[str]] = {
+    "Su/Altyapı": [
+        r"\bsu\s*(kesint|basınç|basinc|kok)\w*", r"\bkanalizasyon\w*", r"\bkanal\w*",
+        r"\blogar\w*", r"\blağım\w*", r"\byağmur\s*suyu\w*", r"\byağmur\w*\s*(taşkın|baskın)\w*",
+        r"\bızgara\w*", r"\bgider\w*", r"\bsızınt\w*", r"\bboru\w*", r"\bkaçak\w*"
+    ],
+    "Yol/Kaldırım": [
+        r"\byol\w*", r"\byollar\w*", r"\bçukur\w*", r"\bçök\w*", r"\basfalt\w*", r"\byama\w*",
+        r"\bparke\w*", r"\bkaldırım\w*", r"\bçamur\w*", r"\btoz\w*", r"\bkasis\w*", r"\brefüj\w*",
+        r"\bçizgi\w*", r"\bsinyalizasyon\w*"
+    ],
+    "Aydınlatma": [
+        r"\bışık\w*", r"\blamb\w*", r"\baydınlat\w*", r"\belektrik\s*direk\w*", r"\bdirek\w*\s*(yanm\w*|bozuk\w*|kır\w*)"
+    ],
+    "Çöp/Temizlik": [
+        r"\bçöp\w*", r"\btemizlik\w*", r"\bkonteyner\w*", r"\bmoloz\w*", r"\batık\w*", r"\byığın\w*",
+        r"\bçöp\s*topla\w*", r"\bgeri\s*dönüş\w*"
+    ],
+    "Ulaşım/Otopark": [
+        r"\botopark\w*", r"\bpark\s*yeri\w*", r"\bpark\s*ihlal\w*", r"\bçift\s*sıra\w*", r"\btrafik\w*",
+        r"\btıkan\w*", r"\bduran\s*araç\w*"
+    ],
+    "Toplu Taşıma": [
+        r"\botobüs\w*", r"\bdurak\w*", r"\bsefer\w*", r"\bhat\W*\d+", r"\bminibüs\w*", r"\bdolmuş\w*",
+        r"\bgecik\w*", r"\bsıklık\w*", r"\bçalışm\w*\s*hat\w*"
+    ],
+    "İnternet/Elektrik": [
+        r"\binternet\w*", r"\bçekmiyor\w*", r"\bmodem\w*", r"\belektrik\w*", r"\bkesint\w*", r"\btrafo\w*"
+    ],
+    "İlaçlama/Haşere": [
+        r"\bsivrisinek\w*", r"\bhaşere\w*", r"\bböcek\w*", r"\bilaçla\w*", r"\bkarasinek\w*", r"\blarva\w*", r"\byılan\w*", r"\bfare\w*"
+    ],
+    "Gürültü": [
+        r"\bgürült\w*", r"\byüksek\s*ses\w*", r"\bpatpat\w*", r"\beksoz\w*", r"\bdüğün\s*salon\w*", r"\bgece\w*\s*rahats\w*"
+    ],
+    "Zabıta/Denetim": [
+        r"\bzabıta\w*", r"\bdenetim\w*", r"\bseyyar\w*", r"\btabla\w*", r"\bruhsat\w*", r"\bişgal\w*", r"\bencümen\w*"
+    ],
+    "Park/Oyun Alanı": [
+        r"\bpark\w*", r"\bçocuk\w*\s*oyun\w*", r"\bsalıncak\w*", r"\bkaydırak\w*", r"\bspor\w*\s*alan\w*",
+        r"\byeşil\s*alan\w*", r"\bpeyzaj\w*", r"\bağaç\w*", r"\bbudama\w*", r"\bsulama\w*"
+    ],
+    "Hayvan/Sokak Hayvanları": [
+        r"\bköpek\w*", r"\bkedi\w*", r"\bsokak\s*hayvan\w*", r"\bısır\w*", r"\bsaldır\w*", r"\bsürü(?!c)\w*"
+    ],
+    "Okul/Çevresi": [
+        r"\bokul\w*", r"\bokul\s*ön\w*", r"\bservis\w*", r"\büst\s*geçit\w*", r"\byaya\w*\s*geçit\w*"
+    ],
+    "İmar/İnşaat": [
+        r"\bimar\w*", r"\binşa\w*", r"\bkaçak\w*", r"\byıkım\w*", r"\bisk[aâ]n\w*", r"\bruhsat\w*", r"\bhafriyat\w*"
+    ],
+    "Cami/İbadet Alanı": [
+        r"\bcami\w*", r"\bcamii\w*", r"\bhoparlör\w*", r"\banons\w*", r"\bezan\w*"
+    ],
+    "Teşekkür": [
+        r"\bteşekkür\w*", r"\belinize\s*sağlık\w*", r"\bemeğinize\s*sağlık\w*", r"\bsağol\w*", r"\bvar\s*ol\w*", r"\bgüzel\s*hizmet\w*"
+    ],
+}
+
+CATEGORY_PRIORITY = [
+    "Zabıta/Denetim","Su/Altyapı","Yol/Kaldırım","Aydınlatma","Çöp/Temizlik",
+    "Ulaşım/Otopark","Toplu Taşıma","İlaçlama/Haşere","Gürültü",
+    "Park/Oyun Alanı","Hayvan/Sokak Hayvanları","Okul/Çevresi",
+    "İnternet/Elektrik","İmar/İnşaat","Cami/İbadet Alanı","Teşekkür",
+]
+
+# tek başına kesin sayılan kalıplar (tek anlamlı, birden çok kategoride geçmeyen)
+STRONG = {
+    r"\bkanalizasyon\w*", r"\blogar\w*", r"\blağım\w*",
+    r"\basfalt\w*", r"\bkaldırım\w*",
+    r"\baydınlat\w*",
+    r"\bçöp\s*topla\w*", r"\bkonteyner\w*",
+    r"\bsokak\s*hayvan\w*",
+    r"\bsivrisinek\w*", r"\bhaşere\w*", r"\bilaçla\w*",
+    r"\bsalıncak\w*", r"\bkaydırak\w*",
+    r"\botobüs\w*", r"\bminibüs\w*", r"\bdolmuş\w*",
+    r"\bmodem\w*",
+    r"\bteşekkür\w*", r"\belinize\s*sağlık\w*", r"\bemeğinize\s*sağlık\w*",
+}
+MIN_HITS = 2        # STRONG dışında modelin atlanması için tek kategoride en az bu kadar isabet
+AUDIT_RATE = 0.05   # model atlanan satırlardan uyum ölçümü için yine modele sorulan oran
+
+_CAPTURE = re.compile(r"(?<!\\)\((?!\?)")   # adsız yakalama grubu açılışı
+
+def normalize(s: str) -> str:
+    """Notebook'taki _normalize_text gibi (noktalama -> boşluk, tek boşluk); küçük harf Türkçe kurala göre."""
+    if not isinstance(s, str): return ""
+    return simplify(s)
+
+class RuleSet:
+    """
+    Kalıplar öncelik sırasıyla tek regex'te birleşir: (?P<g0>...)|(?P<g1>...)|...
+    Bir konumda en öncelikli kategorinin kalıbı kazanır (notebook'taki öncelik kuralı);
+    birden çok kategoride aynen geçen kalıp (ör. 'kaçak', 'ruhsat') hepsine puan yazar.
+    """
+    def __init__(self, rules: Dict[str, List[str]] = RULES, priority: Sequence[str] = CATEGORY_PRIORITY,
+                 strong: Set[str] = STRONG, min_hits: int = MIN_HITS):
+        order = list(priority) + [c for c in rules if c not in priority]
+        self.rank = {c: i for i, c in enumerate(order)}
+        groups: Dict[str, List[str]] = {}   # kalıp -> kategoriler (ilk görülme sırası korunur)
+        for cat in order:
+            for p in rules.get(cat, []):
+                groups.setdefault(p, []).append(cat)
+        self._cats: Dict[str, Tuple[str, ...]] = {}
+        self._strong = set()   # tek isabeti kesin sayılan grup adları
+        self.min_hits = min_hits
+        # iç yakalama grupları alternation'daki grup numaralarını kaydırmasın
+        pats = [_CAPTURE.sub("(?:", p) for p in groups]
+        # hepsi \b ile başlıyorsa ortak \b başa alınır: alternation sadece kelime başlarında denenir
+        lead = r"\b" if all(p.startswith(r"\b") for p in pats) else ""
+        # ilk harfi aynı kalıplar tek dalda: her kelime başında ~100 yerine bir iki dal denenir
+        buckets: Dict[str, List[str]] = {}
+        for i, (p, (raw, cats)) in enumerate(zip(pats, groups.items())):
+            p = p[len(lead):]
+            head = p[0] if p[:1].isalpha() else ""
+            buckets.setdefault(head, []).append(f"(?P<g{i}>{p})")
+            self._cats[f"g{i}"] = tuple(cats)
+            if raw in strong and len(cats) == 1: self._strong.add(f"g{i}")
+        alts = [(f"(?={re.escape(h)})" if h else "") + "(?:" + "|".join(ps) + ")" for h, ps in buckets.items()]
+        # metin normalize() ile küçük harfe indiği için IGNORECASE gerekmez
+        self.pattern = re.compile(lead + "(?:" + "|".join(alts) + ")", re.UNICODE)
+        key = repr((sorted(rules.items()), sorted(strong), min_hits))
+        self.version = "rules@" + hashlib.sha1(key.encode("utf-8")).hexdigest()[:8]
+
+    def _match(self, text: str) -> Tuple[Counter, Set[str]]:
+        """Tek geçiş: (kategori -> isabet sayısı, güçlü kalıp isabeti alan kategoriler)."""
+        sc: Counter = Counter(); strong = set()
+        for m in self.pattern.finditer(normalize(text)):
+            cats = self._cats[m.lastgroup]
+            for c in cats: sc[c] += 1
+            if m.lastgroup in self._strong: strong.update(cats)
+        return sc, strong
+
+    def scores(self, text: str) -> Counter:
+        """Tek geçiş: kategori -> isabet sayısı."""
+        return self._match(text)[0]
+
+    def decide(self, text: str, labels: Optional[AbstractSet[str]] = None) -> Tuple[Optional[str], Optional[str]]:
+        """
+        (kesin etiket | None, en iyi aday | None). labels verilirse dışındaki kategoriler sayılmaz.
+        Kesin: isabetler tek kategoride ve en az min_hits isabet ya da güçlü kalıp.
+        """
+        sc, strong = self._match(text)
+        if labels is not None: sc = Counter({c: n for c, n in sc.items() if c in labels})
+        if not sc: return None, None
+        best = min(sc, key=self.rank.__getitem__)   # notebook: isabet alan ilk öncelikli kategori
+        sure = len(sc) == 1 and (sc[best] >= self.min_hits or best in strong)
+        return (best if sure else None), best
+
+class RuleStats:
+    """Hızlı yol sayaçları: atlanan oran ve kural/model uyumu (iş parçacığı güvenli)."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total = self.skipped = self.no_hit = self.ambiguous = 0
+        self.audited = self.audit_agree = 0          # kesin kural kararı + model karşılaştırması
+        self.amb_compared = self.amb_agree = 0       # belirsizde kuralın en iyi adayı vs model
+
+    def add(self, **kw):
+        with self._lock:
+            for k, v in kw.items(): setattr(self, k, getattr(self, k) + v)
+
+    def report(self) -> str:
+        pct = lambda a, b: f"{a/b:.0%}" if b else "-"
+        return (f"kural: {self.total} yorum, model atlandı {self.skipped} ({pct(self.skipped, self.total)}), "
+                f"belirsiz {self.ambiguous}, isabetsiz {self.no_hit} | uyum: kesin {pct(self.audit_agree, self.audited)} "
+                f"(n={self.audited}), belirsiz aday {pct(self.amb_agree, self.amb_compared)} (n={self.amb_compared})")
+
+DEFAULT = RuleSet()
+
+def predict_categories(texts: List[str], model=None, rules: RuleSet = DEFAULT,
+                       stats: Optional[RuleStats] = None, audit_rate: float = AUDIT_RATE,
+                       labels: Optional[AbstractSet[str]] = None) -> List[str]:
+    """
+    Kategori tahmini: kesin kural isabetleri doğrudan, kalanlar model.predict ile (tek toplu çağrı).
+    Kurallar sadece modelin etiketlerini üretebilir (labels: model yokken kullanılacak etiket kümesi,
+    ör. model klasöründeki label_mapping.json); model de etiket kümesi de yoksa hepsi boş kalır.
+    """
+    if model is not None:
+        id2label = getattr(model, "id2label", None)
+        labels = frozenset(id2label.values()) if id2label else None
+    elif not labels:
+        return [""] * len(texts)
+    decided = [rules.decide(t, labels) for t in texts]
+    if model is None: return [sure or "" for sure, _best in decided]   # sadece kesin kurallar
+    out = [sure or "" for sure, _best in decided]
+    ask = [i for i, (sure, _b) in enumerate(decided) if sure is None]
+    audit = [i for i, (sure, _b) in enumerate(decided) if sure is not None and random.random() < audit_rate]
+    if stats is not None:
+        stats.add(total=len(texts), skipped=len(texts) - len(ask),
+                  no_hit=sum(1 for s, b in decided if b is None),
+                  ambiguous=sum(1 for s, b in decided if s is None and b is not None))
+    if not (ask or audit): return out
+    idx = ask + audit
+    preds = model.predict([texts[i] for i in idx])
+    a_cmp = a_ok = amb_cmp = amb_ok = 0
+    for i, p in zip(idx, preds):
+        sure, best = decided[i]
+        if sure is None:
+            out[i] = p
+            if best is not None: amb_cmp += 1; amb_ok += best == p
+        else:
+            a_cmp += 1; a_ok += sure == p   # denetim: etiket kuraldan kalır
+    if stats is not None:
+        stats.add(audited=a_cmp, audit_agree=a_ok, amb_compared=amb_cmp, amb_agree=amb_ok)
+    return out
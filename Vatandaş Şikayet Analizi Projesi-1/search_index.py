@@ -0,0 +1,152 @@
+# search_index.py
+# Yorum araması için ters indeks (token -> satır konumları).
+# Veri yüklenince bir kez kurulur; sorgu terimleri önek olarak eşleşir ve
+# çok terimli sorgular VE (kesişim) ile birleştirilir.
+import bisect
+import itertools
+import re
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Tuple
+
+from normalization import tr_lower   # Türkçe küçük harf (str.lower() 'I' -> 'i' üretir)
+
+_TOKEN_RE = re.compile(r"\w+")
+
+def tokenize(s: str) -> List[str]:
+    return _TOKEN_RE.findall(tr_lower(s or ""))
+
+def _postings(messages: pd.Series, offset: int = 0) -> Dict[str, np.ndarray]:
+    """token -> sıralı, tekrarsız satır konumları (offset'ten başlayarak)."""
+    toks = [tokenize(t) if isinstance(t, str) else [] for t in messages.to_numpy(dtype=object)]
+    lens = np.fromiter(map(len, toks), dtype=np.int64, count=len(toks))
+    if not lens.sum(): return {}
+    # string sıralaması yerine token kodları üzerinde (kod, satır) sıralaması
+    codes, uniq = pd.factorize(np.array(list(itertools.chain.from_iterable(toks)), dtype=object))
+    rows = np.repeat(np.arange(offset, offset + len(toks), dtype=np.int64), lens)
+    order = np.lexsort((rows, codes))
+    codes, rows = codes[order], rows[order]
+    keep = np.ones(len(codes), dtype=bool)
+    keep[1:] = (codes[1:] != codes[:-1]) | (rows[1:] != rows[:-1])
+    codes, rows = codes[keep], rows[keep]
+    starts = np.concatenate(([0], np.flatnonzero(codes[1:] != codes[:-1]) + 1))
+    ends = np.append(starts[1:], len(codes))
+    return {uniq[codes[a]]: rows[a:b] for a, b in zip(starts, ends)}
+
+def _within(rows: np.ndarray, lo: int, hi: int) -> np.ndarray:
+    """Sıralı konum dizisinin [lo, hi) aralığına düşen kısmı (kopyasız dilim)."""
+    return rows[np.searchsorted(rows, lo, "left"):np.searchsorted(rows, hi, "left")]
+
+class TextIndex:
+    def __init__(self, messages: pd.Series):
+        """messages: konumsal (0..n-1) mesaj kolonu."""
+        self.n = 0
+        self._postings: Dict[str, np.ndarray] = {}
+        self._vocab: List[str] = []
+        self.add(messages)
+
+    def add(self, messages: pd.Series):
+        """Tablonun sonuna eklenen satırları indekse ekler (konumlar self.n'den devam eder)."""
+        new = _postings(messages, self.n)
+        self.n += len(messages)
+        if not new: return
+        for tok, rows in new.items():
+            old = self._postings.get(tok)
+            self._postings[tok] = rows if old is None else np.concatenate((old, rows))
+        self._vocab = sorted(self._postings)
+
+    def _prefix(self, term: str, lo: int, hi: int) -> np.ndarray:
+        """Önek eşleşmesi: 'çukur' -> çukur, çukurlar, çukuru ... satırlarının [lo, hi) içindeki birleşimi."""
+        a = bisect.bisect_left(self._vocab, term)
+        b = bisect.bisect_left(self._vocab, term + "\uffff")
+        if b - a == 1:
+            return _within(self._postings[self._vocab[a]], lo, hi)
+        if b == a:
+            return np.array([], dtype=np.int64)
+        return np.unique(np.concatenate([_within(self._postings[t], lo, hi) for t in self._vocab[a:b]]))
+
+    def search(self, query: str, lo: int = 0, hi: int | None = None) -> np.ndarray:
+        """Sorgudaki tüm terimleri (önek) içeren satır konumları, artan sırada; isteğe bağlı [lo, hi) aralığında."""
+        hi = self.n if hi is None else hi
+        if not (query or "").strip():
+            return np.arange(lo, hi, dtype=np.int64)
+        terms = tokenize(query)
+        if not terms:   # sadece noktalama: hiçbir satırla eşleşmez
+            return np.array([], dtype=np.int64)
+        # en seçici terimden başla
+        lists = sorted((self._prefix(t, lo, hi) for t in set(terms)), key=len)
+        out = lists[0]
+        for p in lists[1:]:
+            if not len(out): break
+            out = np.intersect1d(out, p, assume_unique=True)
+        return out
+
+    def mask(self, query: str) -> np.ndarray:
+        m = np.zeros(self.n, dtype=bool)
+        m[self.search(query)] = True
+        return m
+
+def _days(dates: pd.Series) -> np.ndarray:
+    """tz-aware tarih serisi -> UTC epoch gün numaraları (int64)."""
+    t = pd.to_datetime(dates, utc=True)
+    return np.asarray(t.dt.tz_convert(None).values, dtype="datetime64[D]").astype(np.int64)
+
+class CommentIndex:
+    """
+    Tarihe göre sıralı yorum tablosu için filtre indeksi.
+    - tarih: gün numaraları üzerinde searchsorted -> [lo, hi) satır aralığı
+    - mahalle: etiket başına sıralı satır konumları
+    - metin: TextIndex
+    Sonuç, satır konumu dizisi olarak döner; maliyet sonuç boyutuyla ölçeklenir.
+    Tablo tarihe göre artan sırada ve tarihsiz satır içermemeli.
+    """
+    def __init__(self, df: pd.DataFrame):
+        self.n = 0
+        self._day = np.array([], dtype=np.int64)
+        self._mh: Dict[str, np.ndarray] = {}
+        self.text = TextIndex(pd.Series([], dtype=object))
+        self.add(df)
+
+    def can_append(self, df: pd.DataFrame) -> bool:
+        """Yeni satırlar sıralamayı bozmadan sona eklenebilir mi?"""
+        return df.empty or not self.n or int(_days(df["date"]).min()) >= int(self._day[-1])
+
+    def add(self, df: pd.DataFrame):
+        """Tablonun sonuna eklenen (tarihe göre sıralı) satırları indekse ekler."""
+        if df is None or df.empty: return
+        self._day = np.concatenate((self._day, _days(df["date"])))
+        mh = df["mahalle"] if isinstance(df["mahalle"].dtype, pd.CategoricalDtype) \
+            else df["mahalle"].fillna("").astype(str).astype("category")
+        codes = mh.cat.codes.to_numpy()
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(mh.cat.categories) + 1))
+        for i, lab in enumerate(mh.cat.categories):
+            rows = order[bounds[i]:bounds[i+1]] + self.n
+            if not len(rows): continue
+            key = str(lab).lower()
+            old = self._mh.get(key)
+            self._mh[key] = rows if old is None else np.concatenate((old, rows))
+        self.text.add(df["message"])
+        self.n += len(df)
+
+    def date_range(self, start, end) -> Tuple[int, int]:
+        """[start, end] (dahil, gün) için satır aralığı [lo, hi)."""
+        lo = int(np.searchsorted(self._day, (pd.Timestamp(start) - pd.Timestamp(0)).days, "left"))
+        hi = int(np.searchsorted(self._day, (pd.Timestamp(end) - pd.Timestamp(0)).days, "right"))
+        return lo, max(lo, hi)
+
+    def select(self, start=None, end=None, mahalle: str | None = None, query: str = "") -> np.ndarray:
+        """Filtrelere uyan satır konumları (artan)."""
+        lo, hi = self.date_range(start, end) if start is not None and end is not None else (0, self.n)
+        parts = []
+        if mahalle:
+            parts.append(_within(self._mh.get(mahalle, np.array([], dtype=np.int64)), lo, hi))
+        if (query or "").strip():
+            parts.append(self.text.search(query, lo, hi))
+        if not parts:
+            return np.arange(lo, hi, dtype=np.int64)
+        parts.sort(key=len)
+        out = parts[0]
+        for p in parts[1:]:
+            out = np.intersect1d(out, p, assume_unique=True)
+        return out
@@ -0,0 +1,39 @@
+# settings.py
+# Arayüzden bağımsız ortak ayarlar: GUI (main.py) ve komut satırı araçları buradan okur.
+import os
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+# tüm yerel yollar proje klasörüne göre (çalışma klasöründen bağımsız); ortam değişkenleri aynen kullanılır
+DATA_DIR = os.path.join(PROJECT_DIR, "data")     # depo, kontrol noktaları, önbellekler
+MODELS_DIR = os.path.join(os.path.dirname(PROJECT_DIR), "models")   # depo kökündeki models/ (README)
+
+OLUR_MAHALLELER = [
+    "Akbayır","Aktepe","Altunkaya","Aşağıçayırlı","Cumhuriyet","Aşağıkaracasu","Atlı",
+    "Beğendik","Beşkaya","Boğazgören","Bozdoğan","Hastane","Çataksu","Coşkunlar","Eğlek",
+    "Ekinlik","Filizli","Güngöründü","Ilıkaynak","Kaban","Kaledibi","Karaköçlar","Keçili",
+    "Kekikli","Köprübaşı","Merkez","Oğuzkent","Olgun","Olurdere","Ormanağzı","Saribaşak",
+    "Soğukgöze","Süngübayır","Şalpazarı","Taşgeçit","Taşlıköy","Ürünlü","Uzunharman",
+    "Yaylabaşı","Yeşilbağlar","Yıldızkaya","Yolgözler","Yukarıçayırlı","Yukarıkızılkale"
+]
+COMPLAINT_MODEL_DIR = os.path.join(MODELS_DIR, "sikayet_egitim_modeli")   # train.py çıktısı; kayıt defteri boşken kullanılır
+CATEGORY_MODEL_DIR  = os.path.join(MODELS_DIR, "berturk_kategori_modeli")
+# model kayıt defteri (model_registry.py): sürümlü model klasörleri + manifest.json
+MODEL_REGISTRY = os.getenv("SIKAYET_MODEL_REGISTRY", os.path.join(MODELS_DIR, "registry"))
+# model tanımı: klasör yolu ya da "registry:<görev>[@sürüm]" (sürümsüz: defterdeki etkin sürüm)
+COMPLAINT_MODEL = os.getenv("SIKAYET_COMPLAINT_MODEL", "registry:sikayet")
+CATEGORY_MODEL = os.getenv("SIKAYET_CATEGORY_MODEL", "registry:kategori")
+MODEL_POLL_MS = int(os.getenv("SIKAYET_MODEL_POLL_MS", "60000"))   # GUI kayıt defteri yoklama aralığı
+# model girdisi ön işleme (normalization.MODES): model klasöründeki preprocess.json geçerlidir (train.py ve
+# eğitim defterleri yazar); yoksa bu değerler, varsayılan ham metin.
+COMPLAINT_PREPROCESS = os.getenv("SIKAYET_COMPLAINT_PREPROCESS", "raw")
+CATEGORY_PREPROCESS = os.getenv("SIKAYET_CATEGORY_PREPROCESS", "raw")
+TRAIN_CACHE_DIR = os.getenv("SIKAYET_TRAIN_CACHE", os.path.join(DATA_DIR, "train_cache"))   # train.py tokenizasyon önbelleği
+STORE_PATH = os.getenv("SIKAYET_STORE", os.path.join(DATA_DIR, "yorumlar.sqlite"))
+TENANTS_PATH = os.getenv("SIKAYET_TENANTS", os.path.join(PROJECT_DIR, "tenants.json"))   # çok sayfalı kurulum (tenants.py)
+FETCH_POSTS, FETCH_COMMENTS = 30, 300   # tur başına gönderi / gönderi başına yorum
+STORE_POLL_MS = int(os.getenv("SIKAYET_STORE_POLL_MS", "30000"))   # GUI depo yoklama aralığı
+
+# collector.py (arka plan toplayıcı)
+COLLECTOR_STATE = os.getenv("SIKAYET_COLLECTOR_STATE", os.path.join(DATA_DIR, "collector_state.json"))
+COLLECTOR_INTERVAL = int(os.getenv("SIKAYET_COLLECTOR_INTERVAL", "600"))   # sn
+COLLECTOR_JITTER = 0.2   # aralık ±%20 rastgele kaydırılır
@@ -0,0 +1,143 @@
+# summary_cube.py
+# Gün × mahalle × kategori × şikâyet etiketi sayım küpü.
+# Veri yüklenince bir kez kurulur, yeni yorumlar geldikçe add() ile artımlı güncellenir.
+# Tarih aralığı sorguları gün ekseninde önek toplamı ile cevaplanır: maliyet geçmiş
+# uzunluğundan bağımsız, sadece (mahalle × kategori × etiket) boyutu kadar.
+# add() önek toplamını bozmaz: önek toplamından sonra eklenen satırlar küçük bir bekleyen listede
+# tutulur ve sorguda bincount ile eklenir; liste küpün FOLD_RATIO'sunu aşınca önek toplamı yeniden
+# kurulur (eklenen satır başına sabit amortize maliyet).
+# Gün ekseni yoğun dizi: aralık dışı tarihler (bozuk zaman damgası, ör. 1970) uyarıyla atlanır.
+import numpy as np
+import pandas as pd
+from datetime import date
+from typing import Dict, List, Optional
+
+_EPOCH = date(1970, 1, 1)
+MIN_DATE = date(2004, 2, 4)   # Facebook'un açılışı; öncesi bozuk veri
+FOLD_RATIO = 0.125            # bekleyen satır / küp hücresi bu oranı aşınca önek toplamı yeniden kurulur
+
+def _day(d: date) -> int:
+    return (d - _EPOCH).days
+
+class SummaryCube:
+    DIMS = ("mahalle", "kategori", "t_sikayet")
+
+    def __init__(self, df: Optional[pd.DataFrame] = None):
+        self._vocab: Dict[str, Dict[str, int]] = {d: {} for d in self.DIMS}
+        self._labels: Dict[str, List[str]] = {d: [] for d in self.DIMS}
+        self._day0: Optional[int] = None
+        self._counts = np.zeros((0, 0, 0, 0), dtype=np.int32)
+        self._cum: Optional[np.ndarray] = None   # gün ekseninde önek toplamı (tembel)
+        self._cum_day0 = 0                         # önek toplamının ilk günü (küp sonradan büyüyebilir)
+        self._pend: List[np.ndarray] = []          # önek toplamından sonra eklenenler: (4, n) [gün, m, k, s]
+        self._npend = 0
+        if df is not None: self.add(df)
+
+    def __len__(self) -> int:
+        return int(self._counts.sum())
+
+    # --- güncelleme ---
+    def _lut(self, dim: str, s: pd.Series) -> np.ndarray:
+        """Kolonu küp indekslerine çevirir (yeni etiketler sözlüğe eklenir)."""
+        if not isinstance(s.dtype, pd.CategoricalDtype) or s.isna().any():
+            s = s.astype(object).fillna("").astype(str).astype("category")
+        voc, lab = self._vocab[dim], self._labels[dim]
+        lut = np.empty(len(s.cat.categories), dtype=np.int64)
+        for i, c in enumerate(s.cat.categories):
+            if c not in voc:
+                voc[c] = len(lab); lab.append(c)
+            lut[i] = voc[c]
+        return lut[s.cat.codes.to_numpy()]
+
+    def add(self, df: pd.DataFrame):
+        """Yeni yorum satırlarını küpe ekler (tarihi olmayan satırlar atlanır)."""
+        if df is None or df.empty: return
+        t = pd.to_datetime(df["date"], utc=True, errors="coerce")
+        ok = t.notna().to_numpy()
+        days = np.asarray(t.dt.tz_convert(None).values, dtype="datetime64[D]").astype(np.int64)
+        out = ok & ((days < _day(MIN_DATE)) | (days > _day(date.today()) + 1))
+        if out.any():
+            print(f"[cube] {int(out.sum())} yorumun tarihi {MIN_DATE} - bugün aralığı dışında, özete alınmadı")
+            ok = ok & ~out
+        if not ok.any(): return
+        days = days[ok]
+        idx = [self._lut(d, df[d] if d in df.columns else pd.Series([""]*len(df)))[ok] for d in self.DIMS]
+
+        D, M, K, S = self._counts.shape
+        lo, hi = int(days.min()), int(days.max())
+        if self._day0 is not None:
+            lo, hi = min(lo, self._day0), max(hi, self._day0 + D - 1)
+        shape = (hi - lo + 1, *(len(self._labels[d]) for d in self.DIMS))
+        if shape != self._counts.shape:
+            pre = self._day0 - lo if self._day0 is not None else 0
+            grown = np.zeros(shape, dtype=np.int32)
+            grown[pre:pre+D, :M, :K, :S] = self._counts
+            self._counts = grown
+        self._day0 = lo
+
+        flat = np.ravel_multi_index((days - self._day0, *idx), self._counts.shape)
+        np.add.at(self._counts.reshape(-1), flat, 1)
+        if self._cum is None: return
+        self._pend.append(np.vstack((days, *idx))); self._npend += len(days)
+        if self._npend > FOLD_RATIO * self._counts.size:   # sorgu maliyeti önek toplamını geçmesin
+            self._cum = None; self._pend = []; self._npend = 0
+
+    # --- sorgu ---
+    def counts(self, start: date, end: date, mahalle: Optional[str] = None) -> np.ndarray:
+        """[start, end] (dahil) için (mahalle, kategori, t_sikayet) sayı dizisi; mahalle küçük harfli ad."""
+        D = self._counts.shape[0]
+        out = np.zeros(self._counts.shape[1:], dtype=np.int64)
+        if self._day0 is None or D == 0: return out
+        a = max(0, _day(start) - self._day0); b = min(D, _day(end) - self._day0 + 1)
+        if b > a:
+            if self._cum is None:
+                self._cum = np.cumsum(self._counts, axis=0, dtype=np.int64); self._cum_day0 = self._day0
+            cum = self._cum; off = self._day0 - self._cum_day0
+            ca = min(max(a + off, 0), len(cum)); cb = min(max(b + off, 0), len(cum))
+            if cb > ca:
+                M, K, S = cum.shape[1:]
+                out[:M, :K, :S] = cum[cb-1] - (cum[ca-1] if ca > 0 else 0)
+            if self._pend:
+                if len(self._pend) > 1: self._pend = [np.concatenate(self._pend, axis=1)]
+                p = self._pend[0]
+                sel = (p[0] >= a + self._day0) & (p[0] < b + self._day0)
+                flat = np.ravel_multi_index(tuple(p[1:, sel]), out.shape)
+                out += np.bincount(flat, minlength=out.size).reshape(out.shape)
+        if mahalle:
+            keep = np.array([m.lower() == mahalle for m in self._labels["mahalle"]], dtype=bool)
+            out = out * keep[:, None, None]
+        return out
+
+    def _summary(self, dim: str, arr: np.ndarray) -> pd.DataFrame:
+        axes = tuple(i for i, d in enumerate(self.DIMS) if d != dim)
+        cnt = arr.sum(axis=axes) if arr.size else np.zeros(len(self._labels[dim]), dtype=np.int64)
+        g = pd.DataFrame({dim: self._labels[dim], "count": cnt})
+        g = g[(g["count"] > 0) & (g[dim] != "")]
+        return g.sort_values("count", ascending=False, kind="stable").reset_index(drop=True)
+
+    def by_mahalle(self, start: date, end: date, mahalle: Optional[str] = None) -> pd.DataFrame:
+        """summarize_by_mahalle ile aynı biçim: mahalle, count."""
+        return self._summary("mahalle", self.counts(start, end, mahalle))
+
+    def by_category(self, start: date, end: date, mahalle: Optional[str] = None) -> pd.DataFrame:
+        """summarize_by_category ile aynı biçim: kategori, count."""
+        return self._summary("kategori", self.counts(start, end, mahalle))
+
+    def daily(self, start: date, end: date, mahalle: Optional[str] = None,
+              kategori: Optional[str] = None) -> pd.Series:
+        """Grafikler için günlük seri (indeks: gün)."""
+        days = pd.date_range(start, end, freq="D")
+        vals = np.zeros(len(days), dtype=np.int64)
+        if self._day0 is None or not len(days):
+            return pd.Series(vals, index=days.date, name="count")
+        D = self._counts.shape[0]
+        a = _day(start) - self._day0; b = _day(end) - self._day0 + 1
+        lo, hi = max(a, 0), min(b, D)
+        if hi > lo:
+            sl = self._counts[lo:hi]
+            if mahalle:
+                sl = sl[:, np.array([m.lower() == mahalle for m in self._labels["mahalle"]], dtype=bool)]
+            if kategori:
+                sl = sl[:, :, np.array([k == kategori for k in self._labels["kategori"]], dtype=bool)]
+            vals[lo-a:hi-a] = sl.sum(axis=(1, 2, 3))
+        return pd.Series(vals, index=days.date, name="count")
@@ -0,0 +1,82 @@
+# tenants.py
+# Çok sayfalı / çok belediyeli kurulum. Her kiracı (tenant) = bir Facebook sayfası + kendi
+# mahalle listesi + model seti + ayrı depo klasörü (<proje>/data/<key>/).
+# tenants.json yoksa .env'deki tek sayfa, OLUR_MAHALLELER ve mevcut depo yolu kullanılır.
+# Dosyadaki göreli yollar (store, state, mahalleler_file) tenants.json'un klasörüne göredir.
+#
+# tenants.json örneği:
+# [
+#   {"key": "olur", "name": "Olur Belediyesi", "page_id": "olurbelediyesi",
+#    "token_env": "OLUR_FB_TOKEN", "mahalleler": ["Merkez", "Olurdere", ...]},
+#   {"key": "oltu", "name": "Oltu Belediyesi", "page_id": "1234567890",
+#    "token_env": "OLTU_FB_TOKEN", "mahalleler_file": "./gazetteer/oltu.txt",
+#    "category_model": "registry:kategori@v002"}
+# ]
+# Model tanımları klasör yolu ya da kayıt defteri girdisidir (model_registry.py); varsayılan defterdeki
+# etkin sürüm, sürüm sabitlenmemişse GUI / collector yeni etkin sürüme çalışırken geçer.
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from settings import (OLUR_MAHALLELER, COMPLAINT_MODEL, CATEGORY_MODEL, STORE_PATH,
+                      COLLECTOR_STATE, TENANTS_PATH, DATA_DIR, PROJECT_DIR)
+
+class Tenant:
+    def __init__(self, key: str, name: str = "", page_id: str = "", token: str = "",
+                 mahalleler: Optional[List[str]] = None,
+                 complaint_model: str = COMPLAINT_MODEL, category_model: str = CATEGORY_MODEL,
+                 store: Optional[str] = None, state: Optional[str] = None):
+        self.key = key
+        self.name = name or key
+        self.page_id = page_id          # boşsa facebook_client .env'deki sayfayı kullanır
+        self.token = token
+        self.mahalleler = list(mahalleler or OLUR_MAHALLELER)
+        self.complaint_model = complaint_model
+        self.category_model = category_model
+        self.store = store or os.path.join(DATA_DIR, key, "yorumlar.sqlite")
+        self.state = state or os.path.join(DATA_DIR, key, "collector_state.json")
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any], base: str = PROJECT_DIR) -> "Tenant":
+        """base: göreli yolların kökü (load_tenants: tenants.json'un klasörü)."""
+        key = str(d.get("key") or "").strip()
+        if not key: raise RuntimeError(f"Kiracı tanımında 'key' eksik: {d}")
+        def path(k: str) -> Optional[str]:
+            return os.path.join(base, os.path.expanduser(d[k])) if d.get(k) else None
+        # token dosyada düz yazılmasın diye ortam değişkeni adı tercih edilir
+        token = os.getenv(d["token_env"], "") if d.get("token_env") else d.get("token", "")
+        mahalleler = d.get("mahalleler")
+        if not mahalleler and d.get("mahalleler_file"):
+            with open(path("mahalleler_file"), "r", encoding="utf-8") as f:
+                mahalleler = [l.strip() for l in f if l.strip() and not l.startswith("#")]
+        return cls(key, d.get("name", ""), str(d.get("page_id") or ""), token.strip(), mahalleler,
+                   d.get("complaint_model") or COMPLAINT_MODEL, d.get("category_model") or CATEGORY_MODEL,
+                   path("store"), path("state"))
+
+    def __repr__(self):
+        return f"Tenant({self.key!r}, page={self.page_id or '.env'!r}, mahalle={len(self.mahalleler)})"
+
+def default_tenant() -> Tenant:
+    """Yapılandırma yoksa: .env sayfası, Olur mahalleleri, mevcut depo ve kontrol noktası yolları."""
+    return Tenant("varsayilan", "Olur Belediyesi", store=STORE_PATH, state=COLLECTOR_STATE)
+
+def load_tenants(path: str = TENANTS_PATH) -> List[Tenant]:
+    if not os.path.exists(path):
+        return [default_tenant()]
+    with open(path, "r", encoding="utf-8") as f:
+        conf = json.load(f)
+    items = conf.get("tenants", []) if isinstance(conf, dict) else conf
+    base = os.path.dirname(os.path.abspath(path))
+    tenants = [Tenant.from_dict(d, base) for d in items]
+    keys = [t.key for t in tenants]
+    if len(set(keys)) != len(keys): raise RuntimeError(f"Kiracı anahtarları tekrarlı: {keys}")
+    return tenants or [default_tenant()]
+
+def get_tenant(key: Optional[str] = None, path: str = TENANTS_PATH) -> Tenant:
+    """key verilmezse SIKAYET_TENANT ortam değişkeni, o da yoksa ilk kiracı."""
+    tenants = load_tenants(path)
+    key = key or os.getenv("SIKAYET_TENANT", "")
+    if not key: return tenants[0]
+    for t in tenants:
+        if t.key == key: return t
+    raise RuntimeError(f"Kiracı bulunamadı: {key} (tanımlı: {', '.join(t.key for t in tenants)})")
@@ -0,0 +1,333 @@
+# train.py
+# Colab defterlerinin (sikayet_egitim_modeli.ipynb, Kategori_Eğitim_Modeli.ipynb) betik hali:
+# CPU'da makul sürede, tekrarlanabilir eğitim; çıktı doğrudan models/... klasörüne (TextClassifier yükler).
+#   python train.py sikayet  isim_yorum_kategorili_gelistirilmis.csv
+#   python train.py kategori isim_yorum_temiz_etiket.csv --epochs 4
+#   python train.py kategori isim_yorum_temiz_etiket.csv --resume     # yarıda kalan eğitime devam
+#   python train.py kategori isim_yorum_temiz_etiket.csv --register   # + model kayıt defterine yeni sürüm
+#
+# Hız için:
+#   - metinler bir kez tokenize edilip TRAIN_CACHE_DIR/<anahtar>/ altına yazılır (ids.npy + offsets.npy,
+#     np.load(mmap_mode="r") ile bellek eşlemli). Anahtar = tokenizer + max_len + ön işlenmiş metinlerin
+#     özeti; veri ya da tokenizer değişmedikçe sonraki koşular tokenizasyonu atlar.
+#   - dolgu (padding) batch içindeki en uzun örneğe kadar; benzer uzunluktaki örnekler aynı batch'e
+#     düşsün diye örnekler büyük gruplar içinde uzunluğa göre sıralanır (length-grouped sampler).
+# Kontrol noktası: <çıktı>.ckpt/last.pt (--save-steps adımda bir ve her tur sonunda) + en iyi model
+# <çıktı>.ckpt/best/. Bitince en iyi model <çıktı>/ klasörüne label_mapping.json ve preprocess.json ile yazılır.
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import shutil
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from normalization import MODES, preprocess_batch
+from settings import COMPLAINT_MODEL_DIR, CATEGORY_MODEL_DIR, TRAIN_CACHE_DIR
+
+# görev -> defterlerdeki ayarlar (epoch sayısı CPU için düşürüldü); ön işleme modu preprocess.json'a yazılır
+TASKS: Dict[str, Dict] = {
+    "sikayet": dict(label_col="etiket", base="dbmdz/bert-base-turkish-cased", max_len=128,
+                    out=COMPLAINT_MODEL_DIR, preprocess="raw",
+                    class_weights=False, metric="accuracy"),
+    "kategori": dict(label_col="kategori", base="dbmdz/bert-base-turkish-uncased", max_len=160,
+                     out=CATEGORY_MODEL_DIR, preprocess="clean",
+                     class_weights=True, metric="f1_weighted"),
+}
+# ham yorum varsa o okunur ve ön işleme burada (normalization) yapılır; tahminde de aynısı uygulanır
+TEXT_COLS = ("yorum", "message", "text", "temiz_yorum", "temiz yorum")
+MEGABATCH = 50   # uzunluk gruplaması: kaç batch'lik grup içinde sıralanır
+SEED = 42
+
+# --- veri ---
+def read_dataset(path: str, label_col: str, text_col: Optional[str] = None) -> Tuple[List[str], List[str]]:
+    df = pd.read_csv(path, dtype=str, keep_default_na=False, encoding="utf-8-sig")
+    if text_col is None:
+        lower = {c.lower().strip(): c for c in df.columns}
+        text_col = next((lower[c] for c in TEXT_COLS if c in lower), None)
+        if text_col is None: raise RuntimeError(f"Metin kolonu bulunamadı ({', '.join(TEXT_COLS)}); --text-col ile belirtin.")
+    for c in (text_col, label_col):
+        if c not in df.columns: raise RuntimeError(f"'{c}' kolonu yok. Kolonlar: {list(df.columns)}")
+    df = df[[text_col, label_col]].apply(lambda s: s.str.strip())
+    df = df[(df[text_col] != "") & (df[label_col] != "")]
+    print(f"[train] {len(df):,} örnek ({text_col} -> {label_col})")
+    return df[text_col].tolist(), df[label_col].tolist()
+
+def split(labels: np.ndarray, seed: int = SEED) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Defterdeki gibi sınıf oranını koruyan %80 / %10 / %10 bölme (sklearn gerekmez)."""
+    rng = np.random.default_rng(seed)
+    parts: Tuple[List, List, List] = ([], [], [])
+    for c in np.unique(labels):
+        idx = rng.permutation(np.flatnonzero(labels == c))
+        a = int(round(len(idx) * 0.8)); b = a + (len(idx) - a) // 2
+        for p, s in zip(parts, (idx[:a], idx[a:b], idx[b:])): p.append(s)
+    return tuple(np.sort(np.concatenate(p)) for p in parts)
+
+# --- tokenizasyon önbelleği ---
+def tokenizer_fingerprint(tokenizer, max_len: int) -> str:
+    h = hashlib.sha1(f"{type(tokenizer).__name__}:{max_len}:".encode())
+    backend = getattr(tokenizer, "backend_tokenizer", None)
+    if backend is not None: h.update(backend.to_str().encode("utf-8"))   # sözlük + normalizer (cased/uncased)
+    else: h.update(json.dumps(tokenizer.get_vocab(), sort_keys=True).encode("utf-8"))
+    return h.hexdigest()[:12]
+
+def texts_fingerprint(texts: List[str]) -> str:
+    h = hashlib.sha1()
+    for t in texts: h.update(t.encode("utf-8")); h.update(b"\0")
+    return h.hexdigest()[:12]
+
+class TokenCache:
+    """Tüm örneklerin token id'leri tek düz dizide; i. örnek ids[offsets[i]:offsets[i+1]]."""
+    def __init__(self, path: str):
+        self.path = path
+        self.ids = np.load(os.path.join(path, "ids.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"))
+        self.lengths = np.diff(self.offsets)
+
+    def __len__(self): return len(self.lengths)
+
+    def __getitem__(self, i: int) -> np.ndarray:
+        return self.ids[self.offsets[i]:self.offsets[i + 1]]
+
+    @classmethod
+    def build(cls, tokenizer, texts: List[str], max_len: int, cache_dir: str = TRAIN_CACHE_DIR,
+              chunk: int = 2048) -> "TokenCache":
+        key = f"{tokenizer_fingerprint(tokenizer, max_len)}-{texts_fingerprint(texts)}"
+        path = os.path.join(cache_dir, key)
+        if os.path.isfile(os.path.join(path, "offsets.npy")):
+            print(f"[train] tokenizasyon önbellekten: {path}")
+            return cls(path)
+        t0 = time.perf_counter()
+        shutil.rmtree(path, ignore_errors=True)   # yarım kalmış önbellek
+        tmp = path + f".tmp{os.getpid()}"
+        os.makedirs(tmp, exist_ok=True)
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        parts: List[np.ndarray] = []
+        for i in range(0, len(texts), chunk):
+            enc = tokenizer(texts[i:i + chunk], truncation=True, max_length=max_len)["input_ids"]
+            lens = np.fromiter((len(e) for e in enc), dtype=np.int64, count=len(enc))
+            offsets[i + 1:i + 1 + len(enc)] = offsets[i] + np.cumsum(lens)
+            parts.append(np.fromiter((t for e in enc for t in e), dtype=np.int32, count=int(lens.sum())))
+        np.save(os.path.join(tmp, "ids.npy"), np.concatenate(parts) if parts else np.zeros(0, np.int32))
+        np.save(os.path.join(tmp, "offsets.npy"), offsets)
+        try: os.replace(tmp, path)
+        except OSError: shutil.rmtree(tmp, ignore_errors=True)   # eşzamanlı başka koşu yazmış
+        print(f"[train] {len(texts):,} metin tokenize edildi ({time.perf_counter() - t0:.1f} sn) -> {path}")
+        return cls(path)
+
+# --- batch'leme ---
+def length_grouped_batches(index: np.ndarray, lengths: np.ndarray, batch_size: int,
+                           seed: int) -> List[np.ndarray]:
+    """Rastgele karıştır, MEGABATCH'lik gruplar içinde uzunluğa göre sırala, batch sırasını karıştır."""
+    rng = np.random.default_rng(seed)
+    idx = rng.permutation(index)
+    mega = batch_size * MEGABATCH
+    batches: List[np.ndarray] = []
+    for i in range(0, len(idx), mega):
+        g = idx[i:i + mega]
+        g = g[np.argsort(-lengths[g], kind="stable")]
+        batches += [g[j:j + batch_size] for j in range(0, len(g), batch_size)]
+    return [batches[i] for i in rng.permutation(len(batches))]
+
+def eval_batches(index: np.ndarray, lengths: np.ndarray, batch_size: int) -> List[np.ndarray]:
+    g = index[np.argsort(-lengths[index], kind="stable")]
+    return [g[j:j + batch_size] for j in range(0, len(g), batch_size)]
+
+def collate(cache: TokenCache, batch: np.ndarray, labels: np.ndarray, pad_id: int):
+    """Dinamik dolgu: batch'teki en uzun örneğe kadar."""
+    import torch
+    width = int(cache.lengths[batch].max())
+    ids = np.full((len(batch), width), pad_id, dtype=np.int64)
+    mask = np.zeros((len(batch), width), dtype=np.int64)
+    for r, i in enumerate(batch):
+        row = cache[i]; ids[r, :len(row)] = row; mask[r, :len(row)] = 1
+    return (torch.from_numpy(ids), torch.from_numpy(mask), torch.from_numpy(labels[batch].astype(np.int64)))
+
+# --- değerlendirme ---
+def scores(y: np.ndarray, p: np.ndarray, k: int) -> Dict[str, float]:
+    acc = float((y == p).mean()) if len(y) else 0.0
+    f1s, support = [], []
+    for c in range(k):
+        tp = np.sum((p == c) & (y == c)); fp = np.sum((p == c) & (y != c)); fn = np.sum((p != c) & (y == c))
+        f1s.append(2 * tp / (2 * tp + fp + fn) if tp + fp + fn else 0.0); support.append(np.sum(y == c))
+    support = np.asarray(support, dtype=float)
+    return {"accuracy": acc, "f1_macro": float(np.mean(f1s)),
+            "f1_weighted": float(np.dot(f1s, support) / support.sum()) if support.sum() else 0.0}
+
+def evaluate(model, cache: TokenCache, index: np.ndarray, labels: np.ndarray, k: int,
+             batch_size: int, pad_id: int) -> Dict[str, float]:
+    import torch
+    model.eval(); preds = []
+    with torch.no_grad():
+        for b in eval_batches(index, cache.lengths, batch_size):
+            ids, mask, _ = collate(cache, b, labels, pad_id)
+            preds.append((b, model(input_ids=ids, attention_mask=mask).logits.argmax(-1).numpy()))
+    model.train()
+    if not preds: return scores(np.zeros(0), np.zeros(0), k)
+    order = np.concatenate([b for b, _ in preds]); p = np.concatenate([x for _, x in preds])
+    return scores(labels[order], p, k)
+
+# --- kaydetme ---
+def save_model(model, tokenizer, out: str, id2label: Dict[int, str], preprocess: str):
+    """HF biçimi + label_mapping.json + preprocess.json; yarım klasör bırakmamak için önce geçici klasöre."""
+    tmp = out.rstrip("/\\") + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    model.save_pretrained(tmp); tokenizer.save_pretrained(tmp)
+    with open(os.path.join(tmp, "label_mapping.json"), "w", encoding="utf-8") as f:
+        json.dump({"id2label": id2label, "label2id": {v: k for k, v in id2label.items()}}, f, ensure_ascii=False, indent=2)
+    with open(os.path.join(tmp, "preprocess.json"), "w", encoding="utf-8") as f:
+        json.dump({"mode": preprocess}, f)
+    shutil.rmtree(out, ignore_errors=True)
+    os.replace(tmp, out)
+
+def _rng_state() -> Dict:
+    import torch
+    return {"torch": torch.get_rng_state(), "numpy": np.random.get_state(), "python": random.getstate()}
+
+def _set_rng_state(st: Dict):
+    import torch
+    torch.set_rng_state(st["torch"]); np.random.set_state(st["numpy"]); random.setstate(st["python"])
+
+# --- eğitim ---
+def train(task: str, path: str, out: Optional[str] = None, text_col: Optional[str] = None,
+          base: Optional[str] = None, epochs: int = 3, batch_size: int = 16, lr: float = 2e-5,
+          max_len: Optional[int] = None, threads: int = 0, save_steps: int = 200, patience: int = 0,
+          resume: bool = False, preprocess: Optional[str] = None, register: bool = False,
+          activate: bool = True) -> str:
+    import torch
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification, get_linear_schedule_with_warmup
+
+    cfg = dict(TASKS[task])
+    out = out or cfg["out"]; base = base or cfg["base"]; max_len = max_len or cfg["max_len"]
+    preprocess = preprocess or cfg["preprocess"]
+    if preprocess not in MODES: raise RuntimeError(f"Bilinmeyen ön işleme modu: {preprocess} ({', '.join(MODES)})")
+    torch.set_num_threads(threads or max(1, os.cpu_count() or 1))
+    random.seed(SEED); np.random.seed(SEED); torch.manual_seed(SEED)
+
+    texts, raw_labels = read_dataset(path, cfg["label_col"], text_col)
+    texts = preprocess_batch(texts, preprocess)
+    classes = sorted(set(raw_labels))                       # LabelEncoder ile aynı sıra
+    id2label = {i: c for i, c in enumerate(classes)}
+    labels = pd.Series(raw_labels).map({c: i for i, c in id2label.items()}).to_numpy(np.int64)
+    k = len(classes)
+    tr, va, te = split(labels)
+    print(f"[train] train {len(tr):,} | val {len(va):,} | test {len(te):,} | sınıflar: {classes}")
+
+    ckpt_dir = out.rstrip("/\\") + ".ckpt"
+    ckpt_path = os.path.join(ckpt_dir, "last.pt")
+    state = None
+    if resume and os.path.isfile(ckpt_path):
+        state = torch.load(ckpt_path, map_location="cpu", weights_only=False)
+        base = state["base"]   # devam: aynı taban model ve tokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(base)
+    cache = TokenCache.build(tokenizer, texts, max_len)
+    run_key = f"{task}:{os.path.basename(cache.path)}:{base}:{batch_size}:{epochs}:{lr}"
+    if state is not None and state["run_key"] != run_key:
+        raise RuntimeError(f"Kontrol noktası başka bir koşuya ait ({state['run_key']}); --resume olmadan başlatın.")
+
+    model = AutoModelForSequenceClassification.from_pretrained(
+        base, num_labels=k, id2label=id2label, label2id={c: i for i, c in id2label.items()})
+    no_decay = ("bias", "LayerNorm.weight")
+    optim = torch.optim.AdamW([
+        {"params": [p for n, p in model.named_parameters() if not any(x in n for x in no_decay)], "weight_decay": 0.01},
+        {"params": [p for n, p in model.named_parameters() if any(x in n for x in no_decay)], "weight_decay": 0.0},
+    ], lr=lr)
+    steps_per_epoch = math.ceil(len(tr) / batch_size)
+    sched = get_linear_schedule_with_warmup(optim, int(0.06 * steps_per_epoch * epochs), steps_per_epoch * epochs)
+    weight = None
+    if cfg["class_weights"]:   # N / (K * n_i), defterdeki gibi
+        counts = np.bincount(labels[tr], minlength=k).astype(float)
+        weight = torch.tensor(len(tr) / (k * np.maximum(counts, 1)), dtype=torch.float)
+    loss_fn = torch.nn.CrossEntropyLoss(weight=weight)
+    pad_id = tokenizer.pad_token_id or 0
+
+    epoch0, skip, best, bad = 0, 0, -1.0, 0
+    if state is not None:
+        model.load_state_dict(state["model"]); optim.load_state_dict(state["optim"]); sched.load_state_dict(state["sched"])
+        _set_rng_state(state["rng"])
+        epoch0, skip, best, bad = state["epoch"], state["step"], state["best"], state["bad"]
+        print(f"[train] devam: tur {epoch0 + 1}, adım {skip}/{steps_per_epoch}, en iyi {cfg['metric']}={best:.4f}")
+
+    def checkpoint(epoch: int, step: int):
+        os.makedirs(ckpt_dir, exist_ok=True)
+        torch.save({"run_key": run_key, "base": base, "epoch": epoch, "step": step, "best": best, "bad": bad,
+                    "model": model.state_dict(), "optim": optim.state_dict(), "sched": sched.state_dict(),
+                    "rng": _rng_state()}, ckpt_path + ".tmp")
+        os.replace(ckpt_path + ".tmp", ckpt_path)
+
+    model.train()
+    for epoch in range(epoch0, epochs):
+        # batch sırası tura bağlı tohumdan: devamda aynı sıra yeniden üretilip tamamlanan adımlar atlanır
+        batches = length_grouped_batches(tr, cache.lengths, batch_size, SEED + epoch)
+        t0 = time.perf_counter(); run_loss = 0.0; n = 0
+        for step in range(skip, len(batches)):
+            ids, mask, y = collate(cache, batches[step], labels, pad_id)
+            loss = loss_fn(model(input_ids=ids, attention_mask=mask).logits, y)
+            loss.backward()
+            torch.nn.utils.clip_grad_norm_(model.parameters(), 1.0)
+            optim.step(); sched.step(); optim.zero_grad(set_to_none=True)
+            run_loss += loss.item(); n += 1
+            if (step + 1) % 50 == 0:
+                dt = time.perf_counter() - t0
+                print(f"[train] tur {epoch + 1}/{epochs} adım {step + 1}/{len(batches)} "
+                      f"kayıp {run_loss / n:.4f} | {n * batch_size / dt:,.0f} örnek/sn", flush=True)
+            if save_steps and (step + 1) % save_steps == 0 and step + 1 < len(batches):
+                checkpoint(epoch, step + 1)
+        skip = 0
+        m = evaluate(model, cache, va, labels, k, batch_size * 2, pad_id)
+        print(f"[train] tur {epoch + 1} bitti ({time.perf_counter() - t0:.0f} sn) | val "
+              + " ".join(f"{a}={b:.4f}" for a, b in m.items()))
+        if m[cfg["metric"]] > best:
+            best, bad = m[cfg["metric"]], 0
+            save_model(model, tokenizer, os.path.join(ckpt_dir, "best"), id2label, preprocess)
+        else:
+            bad += 1
+        checkpoint(epoch + 1, 0)
+        if patience and bad >= patience:
+            print(f"[train] {patience} turdur iyileşme yok, erken durduruldu"); break
+
+    best_dir = os.path.join(ckpt_dir, "best")
+    if not os.path.isdir(best_dir):
+        raise RuntimeError(f"En iyi model bulunamadı ({best_dir}); eğitim tamamlanmadı.")
+    model = AutoModelForSequenceClassification.from_pretrained(best_dir)
+    m = evaluate(model, cache, te, labels, k, batch_size * 2, pad_id)
+    print("[train] test " + " ".join(f"{a}={b:.4f}" for a, b in m.items()))
+    save_model(model, tokenizer, out, id2label, preprocess)
+    print(f"[train] model kaydedildi -> {out}")
+    if register:   # test metrikleriyle yeni sürüm; etkinse çalışan GUI / collector yoklamada geçer
+        from model_registry import ModelRegistry
+        ver = ModelRegistry().register(task, out, {a: float(b) for a, b in m.items()},
+                                       f"{os.path.basename(path)} | {base}", activate)
+        print(f"[train] kayıt defteri -> {task}@{ver}" + (" (etkin)" if activate else ""))
+    return out
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description="Şikâyet / kategori modelini CPU'da eğitir (çıktı: models/...).")
+    ap.add_argument("task", choices=sorted(TASKS), help="Eğitilecek model")
+    ap.add_argument("input", help="Etiketli CSV")
+    ap.add_argument("-o", "--output", help="Model klasörü (varsayılan: settings'teki model klasörü)")
+    ap.add_argument("--text-col", help=f"Metin kolonu (varsayılan: {', '.join(TEXT_COLS)} içinden ilki)")
+    ap.add_argument("--base", help="Taban model (varsayılan: defterdeki BERTurk)")
+    ap.add_argument("--preprocess", choices=MODES, help="Girdi ön işleme (varsayılan: görevin defterdeki modu)")
+    ap.add_argument("--epochs", type=int, default=3)
+    ap.add_argument("--batch-size", type=int, default=16)
+    ap.add_argument("--lr", type=float, default=2e-5)
+    ap.add_argument("--max-len", type=int, help="En fazla token (varsayılan: görevin ayarı)")
+    ap.add_argument("--threads", type=int, default=0, help="torch iş parçacığı (varsayılan: çekirdek sayısı)")
+    ap.add_argument("--save-steps", type=int, default=200, help="Kaç adımda bir kontrol noktası")
+    ap.add_argument("--patience", type=int, default=0, help="Erken durdurma: iyileşmeyen tur sayısı (0 = kapalı)")
+    ap.add_argument("--resume", action="store_true", help="<çıktı>.ckpt/last.pt'den devam et")
+    ap.add_argument("--register", action="store_true", help="Modeli kayıt defterine yeni sürüm olarak ekle (model_registry.py)")
+    ap.add_argument("--no-activate", action="store_true", help="--register: yeni sürümü etkinleştirme")
+    a = ap.parse_args(argv)
+    train(a.task, a.input, a.output, a.text_col, a.base, a.epochs, a.batch_size, a.lr, a.max_len,
+          a.threads, a.save_steps, a.patience, a.resume, a.preprocess, a.register, not a.no_activate)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+# trends.py
+# Mahalle × kategori trend ve ani artış (spike) tespiti. Yorumlar geldikçe add() ile saatlik ve
+# günlük halka sayaçlarına işlenir; sayaçlar sabit uzunlukta olduğu için bellek ve sorgu maliyeti
+# geçmişin uzunluğundan bağımsızdır (yıllarca veri birikse de son birkaç haftalık kova tutulur).
+# Mevsimsel taban çizgisi:
+#   saat   son saatin sayısı  vs önceki HOUR_DAYS günün aynı saati (gün içi döngü)
+#   gün    son günün sayısı   vs önceki BASE_WEEKS haftanın aynı günü (haftalık döngü)
+#   hafta  son 7 günün toplamı vs önceki BASE_WEEKS ardışık 7 günlük pencere
+# z = (sayı - ortalama) / sqrt(max(varyans, ortalama, 1)): Poisson tabanı, sıfır varyanslı ya da
+# boş geçmişte tek tük yorumun alarm üretmesini engeller. Zamanlar UTC kovalarına düşer (summary_cube gibi).
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+HOUR_DAYS = 14         # saatlik taban: önceki 14 günün aynı saati
+BASE_WEEKS = 8         # günlük/haftalık taban: önceki 8 hafta
+Z_ALERT = 3.0          # bu z değerinin üstü ani artış
+MIN_COUNT = 5          # pencerede en az bu kadar yorum yoksa alarm yok
+MIN_BASELINE = 3       # tabanda geçmişi kapsayan en az bu kadar örnek yoksa pencere değerlendirilmez
+
+_HOUR, _DAY = 3600, 86400
+
+class _Ring:
+    """Son `span` kovanın (bucket = epoch // birim) mahalle × kategori sayıları; eski kovalar üzerine yazılır."""
+    def __init__(self, span: int, unit: int):
+        self.span, self.unit = span, unit
+        self.counts = np.zeros((span, 0, 0), dtype=np.int32)
+        self.bucket = np.full(span, -1, dtype=np.int64)   # yuvada hangi kova duruyor
+        self.head = -1                                    # görülen en yeni kova
+
+    def resize(self, m: int, k: int):
+        _, M, K = self.counts.shape
+        if (m, k) != (M, K):
+            grown = np.zeros((self.span, m, k), dtype=np.int32)
+            grown[:, :M, :K] = self.counts; self.counts = grown
+
+    def add(self, secs: np.ndarray, mi: np.ndarray, ki: np.ndarray):
+        b = secs // self.unit
+        self.head = max(self.head, int(b.max()))
+        keep = b > self.head - self.span            # halkanın gerisinde kalan geç gelenler atılır
+        b, mi, ki = b[keep], mi[keep], ki[keep]
+        if not len(b): return
+        ub = np.unique(b); us = ub % self.span
+        stale = self.bucket[us] != ub               # yuva başka (eski) kovaya ait: sıfırla
+        self.counts[us[stale]] = 0; self.bucket[us[stale]] = ub[stale]
+        np.add.at(self.counts, (b % self.span, mi, ki), 1)
+
+    def get(self, buckets: np.ndarray) -> np.ndarray:
+        """(len(buckets), M, K); halkada olmayan kovalar sıfır."""
+        buckets = np.asarray(buckets, dtype=np.int64)
+        slots = buckets % self.span
+        ok = (self.bucket[slots] == buckets) & (buckets > self.head - self.span)
+        return self.counts[slots] * ok[:, None, None]
+
+class TrendEngine:
+    """
+    add(df) artımlı günceller (date, mahalle, kategori kolonları; etiketi boş satırlar sayılmaz).
+    alerts() son kovalar için ani artışları z skoruna göre sıralı DataFrame olarak döner.
+    """
+    DIMS = ("mahalle", "kategori")
+    WINDOWS = ("saat", "gün", "hafta")
+    HISTORY_DAYS = 7 * (BASE_WEEKS + 1)   # tabanın ihtiyaç duyduğu geçmiş (from_store bu kadar okur)
+
+    def __init__(self, df: Optional[pd.DataFrame] = None):
+        self._vocab: Dict[str, Dict[str, int]] = {d: {} for d in self.DIMS}
+        self._labels: Dict[str, List[str]] = {d: [] for d in self.DIMS}
+        self._hours = _Ring(24 * (HOUR_DAYS + 1), _HOUR)
+        self._days = _Ring(self.HISTORY_DAYS, _DAY)
+        self._first: Optional[int] = None   # görülen en eski yorum (epoch sn): tabanın geçerli kısmı
+        self._last: Optional[int] = None    # en yeni yorum: alerts() varsayılan referans zamanı
+        if df is not None: self.add(df)
+
+    @classmethod
+    def from_store(cls, store, now: Optional[datetime] = None) -> "TrendEngine":
+        """Depodan sadece tabanın gerektirdiği son HISTORY_DAYS gün okunur."""
+        now = pd.Timestamp(now) if now is not None else pd.Timestamp.now(tz="UTC")
+        return cls(store.load_labels(start=now - pd.Timedelta(days=cls.HISTORY_DAYS)))
+
+    def _lut(self, dim: str, s: pd.Series) -> np.ndarray:
+        """summary_cube ile aynı: kolon -> indeks (yeni etiketler sözlüğe eklenir)."""
+        if not isinstance(s.dtype, pd.CategoricalDtype) or s.isna().any():
+            s = s.astype(object).fillna("").astype(str).astype("category")
+        voc, lab = self._vocab[dim], self._labels[dim]
+        lut = np.empty(len(s.cat.categories), dtype=np.int64)
+        for i, c in enumerate(s.cat.categories):
+            if c not in voc:
+                voc[c] = len(lab); lab.append(c)
+            lut[i] = voc[c]
+        return lut[s.cat.codes.to_numpy()]
+
+    def add(self, df: pd.DataFrame):
+        if df is None or df.empty or not all(d in df.columns for d in self.DIMS): return
+        t = pd.to_datetime(df["date"], utc=True, errors="coerce")
+        ok = t.notna().to_numpy().copy()
+        for d in self.DIMS: ok &= (df[d].astype(object).fillna("") != "").to_numpy()
+        if not ok.any(): return
+        secs = np.asarray(t.dt.tz_convert(None).values, dtype="datetime64[s]").astype(np.int64)[ok]
+        mi, ki = (self._lut(d, df[d])[ok] for d in self.DIMS)
+        m, k = (len(self._labels[d]) for d in self.DIMS)
+        for ring in (self._hours, self._days):
+            ring.resize(m, k); ring.add(secs, mi, ki)
+        lo, hi = int(secs.min()), int(secs.max())
+        self._first = lo if self._first is None else min(self._first, lo)
+        self._last = hi if self._last is None else max(self._last, hi)
+
+    # --- sorgu ---
+    def _window(self, name: str, now: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(son pencere sayıları (M, K), taban örnekleri (n, M, K)); sadece geçmişi kapsayan örnekler."""
+        if name == "saat":
+            h = now // _HOUR
+            cur = self._hours.get([h])[0]
+            base = [h - 24 * i for i in range(1, HOUR_DAYS + 1)]
+            return cur, self._hours.get([b for b in base if b >= self._first // _HOUR])
+        d = now // _DAY; first = self._first // _DAY
+        if name == "gün":
+            base = [d - 7 * i for i in range(1, BASE_WEEKS + 1)]
+            return self._days.get([d])[0], self._days.get([b for b in base if b >= first])
+        # hafta: 7 günlük kayan toplam
+        week = lambda end: self._days.get(np.arange(end - 6, end + 1)).sum(axis=0)
+        base = [d - 7 * i for i in range(1, BASE_WEEKS + 1) if d - 7 * i - 6 >= first]
+        return week(d), (np.stack([week(b) for b in base]) if base else np.zeros((0,) + self._days.counts.shape[1:]))
+
+    def alerts(self, now: Optional[datetime] = None, z: float = Z_ALERT,
+               min_count: int = MIN_COUNT) -> pd.DataFrame:
+        """
+        Kolonlar: pencere, mahalle, kategori, count, baseline (taban ortalaması), z.
+        now verilmezse en yeni yorumun zamanı (veri gecikmeli gelse de son kovalar değerlendirilir);
+        içinde bulunulan saat/gün henüz bitmemişse sayı eksik olabilir, yani alarm temkinli tarafta kalır.
+        """
+        cols = ["pencere", "mahalle", "kategori", "count", "baseline", "z"]
+        if self._last is None: return pd.DataFrame(columns=cols)
+        ref = self._last
+        if now is not None:
+            t = pd.Timestamp(now); ref = int((t.tz_localize("UTC") if t.tzinfo is None else t).timestamp())
+        parts = []
+        for name in self.WINDOWS:
+            cur, base = self._window(name, ref)
+            if len(base) < MIN_BASELINE: continue
+            mu = base.mean(axis=0); var = base.var(axis=0, ddof=1)
+            score = (cur - mu) / np.sqrt(np.maximum(np.maximum(var, mu), 1.0))
+            mi, ki = np.nonzero((score >= z) & (cur >= min_count))
+            if not len(mi): continue
+            parts.append(pd.DataFrame({
+                "pencere": name,
+                "mahalle": [self._labels["mahalle"][i] for i in mi],
+                "kategori": [self._labels["kategori"][i] for i in ki],
+                "count": cur[mi, ki].astype(np.int64), "baseline": mu[mi, ki].round(1),
+                "z": score[mi, ki].round(1)}, columns=cols))
+        if not parts: return pd.DataFrame(columns=cols)
+        return pd.concat(parts, ignore_index=True).sort_values("z", ascending=False, kind="stable").reset_index(drop=True)
@@ -0,0 +1,174 @@
+# vector_index.py
+# "Buna benzer yorumlar" için yoğun vektör indeksi. Vektörler şikâyet modelinin sınıflandırma
+# geçişinde çıkan ortalama havuzlanmış cümle gömmeleridir (models.TextClassifier, ek ileri geçiş yok);
+# birim uzunlukta float16 saklanır, benzerlik = iç çarpım (kosinüs).
+#   - IVF_MIN satıra kadar kaba kuvvet: tüm matris bloklar halinde taranır
+#   - daha büyük geçmişte IVF: küresel k-means merkezleri, sorguda en yakın NPROBE listenin
+#     satırları (+ son kurulumdan sonra eklenenler) taranır; satırlar liste sırasıyla bitişik tutulur
+#   - search() sadece sorgular; listeler build() ile ya da parça parça kurulur: snapshot() (çağıran
+#     iş parçacığı) -> plan() (arka planda, indekse dokunmaz) -> install() (çağıran iş parçacığı)
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+IVF_MIN = 20_000      # bu sayının altında kaba kuvvet (birkaç ms)
+NPROBE = 8            # sorgu başına taranan liste
+REBUILD_RATIO = 0.2   # kurulumdan sonra eklenen satır bu oranı aşınca listeler yeniden kurulur
+KMEANS_ITERS = 8
+BLOCK = 65_536        # kaba kuvvet / atama blok boyu (float32'ye çevrilen ara bellek)
+
+def _unit(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float32)
+    n = np.linalg.norm(x, axis=-1, keepdims=True)
+    return x / np.maximum(n, 1e-12)
+
+class Layout(NamedTuple):
+    """plan() çıktısı: ilk n satırın liste sırasına dizilmiş hali."""
+    n: int
+    vecs: np.ndarray        # ilk n satır sıralı; sonrası kuyruk için boş kapasite
+    ids: List[str]
+    pos: Dict[str, int]
+    bounds: np.ndarray
+    centroids: np.ndarray
+
+class VectorIndex:
+    """comment_id -> birim vektör; search() en benzer k yorumu (id, skor) olarak döner."""
+    def __init__(self, dim: Optional[int] = None):
+        self.dim = dim
+        self.ids: List[str] = []
+        self._pos: Dict[str, int] = {}
+        self._vecs = np.zeros((0, dim or 0), dtype=np.float16)   # kapasite ikiye katlanarak büyür
+        self._n = 0
+        self._centroids: Optional[np.ndarray] = None
+        self._bounds = np.zeros(1, dtype=np.int64)   # liste c'nin satırları [bounds[c], bounds[c+1])
+        self._indexed = 0                            # listelere dağıtılmış satır sayısı (önek)
+        self._dirty: Optional[Set[str]] = None       # snapshot'tan sonra yerinde güncellenenler
+
+    def __len__(self): return self._n
+
+    def __contains__(self, cid: str): return cid in self._pos
+
+    # --- yazma ---
+    def add(self, ids: Sequence[str], vecs: np.ndarray):
+        """Yeni id'ler sona eklenir; var olanın vektörü yerinde güncellenir."""
+        if not len(ids): return
+        vecs = np.asarray(vecs)
+        if self.dim is None or not self._n:
+            self.dim = vecs.shape[1]
+            if self._vecs.shape[1] != self.dim: self._vecs = np.zeros((0, self.dim), dtype=np.float16)
+        if vecs.shape[1] != self.dim:
+            raise RuntimeError(f"Vektör boyutu uyuşmuyor: {vecs.shape[1]} != {self.dim}")
+        vecs = _unit(vecs).astype(np.float16)
+        new = []
+        for i, cid in enumerate(ids):
+            p = self._pos.get(cid)
+            if p is None: new.append(i)
+            else:
+                self._vecs[p] = vecs[i]
+                if self._dirty is not None: self._dirty.add(cid)
+        if not new: return
+        need = self._n + len(new)
+        if need > len(self._vecs):
+            grown = np.zeros((max(need, 2 * len(self._vecs), 1024), self.dim), dtype=np.float16)
+            grown[:self._n] = self._vecs[:self._n]; self._vecs = grown
+        self._vecs[self._n:need] = vecs[new]
+        for k, i in enumerate(new):
+            self._pos[ids[i]] = self._n + k; self.ids.append(ids[i])
+        self._n = need
+
+    def vector(self, cid: str) -> Optional[np.ndarray]:
+        p = self._pos.get(cid)
+        return None if p is None else self._vecs[p].astype(np.float32)
+
+    # --- IVF ---
+    def needs_build(self) -> bool:
+        """Listeler yok ya da son kurulumdan sonra eklenenler REBUILD_RATIO'yu aştı."""
+        n, done = self._n, self._indexed
+        return n >= IVF_MIN and (self._centroids is None or n - done > REBUILD_RATIO * done)
+
+    def snapshot(self) -> Tuple[int, np.ndarray, List[str]]:
+        """plan() girdisi; bundan sonraki yerinde güncellemeler install()'da yeniden uygulanır."""
+        self._dirty = set()
+        return self._n, self._vecs, self.ids[:self._n]
+
+    @staticmethod
+    def plan(n: int, vecs: np.ndarray, ids: List[str], nlist: Optional[int] = None,
+             seed: int = 0) -> Optional[Layout]:
+        """İlk n satır için k-means listeleri ve liste sırasına dizilmiş kopya (IVF_MIN altında None).
+        Sadece girdileri okur: indeks bu sırada eklemeye ve sorgulanmaya devam edebilir."""
+        if n < IVF_MIN: return None
+        t0 = time.perf_counter()
+        nlist = nlist or int(np.sqrt(n))
+        rng = np.random.default_rng(seed)
+        sample = vecs[rng.choice(n, size=min(n, nlist * 32), replace=False)].astype(np.float32)
+        cent = sample[rng.choice(len(sample), size=nlist, replace=False)]
+        for _ in range(KMEANS_ITERS):   # küresel k-means: merkezler birim uzunlukta
+            a = np.argmax(sample @ cent.T, axis=1)
+            sums = np.zeros_like(cent); np.add.at(sums, a, sample)
+            empty = np.bincount(a, minlength=nlist) == 0
+            sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+            cent = _unit(sums)
+        assign = np.concatenate([np.argmax(vecs[i:min(i + BLOCK, n)].astype(np.float32) @ cent.T, axis=1)
+                                 for i in range(0, n, BLOCK)])
+        order = np.argsort(assign, kind="stable")
+        out = [ids[i] for i in order]
+        arr = np.empty((max(len(vecs), n + n // 2), vecs.shape[1]), dtype=vecs.dtype)
+        np.take(vecs[:n], order, axis=0, out=arr[:n])
+        lay = Layout(n, arr, out, {cid: i for i, cid in enumerate(out)},
+                     np.searchsorted(assign[order], np.arange(nlist + 1)), cent.astype(np.float32))
+        print(f"[vectors] IVF: {n:,} vektör, {nlist} liste ({time.perf_counter() - t0:.1f} sn)")
+        return lay
+
+    def install(self, lay: Optional[Layout]):
+        """plan() sonucunu takar; snapshot'tan sonra eklenen satırlar kuyrukta kalır (sorguda taranır)."""
+        dirty, self._dirty = self._dirty or set(), None
+        if lay is None:
+            self._centroids = None; self._indexed = 0; return
+        n = lay.n
+        vecs = lay.vecs
+        if len(vecs) < self._n:   # kurulum sırasında kapasiteyi aşan ekleme
+            vecs = np.empty_like(self._vecs); vecs[:n] = lay.vecs[:n]
+        vecs[n:self._n] = self._vecs[n:self._n]
+        pos = lay.pos
+        for k, cid in enumerate(self.ids[n:self._n]): pos[cid] = n + k
+        for cid in dirty:   # kurulum sırasında güncellenen eski satırlar
+            if pos[cid] < n: vecs[pos[cid]] = self._vecs[self._pos[cid]]
+        self._vecs, self.ids, self._pos = vecs, lay.ids + self.ids[n:self._n], pos
+        self._bounds, self._centroids, self._indexed = lay.bounds, lay.centroids, n
+
+    def build(self, nlist: Optional[int] = None, seed: int = 0):
+        """Satırları k-means listelerine dağıtır ve liste sırasına dizer (IVF_MIN altında kaba kuvvet kalır)."""
+        self.install(self.plan(*self.snapshot(), nlist, seed))
+
+    # --- sorgu ---
+    def _candidates(self, q: np.ndarray, nprobe: int) -> Optional[np.ndarray]:
+        """IVF varken taranacak satırlar; kaba kuvvette None (hepsi)."""
+        if self._centroids is None: return None
+        lists = np.argpartition(-(self._centroids @ q), min(nprobe, len(self._centroids)) - 1)[:nprobe]
+        parts = [np.arange(self._bounds[c], self._bounds[c + 1]) for c in lists]
+        parts.append(np.arange(self._indexed, self._n))   # son kurulumdan sonra eklenenler
+        return np.concatenate(parts)
+
+    def search(self, query, k: int = 10, exclude: Iterable[str] = (),
+               nprobe: int = NPROBE) -> List[Tuple[str, float]]:
+        """query: comment_id ya da vektör. En benzer k yorum (kendisi ve exclude hariç), azalan skor."""
+        if not self._n: return []
+        skip = set(exclude)
+        if isinstance(query, str):
+            skip.add(query); q = self.vector(query)
+            if q is None: return []
+        else:
+            q = _unit(query)
+        rows = self._candidates(q, nprobe)
+        if rows is None:
+            scores = np.concatenate([self._vecs[i:min(i + BLOCK, self._n)].astype(np.float32) @ q
+                                     for i in range(0, self._n, BLOCK)])
+            rows = np.arange(self._n)
+        else:
+            scores = self._vecs[rows].astype(np.float32) @ q
+        want = min(len(rows), k + len(skip))
+        top = np.argpartition(-scores, want - 1)[:want] if want < len(rows) else np.arange(len(rows))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        out = [(self.ids[rows[i]], float(scores[i])) for i in top if self.ids[rows[i]] not in skip]
+        return out[:k]